@@ -0,0 +1,130 @@
+"""
+In-Process Caches
+Small TTL + LRU cache used to skip repeated database reads
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from app.core.config import settings
+import hashlib
+import json
+import time
+
+# ==========================================
+# TTL + LRU CACHE
+# ==========================================
+
+class TTLCache:
+    """
+    Bounded cache with per-entry expiry
+    
+    - Entries expire `ttl_seconds` after they were stored
+    - When full, the least recently used entry is evicted
+    - Hit/miss counters are kept for monitoring
+    
+    Not thread-safe: only use from the event loop thread.
+    """
+    
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return cached value or None if missing/expired"""
+        entry = self._entries.get(key)
+        
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any):
+        """Store value and evict the oldest entry if over capacity"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, key: Hashable):
+        """Drop a single entry (write-through invalidation)"""
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+    
+    def clear(self):
+        """Drop everything"""
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cache metrics"""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+# ==========================================
+# ETAGS
+# ==========================================
+
+def compute_etag(payload: Any) -> str:
+    """Strong ETag from the JSON form of a response payload"""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match check (RFC 9110 weak comparison)
+    Handles lists ("a", "b") and "*"
+    """
+    if not if_none_match:
+        return False
+    
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+# ==========================================
+# SHARED CACHE INSTANCES
+# ==========================================
+
+# user_id -> user document (without hashed_password)
+identity_cache = TTLCache(
+    name="identity",
+    max_entries=settings.IDENTITY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.IDENTITY_CACHE_TTL_SECONDS
+)
+
+# (user_id, role, views, date, data version) -> (etag, workspace payload)
+# data_version lives on user_stats, so every worker keys on the same value
+workspace_cache = TTLCache(
+    name="workspace",
+    max_entries=settings.WORKSPACE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.WORKSPACE_CACHE_TTL_SECONDS
+)
@@ -33,10 +33,59 @@ class Settings:
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_MINUTES: int = 1440  # 24 hours
     
+    # Password Hashing Pool (bcrypt runs off the event loop)
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # thread | process
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))  # Waiting jobs before 503
+    
+    # Identity Cache (get_current_user)
+    IDENTITY_CACHE_TTL_SECONDS: int = int(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "60"))
+    IDENTITY_CACHE_MAX_ENTRIES: int = int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", "10000"))
+    
+    # Token Version Map (/auth/verify revocation; max staleness across workers)
+    TOKEN_VERSION_TTL_SECONDS: int = int(os.getenv("TOKEN_VERSION_TTL_SECONDS", "30"))
+    
     # Database Settings
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "clarity_ai")
     
+    # MongoDB Connection Pool (per worker process)
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+    MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))  # Warm connections kept open
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "0"))  # 0 = wait forever
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+    MONGODB_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "20000"))
+    MONGODB_COMPRESSORS: str = os.getenv("MONGODB_COMPRESSORS", "")  # e.g. "zstd,snappy"
+    
+    # Collection/Index Bootstrap
+    DB_BOOTSTRAP_BACKGROUND_INDEXES: bool = os.getenv("DB_BOOTSTRAP_BACKGROUND_INDEXES", "False").lower() == "true"
+    
+    # History Layout (time-series needs MongoDB 6.0+)
+    HISTORY_TIME_SERIES: bool = os.getenv("HISTORY_TIME_SERIES", "False").lower() == "true"
+    HISTORY_TIME_SERIES_GRANULARITY: str = os.getenv("HISTORY_TIME_SERIES_GRANULARITY", "hours")  # seconds | minutes | hours
+    
+    # Audit Queue (write-behind history events)
+    AUDIT_WRITE_BEHIND: bool = os.getenv("AUDIT_WRITE_BEHIND", "True").lower() == "true"
+    AUDIT_QUEUE_MAX_SIZE: int = int(os.getenv("AUDIT_QUEUE_MAX_SIZE", "10000"))
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    AUDIT_FLUSH_INTERVAL_MS: int = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "250"))
+    AUDIT_ENQUEUE_TIMEOUT_MS: int = int(os.getenv("AUDIT_ENQUEUE_TIMEOUT_MS", "50"))  # Then write inline
+    
+    # Workspace Views (one $facet on tasks instead of one query per read)
+    WORKSPACE_FACET_LOADER: bool = os.getenv("WORKSPACE_FACET_LOADER", "False").lower() == "true"
+    
+    # Workspace Snapshots (precomputed views, rebuilt after task/onboarding writes)
+    WORKSPACE_SNAPSHOTS: bool = os.getenv("WORKSPACE_SNAPSHOTS", "False").lower() == "true"
+    WORKSPACE_SNAPSHOT_DEBOUNCE_MS: int = int(os.getenv("WORKSPACE_SNAPSHOT_DEBOUNCE_MS", "200"))  # Coalesce bursts of writes
+    
+    # Workspace Response Cache (versioned, ETag / 304)
+    WORKSPACE_CACHE_TTL_SECONDS: int = int(os.getenv("WORKSPACE_CACHE_TTL_SECONDS", "300"))  # 0 = disabled
+    WORKSPACE_CACHE_MAX_ENTRIES: int = int(os.getenv("WORKSPACE_CACHE_MAX_ENTRIES", "5000"))
+    
+    # Pipoo Insights
+    PIPOO_INSIGHT_DEDUPE_SECONDS: int = int(os.getenv("PIPOO_INSIGHT_DEDUPE_SECONDS", "3600"))  # Identical insight skipped within window
+    PIPOO_INSIGHT_RING_SIZE: int = int(os.getenv("PIPOO_INSIGHT_RING_SIZE", "20"))  # Recent insights kept per user
+    
     # Debug Mode
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
 
@@ -5,8 +5,11 @@ Handles MongoDB connection and provides database instance
 """
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from app.core.config import settings
-from typing import Optional
+from collections import deque
+from typing import Optional, Dict, Any
+import threading
 
 # ==========================================
 # DATABASE CLIENT (Singleton)
@@ -18,6 +21,135 @@ class Database:
 
 database = Database()
 
+# ==========================================
+# CONNECTION POOL TELEMETRY
+# ==========================================
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Collects connection pool metrics from pymongo pool events
+    
+    Tracks checkout latency and wait-queue depth so the pool can be
+    sized for the number of uvicorn workers. Events fire on Motor's
+    worker threads, hence the lock.
+    """
+    
+    LATENCY_SAMPLES = 1000  # Recent checkout durations kept for percentiles
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=self.LATENCY_SAMPLES)
+        
+        self.connections_open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.pool_clears = 0
+    
+    # Pool lifecycle
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+    
+    def pool_closed(self, event):
+        pass
+    
+    # Connection lifecycle
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open -= 1
+    
+    # Checkout / checkin
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+    
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            reason = str(event.reason)
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+    
+    def connection_checked_out(self, event):
+        duration = getattr(event, "duration", None)  # Seconds (pymongo >= 4.7)
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+            self.checkouts += 1
+            if duration is not None:
+                self._latencies.append(duration)
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Pool metrics snapshot"""
+        with self._lock:
+            samples = sorted(self._latencies)
+            failures = dict(self.checkout_failures)
+        
+        def percentile(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            index = min(len(samples) - 1, int(len(samples) * p))
+            return round(samples[index] * 1000, 3)
+        
+        return {
+            "max_pool_size": settings.MONGODB_MAX_POOL_SIZE,
+            "min_pool_size": settings.MONGODB_MIN_POOL_SIZE,
+            "connections_open": self.connections_open,
+            "checked_out": self.checked_out,
+            "wait_queue_depth": self.waiting,
+            "max_wait_queue_depth": self.max_waiting,
+            "checkouts": self.checkouts,
+            "checkout_failures": failures,
+            "pool_clears": self.pool_clears,
+            "checkout_latency_ms": {
+                "p50": percentile(0.50),
+                "p99": percentile(0.99),
+                "max": round(samples[-1] * 1000, 3) if samples else None
+            }
+        }
+
+pool_metrics = PoolMetricsListener()
+
+def _client_options() -> Dict[str, Any]:
+    """
+    Build AsyncIOMotorClient keyword arguments from settings
+    """
+    options = {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+        "event_listeners": [pool_metrics]
+    }
+    
+    if settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS > 0:
+        options["waitQueueTimeoutMS"] = settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS
+    
+    if settings.MONGODB_COMPRESSORS:
+        options["compressors"] = settings.MONGODB_COMPRESSORS
+    
+    return options
+
 # ==========================================
 # CONNECT TO DATABASE
 # ==========================================
@@ -28,17 +160,25 @@ async def connect_to_mongodb():
     Called on application startup
     """
     try:
-        database.client = AsyncIOMotorClient(settings.MONGODB_URL)
+        database.client = AsyncIOMotorClient(settings.MONGODB_URL, **_client_options())
         database.db = database.client[settings.DATABASE_NAME]
         
         # Test connection
         await database.client.admin.command('ping')
         
         print(f"✅ Connected to MongoDB: {settings.DATABASE_NAME}")
+        print(
+            f"   🔌 Pool: max={settings.MONGODB_MAX_POOL_SIZE}, "
+            f"min={settings.MONGODB_MIN_POOL_SIZE}, "
+            f"compressors={settings.MONGODB_COMPRESSORS or 'none'}"
+        )
         
         # ⭐ NEW - Create collections with validation
         from app.db.collections import create_collections_with_validation
-        await create_collections_with_validation(database.db)
+        await create_collections_with_validation(
+            database.db,
+            background_indexes=settings.DB_BOOTSTRAP_BACKGROUND_INDEXES
+        )
         
         print(f"✅ Collections initialized")
         
@@ -84,4 +224,9 @@ class Collections:
     ONBOARDING_PROFILES = "onboarding_profiles"
     TASKS = "tasks"
     HISTORY = "history"
-    SKILL_PROOFS = "skill_proofs"
\ No newline at end of file
+    SKILL_PROOFS = "skill_proofs"
+    USER_STATS = "user_stats"  # Materialized per-user counters
+    SCHEMA_META = "schema_meta"  # Bootstrap version stamp
+    PIPOO_INSIGHTS = "pipoo_insights"  # Per-user ring of recent insights
+    HISTORY_LEGACY = "history_legacy"  # Regular-layout history kept after the time-series migration
+    WORKSPACE_SNAPSHOTS = "workspace_snapshots"  # Precomputed workspace views per user + view
\ No newline at end of file
@@ -99,7 +99,7 @@ Provides database and repository instances to routes
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.core.security import decode_access_token
+from app.core.security import decode_access_token, token_versions
 from app.core.database import get_database
 from app.db.repositories import (
     UserRepository,
@@ -128,8 +128,9 @@ async def get_current_user(
     This function:
     1. Extracts token from Authorization header
     2. Decodes and validates token
-    3. Returns user data if valid
-    4. Raises 401 if invalid
+    3. Resolves the user through the identity cache
+    4. Returns user data if valid
+    5. Raises 401 if invalid
     
     Usage in routes:
         @app.get("/protected")
@@ -146,9 +147,10 @@ async def get_current_user(
             detail="Invalid or expired token"
         )
     
-    # Get user from database
+    # Get user (identity cache first, MongoDB on miss or when the token
+    # is newer than the cached entry, i.e. changed on another worker)
     user_repo = UserRepository(db)
-    user = await user_repo.get_user_by_id(payload.get("sub"))
+    user = await user_repo.get_cached_user(payload.get("sub"), payload.get("token_version", 0))
     
     if not user:
         raise HTTPException(
@@ -156,6 +158,13 @@ async def get_current_user(
             detail="User not found"
         )
     
+    # Reject tokens issued before a role/onboarding change
+    if payload.get("token_version", 0) < user.get("token_version", 0):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked. Please log in again."
+        )
+    
     return {
         "user_id": user["user_id"],
         "email": user["email"],
@@ -163,6 +172,50 @@ async def get_current_user(
         "onboarding_completed": user.get("onboarding_completed", False)
     }
 
+# ==========================================
+# STATELESS TOKEN CHECK (No database lookup)
+# ==========================================
+
+async def get_token_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> dict:
+    """
+    Validate JWT using signature, expiry and token_version only
+    
+    The version is checked against the in-memory map; a user it doesn't
+    know (or whose entry expired) costs one projected users read, then
+    none for TOKEN_VERSION_TTL_SECONDS. A role/onboarding change made on
+    another worker is therefore enforced within that window.
+    Use get_current_user when fresh database state is required.
+    """
+    payload = decode_access_token(credentials.credentials)
+    if not payload or not payload.get("sub"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+    
+    user_id = payload["sub"]
+    token_version = payload.get("token_version", 0)
+    current = token_versions.is_current(user_id, token_version)
+    if current is None:
+        latest = await UserRepository(db).load_token_version(user_id)
+        current = latest is not None and token_version >= latest
+    
+    if not current:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked. Please log in again."
+        )
+    
+    return {
+        "user_id": user_id,
+        "email": payload.get("email"),
+        "role": payload.get("role"),
+        "onboarding_completed": payload.get("onboarding_completed", False)
+    }
+
 # ==========================================
 # REPOSITORY DEPENDENCIES
 # ==========================================
@@ -1,9 +1,13 @@
 # app/core/security.py
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, Callable, Any, Tuple
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+import asyncio
+import time
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -25,6 +29,166 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     return pwd_context.verify(plain_password, hashed_password)
 
+# ==========================================
+# PASSWORD HASHING POOL (Off the event loop)
+# ==========================================
+
+class PasswordHashingPool:
+    """
+    Bounded worker pool for bcrypt
+    
+    bcrypt takes tens of milliseconds per call. Running it inline in an
+    async route blocks every other request on the worker, so hashing and
+    verification are handed to a thread or process pool instead.
+    
+    The pool accepts at most `workers + max_queue` jobs at once.
+    Anything beyond that is rejected immediately with 503 so a login
+    burst cannot build an unbounded backlog.
+    """
+    
+    def __init__(self, executor_type: str, workers: int, max_queue: int):
+        self.executor_type = executor_type
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[Executor] = None
+        
+        # Counters (only touched from the event loop thread)
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    @property
+    def capacity(self) -> int:
+        """Maximum number of running + waiting jobs"""
+        return self.workers + self.max_queue
+    
+    def _get_executor(self) -> Executor:
+        """Create the executor lazily (process pools are expensive to fork)"""
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="bcrypt"
+                )
+        return self._executor
+    
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a hashing function in the pool
+        Raises 503 if the pool is saturated
+        """
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy. Please retry shortly.",
+                headers={"Retry-After": "1"}
+            )
+        
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Pool metrics"""
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+    
+    def shutdown(self):
+        """Stop worker threads/processes (called on app shutdown)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_pool = PasswordHashingPool(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password without blocking the event loop
+    Use this from async routes
+    """
+    return await password_pool.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password without blocking the event loop
+    Use this from async routes
+    """
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+# ==========================================
+# TOKEN VERSIONS (Stateless revocation)
+# ==========================================
+
+class TokenVersionMap:
+    """
+    Compact in-memory map of user_id -> current token_version
+    
+    Every access token carries the user's `token_version` at issue time.
+    The version is bumped in MongoDB whenever the user's role or
+    onboarding state changes, so older tokens can be rejected.
+    
+    Entries are versions read from MongoDB (logins, identity lookups,
+    bumps) and expire after `ttl_seconds`: a bump made by another
+    worker is seen here within that window. Unknown or expired users
+    are None, and the caller reads the database and observes the result.
+    """
+    
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._versions: Dict[str, Tuple[int, float]] = {}
+    
+    def observe(self, user_id: str, version: int):
+        """Record a version seen in the database (never moves backwards)"""
+        known = self._versions.get(user_id)
+        if known is not None:
+            version = max(version, known[0])
+        self._versions[user_id] = (version, time.monotonic() + self.ttl_seconds)
+    
+    def get(self, user_id: str) -> Optional[int]:
+        """Known current version, or None if unknown or expired"""
+        entry = self._versions.get(user_id)
+        if entry is None:
+            return None
+        
+        version, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._versions[user_id]
+            return None
+        return version
+    
+    def is_current(self, user_id: str, token_version: int) -> Optional[bool]:
+        """False if the token was issued before the latest bump, None if unknown"""
+        current = self.get(user_id)
+        return None if current is None else token_version >= current
+    
+    def clear(self):
+        """Forget all versions"""
+        self._versions.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Map metrics"""
+        return {"tracked_users": len(self._versions), "ttl_seconds": self.ttl_seconds}
+
+token_versions = TokenVersionMap(ttl_seconds=settings.TOKEN_VERSION_TTL_SECONDS)
+
 # ==========================================
 # JWT TOKEN CREATION
 # ==========================================
@@ -35,6 +199,7 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
     
     Args:
         data: Dictionary containing user data to encode
+              (include "token_version" so the token can be revoked)
         expires_delta: Optional custom expiration time
     
     Returns:
@@ -49,6 +214,7 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRATION_MINUTES)
     
     to_encode.update({"exp": expire})
+    to_encode.setdefault("token_version", 0)
     
     # Create JWT token
     encoded_jwt = jwt.encode(
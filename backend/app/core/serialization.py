@@ -0,0 +1,66 @@
+"""
+Date Serialization
+Native BSON datetimes in MongoDB, ISO strings at the API edge
+"""
+
+from datetime import datetime, date
+from typing import Any, Optional, Union
+
+# Fields that are calendar dates, rendered as YYYY-MM-DD
+DATE_ONLY_FIELDS = {"assigned_date", "due_date"}
+
+# ==========================================
+# STORAGE SIDE
+# ==========================================
+
+def utcnow() -> datetime:
+    """
+    Current UTC time at BSON precision (milliseconds)
+    Use for every stored timestamp so values round-trip exactly
+    """
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def parse_datetime(value: Union[str, datetime, date, None]) -> Optional[datetime]:
+    """
+    Convert an ISO string ("2024-01-01" or "2024-01-01T14:30:00") to datetime
+    Datetimes pass through; None stays None
+    Raises ValueError for anything unparseable
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+# ==========================================
+# API SIDE
+# ==========================================
+
+def to_iso(value: Any, date_only: bool = False) -> Any:
+    """
+    Render a datetime the way the API always has (ISO string)
+    Non-datetime values pass through unchanged
+    """
+    if isinstance(value, datetime):
+        return value.date().isoformat() if date_only else value.isoformat()
+    return value
+
+def serialize_document(document: Any) -> Any:
+    """
+    Recursively convert stored datetimes to ISO strings
+    Calendar-date fields (assigned_date, due_date) become YYYY-MM-DD
+    """
+    if isinstance(document, dict):
+        return {
+            key: to_iso(value, date_only=True) if key in DATE_ONLY_FIELDS and isinstance(value, datetime)
+            else serialize_document(value)
+            for key, value in document.items()
+        }
+    
+    if isinstance(document, list):
+        return [serialize_document(item) for item in document]
+    
+    return to_iso(document)
@@ -0,0 +1,96 @@
+"""
+Stage Timings
+Per-stage wall-clock timings for request handlers that fan out
+"""
+
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Dict, Optional
+import asyncio
+import time
+
+# ==========================================
+# PER-REQUEST TIMINGS
+# ==========================================
+
+class StageTimings:
+    """
+    Records when each named stage started and how long it took
+    
+    Stages run through run() (one awaitable) or gather() (independent
+    awaitables, concurrently). Overlapping start/end offsets show which
+    stages ran in parallel; the longest chain is the critical path.
+    """
+    
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+    
+    async def run(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        """Await one stage and record its timing"""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            end = time.perf_counter()
+            self.stages[name] = {
+                "start_ms": round((start - self._origin) * 1000, 2),
+                "ms": round((end - start) * 1000, 2)
+            }
+    
+    async def gather(self, **stages: Awaitable[Any]) -> Dict[str, Any]:
+        """Run independent stages concurrently; results keyed by stage name"""
+        results = await asyncio.gather(*[self.run(name, awaitable) for name, awaitable in stages.items()])
+        return dict(zip(stages, results))
+    
+    @property
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self._origin) * 1000, 2)
+    
+    def server_timing(self) -> str:
+        """Server-Timing header value (shown in browser devtools)"""
+        parts = [f"{name};dur={stage['ms']}" for name, stage in self.stages.items()]
+        parts.append(f"total;dur={self.total_ms}")
+        return ", ".join(parts)
+
+# ==========================================
+# AGGREGATED METRICS
+# ==========================================
+
+class StageMetrics:
+    """
+    Recent stage timings per handler, for /dev/metrics
+    Keeps the last `samples` durations of every (handler, stage)
+    """
+    
+    def __init__(self, samples: int = 500):
+        self._samples: Dict[str, Dict[str, deque]] = defaultdict(lambda: defaultdict(lambda: deque(maxlen=samples)))
+    
+    def record(self, handler: str, timings: StageTimings):
+        """Add one request's timings"""
+        samples = self._samples[handler]
+        for name, stage in timings.stages.items():
+            samples[name].append(stage["ms"])
+        samples["total"].append(timings.total_ms)
+    
+    @staticmethod
+    def _percentile(values: list, p: float) -> Optional[float]:
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(len(values) * p))]
+    
+    def stats(self) -> Dict[str, Any]:
+        """p50/p99 per stage, per handler"""
+        result = {}
+        for handler, stages in self._samples.items():
+            result[handler] = {}
+            for name, durations in stages.items():
+                values = sorted(durations)
+                result[handler][name] = {
+                    "n": len(values),
+                    "p50_ms": self._percentile(values, 0.50),
+                    "p99_ms": self._percentile(values, 0.99)
+                }
+        return result
+
+# Shared across requests
+view_timings = StageMetrics()
@@ -0,0 +1,271 @@
+"""
+Write-Behind Audit Queue
+History events are buffered in process and flushed with insert_many
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError, PyMongoError
+from app.core.config import settings
+from app.core.database import Collections
+from app.db.singleflight import read_coalescer
+from collections import deque
+from typing import Any, Dict, List, Optional
+import asyncio
+import time
+
+DUPLICATE_KEY = 11000
+
+# ==========================================
+# AUDIT QUEUE
+# ==========================================
+
+class AuditQueue:
+    """
+    Bounded queue of history events, drained by one background task
+    
+    - A batch is flushed when it reaches batch_size or flush_interval
+      has passed since its first event, whichever comes first
+    - Unordered insert_many: one bad document doesn't block the rest
+    - Backpressure: when full, enqueue waits up to enqueue_timeout,
+      then the caller writes inline
+    - Failed inserts are retried max_retries times; a batch that still
+      can't be written is dropped and counted in failed_events
+    - Counters are applied only for inserted events; if that step fails
+      the affected users' counters are rebuilt instead
+    - stop() drains everything still queued
+    
+    Readers may see an event up to flush_interval after the request
+    that logged it returns.
+    """
+    
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        enqueue_timeout: float,
+        max_retries: int = 2
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._stopping = False
+        
+        self.enqueued = 0
+        self.inline_fallbacks = 0
+        self.flushed_events = 0
+        self.flushes = 0
+        self.failed_events = 0
+        self.counter_failures = 0
+        self.restarts = 0
+        self._flush_latencies = deque(maxlen=1000)
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start the flusher (call once the DB is connected)"""
+        if self.running:
+            return
+        self._db = db
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._stopping = False
+        self._spawn()
+        print(f"✅ Audit queue started (batch {self.batch_size}, every {self.flush_interval * 1000:.0f}ms)")
+    
+    async def stop(self):
+        """Flush remaining events and stop the flusher"""
+        if not self.running:
+            return
+        self._stopping = True
+        await asyncio.gather(self._task, return_exceptions=True)
+        print(f"👋 Audit queue drained ({self.flushed_events} events flushed)")
+    
+    async def enqueue(self, event: Dict[str, Any]) -> bool:
+        """
+        Queue an event for the next flush
+        Returns False if the caller should write it inline
+        (queue not running, or still full after enqueue_timeout)
+        """
+        if not self.running or self._stopping:
+            return False
+        
+        try:
+            await asyncio.wait_for(self._queue.put(event), timeout=self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.inline_fallbacks += 1
+            return False
+        
+        self.enqueued += 1
+        return True
+    
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """Wait for the first event, then collect until size or time limit"""
+        loop = asyncio.get_running_loop()
+        
+        try:
+            batch = [await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)]
+        except asyncio.TimeoutError:
+            return []
+        
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0 or self._stopping:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    def _spawn(self):
+        """Start the flush loop, restarting it if it ever dies"""
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._on_done)
+    
+    def _on_done(self, task: asyncio.Task):
+        """Log a crashed flusher and start a new one (unless stopping)"""
+        if task.cancelled() or task.exception() is None:
+            return
+        
+        self.restarts += 1
+        print(f"❌ Audit flusher crashed: {task.exception()!r}")
+        if not self._stopping:
+            print("🔁 Restarting audit flusher")
+            self._spawn()
+    
+    async def _run(self):
+        """Flush loop; exits once stopping and the queue is empty"""
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            try:
+                await self._flush(batch)
+            except Exception as error:
+                # Keep draining; the events may or may not have landed
+                self.failed_events += len(batch)
+                print(f"❌ Audit flush error, {len(batch)} events not counted: {error!r}")
+    
+    async def _missing(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Events from the batch not yet in history
+        Makes retries safe without a unique history_id index (time-series)
+        """
+        ids = [event["history_id"] for event in batch]
+        landed = {
+            doc["history_id"]
+            async for doc in self._db[Collections.HISTORY].find(
+                {"history_id": {"$in": ids}},
+                {"_id": 0, "history_id": 1}
+            )
+        }
+        return [event for event in batch if event["history_id"] not in landed]
+    
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        """insert_many the batch, then apply counters (and data versions) for what landed"""
+        start = time.perf_counter()
+        rejected = set()
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                # A failed attempt may have landed part of the batch
+                pending = batch if attempt == 0 else await self._missing(batch)
+                if pending:
+                    await self._db[Collections.HISTORY].insert_many(pending, ordered=False)
+                break
+            except BulkWriteError as error:
+                # Duplicates mean an earlier attempt already landed them
+                failed = [e for e in error.details.get("writeErrors", []) if e.get("code") != DUPLICATE_KEY]
+                if failed:
+                    rejected = {id(pending[e["index"]]) for e in failed}
+                    self.failed_events += len(failed)
+                    print(f"❌ Audit flush rejected {len(failed)} events: {failed[0].get('errmsg')}")
+                break
+            except PyMongoError as error:
+                if attempt == self.max_retries:
+                    self.failed_events += len(batch)
+                    print(f"❌ Audit flush failed after {attempt + 1} attempts, {len(batch)} events dropped: {error}")
+                    return
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        
+        inserted = [event for event in batch if id(event) not in rejected]
+        
+        self.flushes += 1
+        self.flushed_events += len(inserted)
+        self._flush_latencies.append(time.perf_counter() - start)
+        
+        read_coalescer.forget(Collections.HISTORY)
+        await self._record_counters(inserted)
+    
+    async def _record_counters(self, events: List[Dict[str, Any]]):
+        """
+        Apply user_stats counters (and data versions) for inserted events
+        
+        A failed $inc may or may not have landed, so it isn't retried;
+        the affected users are rebuilt from tasks/history instead, which
+        is idempotent and also bumps their data_version.
+        """
+        from app.db.repositories import UserStatsRepository
+        
+        if not events:
+            return
+        
+        stats_repo = UserStatsRepository(self._db)
+        try:
+            await stats_repo.record_events(events)
+            return
+        except PyMongoError as error:
+            print(f"⚠️  Audit counters failed, rebuilding affected users: {error}")
+        
+        for user_id in {event["user_id"] for event in events}:
+            try:
+                await stats_repo.rebuild(user_id)
+            except PyMongoError as error:
+                self.counter_failures += 1
+                print(f"❌ Counters for {user_id} stale until the next reconcile: {error}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and flush metrics"""
+        latencies = sorted(self._flush_latencies)
+        
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+        
+        return {
+            "running": self.running,
+            "depth": self._queue.qsize() if self._queue else 0,
+            "max_size": self.max_size,
+            "enqueued": self.enqueued,
+            "inline_fallbacks": self.inline_fallbacks,
+            "flushes": self.flushes,
+            "flushed_events": self.flushed_events,
+            "failed_events": self.failed_events,
+            "counter_failures": self.counter_failures,
+            "restarts": self.restarts,
+            "avg_batch": round(self.flushed_events / self.flushes, 1) if self.flushes else 0,
+            "flush_ms_p50": percentile(0.50),
+            "flush_ms_p99": percentile(0.99)
+        }
+
+audit_queue = AuditQueue(
+    max_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+    enqueue_timeout=settings.AUDIT_ENQUEUE_TIMEOUT_MS / 1000
+)
@@ -4,199 +4,525 @@ Defines collection schemas and creates indexes
 """
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import CollectionInvalid, OperationFailure
+from app.core.config import settings
 from app.core.database import Collections
+from app.core.serialization import utcnow
+from typing import Optional
+import asyncio
+import hashlib
+import json
 
 # ==========================================
 # COLLECTION SCHEMAS (MongoDB Validation)
 # ==========================================
 
-async def create_collections_with_validation(db: AsyncIOMotorDatabase):
+# 1️⃣ USERS
+USERS_SCHEMA = {
+    "bsonType": "object",
+    "required": ["user_id", "name", "email", "hashed_password", "role", "created_at"],
+    "properties": {
+        "user_id": {"bsonType": "string"},
+        "name": {"bsonType": "string"},
+        "email": {"bsonType": "string"},
+        "hashed_password": {"bsonType": "string"},
+        "role": {"enum": ["student", "professional", "company"]},
+        "onboarding_completed": {"bsonType": "bool"},
+        "token_version": {"bsonType": "int"},
+        "created_at": {"bsonType": "date"},
+        "updated_at": {"bsonType": "date"}
+    }
+}
+
+# 2️⃣ ONBOARDING_PROFILES
+ONBOARDING_SCHEMA = {
+    "bsonType": "object",
+    "required": ["user_id", "role", "data", "completed_at"],
+    "properties": {
+        "user_id": {"bsonType": "string"},
+        "role": {"enum": ["student", "professional", "company"]},
+        "data": {"bsonType": "object"},
+        "completed_at": {"bsonType": "date"}
+    }
+}
+
+# 3️⃣ TASKS
+TASKS_SCHEMA = {
+    "bsonType": "object",
+    "required": ["task_id", "user_id", "title", "task_type", "assigned_date"],
+    "properties": {
+        "task_id": {"bsonType": "string"},
+        "user_id": {"bsonType": "string"},
+        "title": {"bsonType": "string"},
+        "description": {"bsonType": "string"},
+        "task_type": {"enum": ["daily", "skill", "optional", "micro"]},
+        "difficulty": {"enum": ["easy", "medium", "hard"]},
+        "estimated_time": {"bsonType": "string"},
+        "assigned_date": {"bsonType": "date"},
+        "due_date": {"bsonType": "date"},
+        "completed": {"bsonType": "bool"},
+        "completed_at": {"bsonType": "date"},
+        "skipped": {"bsonType": "bool"},
+        "skipped_at": {"bsonType": "date"},
+        "skipped_reason": {"bsonType": "string"},
+        "archived": {"bsonType": "bool"},
+        "archived_at": {"bsonType": "date"}
+    }
+}
+
+# 4️⃣ HISTORY (Pipoo Insights)
+HISTORY_SCHEMA = {
+    "bsonType": "object",
+    "required": ["history_id", "user_id", "event_type", "description", "timestamp"],
+    "properties": {
+        "history_id": {"bsonType": "string"},
+        "user_id": {"bsonType": "string"},
+        "event_type": {
+            "enum": [
+                "task_completed",
+                "task_skipped",
+                "skill_proof_completed",
+                "evaluation_flagged",
+                "onboarding_completed",
+                "login",
+                "pipoo_insight",  # NEW - for Pipoo messages
+                "other"
+            ]
+        },
+        "description": {"bsonType": "string"},
+        "context": {"bsonType": "object"},
+        "timestamp": {"bsonType": "date"},
+        "summarized": {"bsonType": "bool"},
+        "summarized_at": {"bsonType": "date"},
+        "archived": {"bsonType": "bool"},
+        "archived_at": {"bsonType": "date"}
+    }
+}
+
+# 5️⃣ SKILL_PROOFS
+SKILL_PROOF_SCHEMA = {
+    "bsonType": "object",
+    "required": ["proof_id", "candidate_id", "company_id", "task_name", "submitted_at"],
+    "properties": {
+        "proof_id": {"bsonType": "string"},
+        "candidate_id": {"bsonType": "string"},
+        "company_id": {"bsonType": "string"},
+        "task_name": {"bsonType": "string"},
+        "task_type": {"bsonType": "string"},
+        "score": {"bsonType": "int"},
+        "flags": {"bsonType": "array"},
+        "submitted_at": {"bsonType": "date"},
+        "evaluated_at": {"bsonType": "date"},
+        "evaluation_data": {"bsonType": "object"}
+    }
+}
+
+# 6️⃣ USER_STATS (Materialized counters)
+USER_STATS_SCHEMA = {
+    "bsonType": "object",
+    "required": ["user_id"],
+    "properties": {
+        "user_id": {"bsonType": "string"},
+        "tasks": {"bsonType": "object"},
+        "tasks_by_type": {"bsonType": "object"},
+        "tasks_by_difficulty": {"bsonType": "object"},
+        "events": {"bsonType": "object"},
+        "events_total": {"bsonType": "int"},
+        "last_activity_at": {"bsonType": ["date", "null"]},
+        "data_version": {"bsonType": ["int", "long"]},
+        "updated_at": {"bsonType": "date"},
+        "reconciled_at": {"bsonType": "date"}
+    }
+}
+
+# 7️⃣ PIPOO_INSIGHTS (Recent insight ring)
+PIPOO_INSIGHTS_SCHEMA = {
+    "bsonType": "object",
+    "required": ["user_id"],
+    "properties": {
+        "user_id": {"bsonType": "string"},
+        "latest": {"bsonType": "object"},
+        "recent": {"bsonType": "array"},
+        "updated_at": {"bsonType": "date"}
+    }
+}
+
+# 8️⃣ WORKSPACE_SNAPSHOTS (Precomputed views)
+WORKSPACE_SNAPSHOTS_SCHEMA = {
+    "bsonType": "object",
+    "required": ["user_id", "view", "stale", "generation"],
+    "properties": {
+        "user_id": {"bsonType": "string"},
+        "view": {"bsonType": "string"},
+        "role": {"enum": ["student", "professional", "company"]},
+        "day": {"bsonType": "string"},
+        "payload": {"bsonType": "object"},
+        "stale": {"bsonType": "bool"},
+        "generation": {"bsonType": ["int", "long"]},
+        "built_at": {"bsonType": "date"}
+    }
+}
+
+COLLECTION_SCHEMAS = {
+    Collections.USERS: USERS_SCHEMA,
+    Collections.ONBOARDING_PROFILES: ONBOARDING_SCHEMA,
+    Collections.TASKS: TASKS_SCHEMA,
+    Collections.HISTORY: HISTORY_SCHEMA,
+    Collections.SKILL_PROOFS: SKILL_PROOF_SCHEMA,
+    Collections.USER_STATS: USER_STATS_SCHEMA,
+    Collections.PIPOO_INSIGHTS: PIPOO_INSIGHTS_SCHEMA,
+    Collections.WORKSPACE_SNAPSHOTS: WORKSPACE_SNAPSHOTS_SCHEMA
+}
+
+# ==========================================
+# INDEXES (Declared once per collection)
+# ==========================================
+
+DUPLICATE_KEY = 11000
+
+# Partial filters must use equality ($ne is not allowed), which is why
+# archived/summarized are always written as explicit booleans
+ACTIVE_ONLY = {"archived": False}
+
+COLLECTION_INDEXES = {
+    Collections.USERS: [
+        IndexModel("user_id", unique=True),
+        IndexModel("email", unique=True)
+    ],
+    Collections.ONBOARDING_PROFILES: [
+        IndexModel("user_id", unique=True)
+    ],
+    Collections.TASKS: [
+        IndexModel("task_id", unique=True),
+        IndexModel("user_id"),
+        IndexModel(
+            [("user_id", 1), ("assigned_date", -1), ("task_id", -1)],
+            name="active_user_assigned_date",
+            partialFilterExpression=ACTIVE_ONLY
+        ),  # Keyset paging (active tasks only)
+        IndexModel([("user_id", 1), ("completed", 1), ("skipped", 1), ("task_type", 1), ("difficulty", 1)]),  # Stats + status reads
+        IndexModel(
+            "completed_at",
+            name="lifecycle_archive_candidates",
+            partialFilterExpression={"completed": True, "archived": False}
+        ),  # archive_old_tasks
+        IndexModel(
+            "archived_at",
+            name="lifecycle_archived_at",
+            partialFilterExpression={"archived": True}
+        ),  # delete_ancient_tasks
+        IndexModel(
+            [("user_id", 1), ("assigned_date", 1), ("task_type", 1)],
+            name="unique_daily_task",
+            unique=True,
+            partialFilterExpression={"task_type": "daily"}
+        )  # One daily task per user per day (ensure_daily_task upserts on it)
+    ],
+    Collections.HISTORY: [
+        IndexModel("history_id", unique=True),
+        IndexModel("user_id"),
+        IndexModel(
+            [("user_id", 1), ("timestamp", -1), ("history_id", -1)],
+            name="active_user_timestamp",
+            partialFilterExpression=ACTIVE_ONLY
+        ),  # Keyset paging (active events only)
+        IndexModel(
+            [("user_id", 1), ("event_type", 1), ("timestamp", -1)],
+            name="active_user_event_type",
+            partialFilterExpression=ACTIVE_ONLY
+        ),  # Time-windowed counts
+        IndexModel(
+            "timestamp",
+            name="lifecycle_summarize_candidates",
+            partialFilterExpression={"summarized": False}
+        ),  # summarize_old_history
+        IndexModel(
+            "summarized_at",
+            name="lifecycle_archive_candidates",
+            partialFilterExpression={"summarized": True, "archived": False}
+        )  # archive_old_history
+    ],
+    Collections.SKILL_PROOFS: [
+        IndexModel("proof_id", unique=True),
+        IndexModel("candidate_id"),
+        IndexModel("company_id"),
+        IndexModel([("company_id", 1), ("evaluated_at", -1)])
+    ],
+    Collections.USER_STATS: [
+        IndexModel("user_id", unique=True)
+    ],
+    Collections.PIPOO_INSIGHTS: [
+        IndexModel("user_id", unique=True)
+    ],
+    Collections.WORKSPACE_SNAPSHOTS: [
+        IndexModel([("user_id", 1), ("view", 1)], unique=True)  # Read, claim, save + mark_stale by user
+    ]
+}
+
+# ==========================================
+# HISTORY LAYOUT (Regular or time-series)
+# ==========================================
+
+# Events are bucketed per user; MongoDB compresses each bucket
+HISTORY_TIME_SERIES_OPTIONS = {
+    "timeField": "timestamp",
+    "metaField": "user_id",
+    "granularity": settings.HISTORY_TIME_SERIES_GRANULARITY
+}
+
+# Time-series collections don't support unique or partial indexes
+# Indexes from earlier declarations, replaced by the ones above. Dropped
+# by name at bootstrap unless the current layout declares the same name
+# (the time-series history layout reuses two of them).
+SUPERSEDED_INDEXES = {
+    Collections.TASKS: [
+        "user_id_1_assigned_date_-1",  # -> active_user_assigned_date
+        "user_id_1_assigned_date_-1_task_id_-1",  # -> active_user_assigned_date
+        "user_id_1_completed_1"  # -> user_id_1_completed_1_skipped_1_task_type_1_difficulty_1
+    ],
+    Collections.HISTORY: [
+        "user_id_1_timestamp_-1",  # -> active_user_timestamp
+        "user_id_1_timestamp_-1_history_id_-1",  # -> active_user_timestamp
+        "user_id_1_event_type_1",  # -> active_user_event_type
+        "user_id_1_event_type_1_timestamp_-1"  # -> active_user_event_type
+    ]
+}
+
+HISTORY_TIME_SERIES_INDEXES = [
+    IndexModel([("user_id", 1), ("timestamp", -1)]),  # Paging + windows
+    IndexModel([("user_id", 1), ("event_type", 1), ("timestamp", -1)]),  # Time-windowed counts
+    IndexModel("history_id"),
+    IndexModel("timestamp")  # Lifecycle sweeps
+]
+
+async def is_time_series(db: AsyncIOMotorDatabase, name: str) -> bool:
+    """Whether a collection currently exists with the time-series layout"""
+    result = await db.command("listCollections", filter={"name": name})
+    batch = result["cursor"]["firstBatch"]
+    return bool(batch) and batch[0].get("type") == "timeseries"
+
+def declared_indexes(name: str, time_series: bool = False) -> list:
+    """Indexes for a collection in the given layout"""
+    if name == Collections.HISTORY and time_series:
+        return HISTORY_TIME_SERIES_INDEXES
+    return COLLECTION_INDEXES.get(name, [])
+
+# ==========================================
+# SCHEMA VERSION (Skip unchanged deployments)
+# ==========================================
+
+BOOTSTRAP_META_ID = "collections_bootstrap"
+VALIDATION_LEVEL = "moderate"
+
+def schema_version_hash() -> str:
     """
-    Create collections with JSON schema validation
-    This ensures data integrity at database level
+    Hash of every validator and index declaration
+    Changes whenever a schema or index in this module changes
     """
-    
-    # ==========================================
-    # 1️⃣ USERS COLLECTION
-    # ==========================================
-    
-    users_schema = {
-        "bsonType": "object",
-        "required": ["user_id", "name", "email", "hashed_password", "role", "created_at"],
-        "properties": {
-            "user_id": {"bsonType": "string"},
-            "name": {"bsonType": "string"},
-            "email": {"bsonType": "string"},
-            "hashed_password": {"bsonType": "string"},
-            "role": {"enum": ["student", "professional", "company"]},
-            "onboarding_completed": {"bsonType": "bool"},
-            "created_at": {"bsonType": "string"},
-            "updated_at": {"bsonType": "string"}
+    declaration = {
+        name: {
+            "schema": COLLECTION_SCHEMAS[name],
+            "indexes": [index.document for index in COLLECTION_INDEXES.get(name, [])],
+            "superseded": SUPERSEDED_INDEXES.get(name, [])
         }
+        for name in COLLECTION_SCHEMAS
     }
-    
-    try:
-        await db.create_collection(
-            Collections.USERS,
-            validator={"$jsonSchema": users_schema}
-        )
-        print(f"✅ Created collection: {Collections.USERS}")
-    except Exception:
-        print(f"ℹ️  Collection {Collections.USERS} already exists")
-    
-    # Create indexes for users
-    await db[Collections.USERS].create_index("user_id", unique=True)
-    await db[Collections.USERS].create_index("email", unique=True)
-    print(f"   📇 Indexes: user_id (unique), email (unique)")
-    
-    # ==========================================
-    # 2️⃣ ONBOARDING_PROFILES COLLECTION
-    # ==========================================
-    
-    onboarding_schema = {
-        "bsonType": "object",
-        "required": ["user_id", "role", "data", "completed_at"],
-        "properties": {
-            "user_id": {"bsonType": "string"},
-            "role": {"enum": ["student", "professional", "company"]},
-            "data": {"bsonType": "object"},
-            "completed_at": {"bsonType": "string"}
+    if settings.HISTORY_TIME_SERIES:
+        declaration[Collections.HISTORY]["time_series"] = {
+            "options": HISTORY_TIME_SERIES_OPTIONS,
+            "indexes": [index.document for index in HISTORY_TIME_SERIES_INDEXES]
         }
-    }
+    encoded = json.dumps(declaration, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+async def _stored_schema_hash(db: AsyncIOMotorDatabase) -> Optional[str]:
+    """Hash recorded by the last successful bootstrap"""
+    meta = await db[Collections.SCHEMA_META].find_one({"_id": BOOTSTRAP_META_ID})
+    return meta.get("version_hash") if meta else None
+
+async def _store_schema_hash(db: AsyncIOMotorDatabase, version_hash: str):
+    """Record a successful bootstrap"""
+    await db[Collections.SCHEMA_META].update_one(
+        {"_id": BOOTSTRAP_META_ID},
+        {"$set": {"version_hash": version_hash, "applied_at": utcnow()}},
+        upsert=True
+    )
+
+# ==========================================
+# BOOTSTRAP STEPS
+# ==========================================
+
+async def _ensure_collection(db: AsyncIOMotorDatabase, name: str, existing: set):
+    """
+    Create collection with validator, or update the validator in place
     
-    try:
-        await db.create_collection(
-            Collections.ONBOARDING_PROFILES,
-            validator={"$jsonSchema": onboarding_schema}
-        )
-        print(f"✅ Created collection: {Collections.ONBOARDING_PROFILES}")
-    except Exception:
-        print(f"ℹ️  Collection {Collections.ONBOARDING_PROFILES} already exists")
-    
-    # Create indexes for onboarding_profiles
-    await db[Collections.ONBOARDING_PROFILES].create_index("user_id", unique=True)
-    print(f"   📇 Indexes: user_id (unique)")
-    
-    # ==========================================
-    # 3️⃣ TASKS COLLECTION
-    # ==========================================
-    
-    tasks_schema = {
-        "bsonType": "object",
-        "required": ["task_id", "user_id", "title", "task_type", "assigned_date"],
-        "properties": {
-            "task_id": {"bsonType": "string"},
-            "user_id": {"bsonType": "string"},
-            "title": {"bsonType": "string"},
-            "description": {"bsonType": "string"},
-            "task_type": {"enum": ["daily", "skill", "optional", "micro"]},
-            "difficulty": {"enum": ["easy", "medium", "hard"]},
-            "estimated_time": {"bsonType": "string"},
-            "assigned_date": {"bsonType": "string"},
-            "due_date": {"bsonType": "string"},
-            "completed": {"bsonType": "bool"},
-            "completed_at": {"bsonType": "string"},
-            "skipped": {"bsonType": "bool"},
-            "skipped_reason": {"bsonType": "string"}
-        }
-    }
+    validationLevel "moderate": documents that don't match the current
+    schema yet (e.g. string dates awaiting the backfill) can still be
+    updated; every insert and every valid document is fully checked
+    """
+    validator = {"$jsonSchema": COLLECTION_SCHEMAS[name]}
     
-    try:
-        await db.create_collection(
-            Collections.TASKS,
-            validator={"$jsonSchema": tasks_schema}
-        )
-        print(f"✅ Created collection: {Collections.TASKS}")
-    except Exception:
-        print(f"ℹ️  Collection {Collections.TASKS} already exists")
-    
-    # Create indexes for tasks
-    await db[Collections.TASKS].create_index("task_id", unique=True)
-    await db[Collections.TASKS].create_index("user_id")
-    await db[Collections.TASKS].create_index([("user_id", 1), ("assigned_date", -1)])
-    await db[Collections.TASKS].create_index([("user_id", 1), ("completed", 1)])
-    print(f"   📇 Indexes: task_id (unique), user_id, user_id+date, user_id+status")
-    
-    # ==========================================
-    # 4️⃣ HISTORY COLLECTION (NEW - Pipoo Insights)
-    # ==========================================
-    
-    history_schema = {
-        "bsonType": "object",
-        "required": ["history_id", "user_id", "event_type", "description", "timestamp"],
-        "properties": {
-            "history_id": {"bsonType": "string"},
-            "user_id": {"bsonType": "string"},
-            "event_type": {
-                "enum": [
-                    "task_completed",
-                    "task_skipped",
-                    "skill_proof_completed",
-                    "evaluation_flagged",
-                    "onboarding_completed",
-                    "login",
-                    "pipoo_insight",  # NEW - for Pipoo messages
-                    "other"
-                ]
-            },
-            "description": {"bsonType": "string"},
-            "context": {"bsonType": "object"},
-            "timestamp": {"bsonType": "string"}
-        }
-    }
+    if name == Collections.HISTORY and settings.HISTORY_TIME_SERIES:
+        await _ensure_history_time_series(db, existing)
+        return
+    
+    if name in existing:
+        if await is_time_series(db, name):
+            print(f"ℹ️  Collection {name} already exists (time-series, no validator)")
+            return
+        await db.command("collMod", name, validator=validator, validationLevel=VALIDATION_LEVEL)
+        print(f"ℹ️  Collection {name} already exists (validator updated)")
+        return
     
     try:
-        await db.create_collection(
-            Collections.HISTORY,
-            validator={"$jsonSchema": history_schema}
-        )
-        print(f"✅ Created collection: {Collections.HISTORY}")
-    except Exception:
-        print(f"ℹ️  Collection {Collections.HISTORY} already exists")
-    
-    # Create indexes for history
-    await db[Collections.HISTORY].create_index("history_id", unique=True)
-    await db[Collections.HISTORY].create_index("user_id")
-    await db[Collections.HISTORY].create_index([("user_id", 1), ("timestamp", -1)])
-    await db[Collections.HISTORY].create_index([("user_id", 1), ("event_type", 1)])
-    print(f"   📇 Indexes: history_id (unique), user_id, user_id+timestamp, user_id+type")
-    
-    # ==========================================
-    # 5️⃣ SKILL_PROOFS COLLECTION
-    # ==========================================
-    
-    skill_proof_schema = {
-        "bsonType": "object",
-        "required": ["proof_id", "candidate_id", "company_id", "task_name", "submitted_at"],
-        "properties": {
-            "proof_id": {"bsonType": "string"},
-            "candidate_id": {"bsonType": "string"},
-            "company_id": {"bsonType": "string"},
-            "task_name": {"bsonType": "string"},
-            "task_type": {"bsonType": "string"},
-            "score": {"bsonType": "int"},
-            "flags": {"bsonType": "array"},
-            "submitted_at": {"bsonType": "string"},
-            "evaluated_at": {"bsonType": "string"},
-            "evaluation_data": {"bsonType": "object"}
-        }
-    }
+        await db.create_collection(name, validator=validator, validationLevel=VALIDATION_LEVEL)
+        print(f"✅ Created collection: {name}")
+    except CollectionInvalid:
+        # Another worker created it first
+        await db.command("collMod", name, validator=validator, validationLevel=VALIDATION_LEVEL)
+        print(f"ℹ️  Collection {name} already exists (validator updated)")
+
+async def _ensure_history_time_series(db: AsyncIOMotorDatabase, existing: set):
+    """
+    Create history as a time-series collection
+    
+    An existing regular history collection is left alone (validator
+    refreshed) until POST /dev/migrate/history-time-series moves it.
+    Documents are validated by HistoryDB before insert instead of a
+    server-side $jsonSchema.
+    """
+    name = Collections.HISTORY
+    
+    if name not in existing:
+        try:
+            await db.create_collection(name, timeseries=HISTORY_TIME_SERIES_OPTIONS)
+            print(f"✅ Created time-series collection: {name}")
+            return
+        except CollectionInvalid:
+            pass  # Another worker created it first
+    
+    if await is_time_series(db, name):
+        print(f"ℹ️  Collection {name} already exists (time-series)")
+        return
     
+    validator = {"$jsonSchema": COLLECTION_SCHEMAS[name]}
+    await db.command("collMod", name, validator=validator, validationLevel=VALIDATION_LEVEL)
+    print(f"⚠️  Collection {name} is still a regular collection; run the history time-series migration")
+
+async def _drop_superseded_indexes(db: AsyncIOMotorDatabase, name: str, indexes: list):
+    """
+    Drop indexes the current declaration replaces:
+    - names listed in SUPERSEDED_INDEXES (older, wider key patterns)
+    - indexes whose key pattern is now declared under a different name
+      (e.g. a full index replaced by its partial version)
+    """
+    declared = {tuple(index.document["key"].items()): index.document["name"] for index in indexes}
+    declared_names = set(declared.values())
+    superseded = set(SUPERSEDED_INDEXES.get(name, [])) - declared_names
+    
+    async for existing in db[name].list_indexes():
+        key = tuple(existing["key"].items())
+        renamed = key in declared and existing["name"] != declared[key]
+        if existing["name"] in superseded or renamed:
+            await db[name].drop_index(existing["name"])
+            print(f"   🧹 Dropped superseded index {name}.{existing['name']}")
+
+async def _ensure_indexes(db: AsyncIOMotorDatabase, name: str) -> bool:
+    """
+    Issue all indexes for one collection in a single command
+    Returns False if an index was left unbuilt
+    """
+    time_series = name == Collections.HISTORY and await is_time_series(db, name)
+    indexes = declared_indexes(name, time_series)
+    if not indexes:
+        return True
+    
+    await _drop_superseded_indexes(db, name, indexes)
     try:
-        await db.create_collection(
-            Collections.SKILL_PROOFS,
-            validator={"$jsonSchema": skill_proof_schema}
-        )
-        print(f"✅ Created collection: {Collections.SKILL_PROOFS}")
-    except Exception:
-        print(f"ℹ️  Collection {Collections.SKILL_PROOFS} already exists")
-    
-    # Create indexes for skill_proofs
-    await db[Collections.SKILL_PROOFS].create_index("proof_id", unique=True)
-    await db[Collections.SKILL_PROOFS].create_index("candidate_id")
-    await db[Collections.SKILL_PROOFS].create_index("company_id")
-    await db[Collections.SKILL_PROOFS].create_index([("company_id", 1), ("evaluated_at", -1)])
-    print(f"   📇 Indexes: proof_id (unique), candidate_id, company_id, company_id+date")
+        created = await db[name].create_indexes(indexes)
+    except OperationFailure as error:
+        # unique_daily_task can't build over duplicates left by the old insert
+        # path. Removing them deletes user data, so it is never done implicitly.
+        if name != Collections.TASKS or error.code != DUPLICATE_KEY:
+            raise
+        print("   ❌ unique_daily_task not built: duplicate daily tasks exist")
+        print("      Run POST /dev/migrate/dedupe-daily-tasks to clear them and build the index")
+        rest = [index for index in indexes if index.document["name"] != "unique_daily_task"]
+        created = await db[name].create_indexes(rest)
+        print(f"   📇 Indexes on {name}: {', '.join(created)}")
+        return False
+    print(f"   📇 Indexes on {name}: {', '.join(created)}")
+    return True
+
+async def _build_all_indexes(db: AsyncIOMotorDatabase, version_hash: str):
+    """
+    Build indexes for every collection concurrently, then stamp the version
+    Left unstamped if any index is missing, so the next bootstrap retries
+    """
+    built = await asyncio.gather(*[_ensure_indexes(db, name) for name in COLLECTION_SCHEMAS])
+    if not all(built):
+        print("⚠️  Schema version not stamped: some indexes are missing")
+        return
+    await _store_schema_hash(db, version_hash)
+    print(f"✅ Schema version stamped: {version_hash[:12]}")
+
+def _log_background_failure(task: asyncio.Task):
+    """Report index build failures (background mode only)"""
+    if not task.cancelled() and task.exception():
+        print(f"❌ Background index build failed: {task.exception()}")
+
+# Keeps a reference so the background task isn't garbage-collected
+_background_index_build: Optional[asyncio.Task] = None
+
+# ==========================================
+# CREATE COLLECTIONS + INDEXES
+# ==========================================
+
+async def create_collections_with_validation(
+    db: AsyncIOMotorDatabase,
+    force: bool = False,
+    background_indexes: bool = False
+):
+    """
+    Create collections with JSON schema validation
+    This ensures data integrity at database level
+    
+    - Starts the lifecycle flag and native date backfills in the
+      background (once per database, one worker at a time)
+    - Skips everything else if the stored schema hash matches (unless force)
+    - Creates collections and issues create_indexes concurrently
+    - With background_indexes, returns once collections exist and
+      builds indexes in a background task (faster cold start)
+    
+    Safe to run from many workers at once: every step is idempotent.
+    """
+    global _background_index_build
+    
+    version_hash = schema_version_hash()
+    
+    # Active-data and date filters stay tolerant of legacy documents
+    # until the background backfills (one worker, schema_meta lease)
+    # mark themselves done; a single schema_meta read once they have
+    from app.db.migrations import start_backfills
+    await start_backfills(db)
+    
+    if not force and await _stored_schema_hash(db) == version_hash:
+        print(f"ℹ️  Schema unchanged ({version_hash[:12]}), skipping bootstrap")
+        return
+    
+    existing = set(await db.list_collection_names())
+    await asyncio.gather(*[
+        _ensure_collection(db, name, existing) for name in COLLECTION_SCHEMAS
+    ])
+    
+    if background_indexes:
+        _background_index_build = asyncio.create_task(_build_all_indexes(db, version_hash))
+        _background_index_build.add_done_callback(_log_background_failure)
+        print("⏳ Index build running in background")
+        return
+    
+    await _build_all_indexes(db, version_hash)
 
 # ==========================================
 # COLLECTION INFO (For Debugging)
@@ -233,7 +559,12 @@ async def drop_all_collections(db: AsyncIOMotorDatabase):
         Collections.ONBOARDING_PROFILES,
         Collections.TASKS,
         Collections.HISTORY,
-        Collections.SKILL_PROOFS
+        Collections.SKILL_PROOFS,
+        Collections.USER_STATS,
+        Collections.PIPOO_INSIGHTS,
+        Collections.WORKSPACE_SNAPSHOTS,
+        Collections.SCHEMA_META,
+        Collections.HISTORY_LEGACY
     ]
     
     for collection in collections:
@@ -4,7 +4,9 @@ Defines retention rules and cleanup policies
 """
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
 from app.core.database import Collections
+from app.core.serialization import utcnow, DATE_ONLY_FIELDS
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -33,6 +35,9 @@ class LifecycleRules:
     
     # Users
     USER_INACTIVE_DAYS = 365  # Mark user as inactive after 1 year
+    
+    # User Stats
+    USER_STATS_RECONCILE_BATCH = 200  # Users rebuilt per batch
 
 # ==========================================
 # LIFECYCLE MANAGER
@@ -58,29 +63,42 @@ class LifecycleManager:
         1. Find completed tasks older than TASK_ARCHIVE_DAYS
         2. Add 'archived' flag
         3. Keep data intact (don't delete)
+        4. Rebuild the owners' task counters (they count active tasks)
+           and mark their snapshots stale
         
         Returns count of archived tasks
         """
-        cutoff_date = (datetime.utcnow() - timedelta(days=LifecycleRules.TASK_ARCHIVE_DAYS)).isoformat()
+        from app.db.repositories import UserStatsRepository, WorkspaceSnapshotRepository
+        
+        cutoff_date = utcnow() - timedelta(days=LifecycleRules.TASK_ARCHIVE_DAYS)
+        query = {
+            "completed": True,
+            **LifecycleQueries.date_range("completed_at", "$lt", cutoff_date),
+            "archived": LifecycleQueries.unflagged()
+        }
         
+        user_ids = await self.db[Collections.TASKS].distinct("user_id", query)
         result = await self.db[Collections.TASKS].update_many(
-            {
-                "completed": True,
-                "completed_at": {"$lt": cutoff_date},
-                "archived": {"$ne": True}
-            },
+            query,
             {
                 "$set": {
                     "archived": True,
-                    "archived_at": datetime.utcnow().isoformat()
+                    "archived_at": utcnow()
                 }
             }
         )
         
-        print(f"📦 Archived {result.modified_count} old tasks")
+        stats_repo = UserStatsRepository(self.db)
+        snapshots = WorkspaceSnapshotRepository(self.db)
+        for user_id in user_ids:
+            await stats_repo.rebuild(user_id)
+            await snapshots.mark_stale(user_id)
+        
+        print(f"📦 Archived {result.modified_count} old tasks ({len(user_ids)} users' stats rebuilt)")
         
         return {
             "archived_count": result.modified_count,
+            "users_rebuilt": len(user_ids),
             "cutoff_date": cutoff_date
         }
     
@@ -93,12 +111,12 @@ class LifecycleManager:
         1. Already archived
         2. Older than 1 year
         """
-        cutoff_date = (datetime.utcnow() - timedelta(days=LifecycleRules.TASK_DELETE_DAYS)).isoformat()
+        cutoff_date = utcnow() - timedelta(days=LifecycleRules.TASK_DELETE_DAYS)
         
         result = await self.db[Collections.TASKS].delete_many(
             {
                 "archived": True,
-                "archived_at": {"$lt": cutoff_date}
+                **LifecycleQueries.date_range("archived_at", "$lt", cutoff_date)
             }
         )
         
@@ -113,6 +131,24 @@ class LifecycleManager:
     # HISTORY LIFECYCLE
     # ==========================================
     
+    async def _update_history(self, query: dict, update: dict) -> Optional[int]:
+        """
+        update_many on history, for either layout
+        
+        Time-series collections only accept updates to non-meta fields
+        from MongoDB 7.0; older servers get None (step skipped)
+        """
+        from app.db.collections import is_time_series
+        
+        try:
+            result = await self.db[Collections.HISTORY].update_many(query, update)
+            return result.modified_count
+        except OperationFailure as error:
+            if not await is_time_series(self.db, Collections.HISTORY):
+                raise
+            print(f"⚠️  Skipped time-series history update: {error}")
+            return None
+    
     async def summarize_old_history(self) -> dict:
         """
         Summarize old history events
@@ -132,26 +168,27 @@ class LifecycleManager:
             "summary": "Completed 25 tasks in January 2024"
         }
         """
-        cutoff_date = (datetime.utcnow() - timedelta(days=LifecycleRules.HISTORY_SUMMARIZE_DAYS)).isoformat()
+        cutoff_date = utcnow() - timedelta(days=LifecycleRules.HISTORY_SUMMARIZE_DAYS)
         
         # Mark old events as summarized (don't delete)
-        result = await self.db[Collections.HISTORY].update_many(
+        modified = await self._update_history(
             {
-                "timestamp": {"$lt": cutoff_date},
-                "summarized": {"$ne": True}
+                **LifecycleQueries.date_range("timestamp", "$lt", cutoff_date),
+                "summarized": LifecycleQueries.unflagged()
             },
             {
                 "$set": {
                     "summarized": True,
-                    "summarized_at": datetime.utcnow().isoformat()
+                    "summarized_at": utcnow()
                 }
             }
         )
         
-        print(f"📊 Summarized {result.modified_count} old history events")
+        print(f"📊 Summarized {modified or 0} old history events")
         
         return {
-            "summarized_count": result.modified_count,
+            "summarized_count": modified or 0,
+            "skipped": modified is None,
             "cutoff_date": cutoff_date
         }
     
@@ -161,26 +198,27 @@ class LifecycleManager:
         
         Move to cold storage or separate collection
         """
-        cutoff_date = (datetime.utcnow() - timedelta(days=LifecycleRules.HISTORY_ARCHIVE_DAYS)).isoformat()
+        cutoff_date = utcnow() - timedelta(days=LifecycleRules.HISTORY_ARCHIVE_DAYS)
         
-        result = await self.db[Collections.HISTORY].update_many(
+        modified = await self._update_history(
             {
                 "summarized": True,
-                "summarized_at": {"$lt": cutoff_date},
-                "archived": {"$ne": True}
+                **LifecycleQueries.date_range("summarized_at", "$lt", cutoff_date),
+                "archived": LifecycleQueries.unflagged()
             },
             {
                 "$set": {
                     "archived": True,
-                    "archived_at": datetime.utcnow().isoformat()
+                    "archived_at": utcnow()
                 }
             }
         )
         
-        print(f"📦 Archived {result.modified_count} old history events")
+        print(f"📦 Archived {modified or 0} old history events")
         
         return {
-            "archived_count": result.modified_count,
+            "archived_count": modified or 0,
+            "skipped": modified is None,
             "cutoff_date": cutoff_date
         }
     
@@ -223,7 +261,7 @@ class LifecycleManager:
         1. Find users with no recent history events
         2. Mark as 'inactive' (don't delete)
         """
-        cutoff_date = (datetime.utcnow() - timedelta(days=LifecycleRules.USER_INACTIVE_DAYS)).isoformat()
+        cutoff_date = utcnow() - timedelta(days=LifecycleRules.USER_INACTIVE_DAYS)
         
         # Find users with no recent history
         inactive_user_ids = []
@@ -234,8 +272,10 @@ class LifecycleManager:
             recent_activity = await self.db[Collections.HISTORY].find_one(
                 {
                     "user_id": user_id,
-                    "timestamp": {"$gte": cutoff_date}
-                }
+                    **LifecycleQueries.date_range("timestamp", "$gte", cutoff_date),
+                    **LifecycleQueries.active_history_filter()
+                },
+                {"_id": 1}
             )
             
             if not recent_activity:
@@ -248,7 +288,7 @@ class LifecycleManager:
                 {
                     "$set": {
                         "inactive": True,
-                        "inactive_since": datetime.utcnow().isoformat()
+                        "inactive_since": utcnow()
                     }
                 }
             )
@@ -263,6 +303,43 @@ class LifecycleManager:
             print("✅ All users are active")
             return {"inactive_count": 0}
     
+    # ==========================================
+    # USER STATS RECONCILIATION
+    # ==========================================
+    
+    async def reconcile_user_stats(self) -> dict:
+        """
+        Rebuild every user's materialized counters from source collections
+        
+        Process:
+        1. Stream user_ids in batches
+        2. Recompute counters from tasks + history
+        3. Replace user_stats documents
+        4. Report users whose counters had drifted
+        """
+        from app.db.repositories import UserStatsRepository
+        
+        stats_repo = UserStatsRepository(self.db)
+        checked = 0
+        drifted = {}
+        
+        cursor = self.db[Collections.USERS].find({}, {"_id": 0, "user_id": 1})
+        cursor = cursor.batch_size(LifecycleRules.USER_STATS_RECONCILE_BATCH)
+        
+        async for user in cursor:
+            result = await stats_repo.rebuild(user["user_id"])
+            checked += 1
+            if result["drift"]:
+                drifted[user["user_id"]] = result["drift"]
+        
+        print(f"🧮 Reconciled user stats: {checked} users, {len(drifted)} drifted")
+        
+        return {
+            "users_checked": checked,
+            "users_drifted": len(drifted),
+            "drift": drifted
+        }
+    
     # ==========================================
     # RUN ALL LIFECYCLE TASKS
     # ==========================================
@@ -293,6 +370,9 @@ class LifecycleManager:
         # Mark inactive users
         results["inactive_users"] = await self.mark_inactive_users()
         
+        # Reconcile materialized counters
+        results["user_stats"] = await self.reconcile_user_stats()
+        
         print("=" * 50)
         print("✅ Lifecycle management complete")
         print("=" * 50 + "\n")
@@ -306,30 +386,62 @@ class LifecycleManager:
 class LifecycleQueries:
     """
     Helper queries that respect lifecycle rules
+    
+    Equality on `archived` (not $ne) so the planner can use the
+    partial indexes declared with {"archived": False}. That is only
+    safe once every document carries the flag, so until the backfill's
+    done-marker is seen in schema_meta (refresh_backfill_state) the
+    filters fall back to {"$ne": True}, which also matches documents
+    without it.
+    
+    Date range filters likewise also match legacy ISO strings until
+    the native date backfill is recorded as done.
     """
     
+    flags_backfilled = False
+    dates_backfilled = False
+    
+    @classmethod
+    def date_range(cls, field: str, op: str, value: datetime) -> dict:
+        """
+        Range condition on a date field, e.g. date_range("timestamp", "$gte", cutoff)
+        Spread into a query: adds an $or for the string form while needed
+        """
+        if cls.dates_backfilled:
+            return {field: {op: value}}
+        
+        # ISO strings order like the dates they hold
+        legacy = value.date().isoformat() if field in DATE_ONLY_FIELDS else value.isoformat()
+        return {"$or": [{field: {op: value}}, {field: {op: legacy}}]}
+    
+    @classmethod
+    def unflagged(cls):
+        """Match value for archived/summarized = false"""
+        return False if cls.flags_backfilled else {"$ne": True}
+    
     @staticmethod
     def active_tasks_filter() -> dict:
         """
         Filter for active (non-archived) tasks
         Use in queries to exclude archived data
         """
-        return {"archived": {"$ne": True}}
+        return {"archived": LifecycleQueries.unflagged()}
     
     @staticmethod
     def active_history_filter() -> dict:
         """
         Filter for active (non-archived) history
         """
-        return {"archived": {"$ne": True}}
+        return {"archived": LifecycleQueries.unflagged()}
     
     @staticmethod
     def recent_tasks_filter(days: int = 30) -> dict:
         """
         Filter for tasks from last N days
         """
-        cutoff_date = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
+        cutoff = utcnow() - timedelta(days=days)
+        cutoff_date = datetime(cutoff.year, cutoff.month, cutoff.day)
         return {
-            "archived": {"$ne": True},
-            "assigned_date": {"$gte": cutoff_date}
+            **LifecycleQueries.active_tasks_filter(),
+            **LifecycleQueries.date_range("assigned_date", "$gte", cutoff_date)
         }
\ No newline at end of file
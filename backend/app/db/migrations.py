@@ -0,0 +1,505 @@
+"""
+Data Migrations
+Online, resumable backfills that rewrite existing documents in place
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, OperationFailure
+from app.core.database import Collections
+from app.core.serialization import utcnow, parse_datetime
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import os
+import socket
+import uuid
+
+# ==========================================
+# MIGRATION LEASE
+# ==========================================
+
+class LeaseLost(Exception):
+    """Another worker took over an expired lease"""
+
+class MigrationLease:
+    """
+    Single-runner lock kept in schema_meta
+    
+    A lease document names its owner and an expiry. acquire() takes it
+    when free or expired (or already ours); another worker holding it
+    makes the upsert hit the _id and fail. Holders renew() between
+    batches, so a crashed worker's lease lapses after `seconds`.
+    """
+    
+    def __init__(self, db: AsyncIOMotorDatabase, name: str, seconds: int = 300):
+        self.db = db
+        self.name = name
+        self.seconds = seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    
+    async def acquire(self) -> bool:
+        """Take or extend the lease; False if another worker holds it"""
+        now = utcnow()
+        try:
+            await self.db[Collections.SCHEMA_META].update_one(
+                {"_id": self.name, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.seconds)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+    
+    async def renew(self):
+        """Extend the lease mid-run (LeaseLost if it lapsed and was taken)"""
+        if not await self.acquire():
+            raise LeaseLost(self.name)
+    
+    async def release(self):
+        """Free the lease for other workers"""
+        await self.db[Collections.SCHEMA_META].delete_one({"_id": self.name, "owner": self.owner})
+
+# ==========================================
+# NATIVE DATE BACKFILL
+# ==========================================
+
+# Fields that used to be stored as ISO strings
+DATE_FIELDS: Dict[str, List[str]] = {
+    Collections.USERS: ["created_at", "updated_at", "inactive_since"],
+    Collections.ONBOARDING_PROFILES: ["completed_at"],
+    Collections.TASKS: ["assigned_date", "due_date", "completed_at", "archived_at"],
+    Collections.HISTORY: ["timestamp", "summarized_at", "archived_at"],
+    Collections.SKILL_PROOFS: ["submitted_at", "evaluated_at"],
+    Collections.USER_STATS: ["last_activity_at", "updated_at", "reconciled_at"]
+}
+
+NATIVE_DATES_MIGRATION = "native_dates"
+
+async def _load_checkpoint(db: AsyncIOMotorDatabase, collection: str) -> Optional[dict]:
+    """Last processed _id for a collection (None = start from the beginning)"""
+    return await db[Collections.SCHEMA_META].find_one(
+        {"_id": f"migration:{NATIVE_DATES_MIGRATION}:{collection}"}
+    )
+
+async def _save_checkpoint(db: AsyncIOMotorDatabase, collection: str, last_id, stats: dict, done: bool):
+    """Record progress so an interrupted run picks up where it stopped"""
+    await db[Collections.SCHEMA_META].update_one(
+        {"_id": f"migration:{NATIVE_DATES_MIGRATION}:{collection}"},
+        {"$set": {
+            "last_id": last_id,
+            "converted": stats["converted"],
+            "unparseable": stats["unparseable"],
+            "done": done,
+            "updated_at": utcnow()
+        }},
+        upsert=True
+    )
+
+async def _backfill_collection(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    fields: List[str],
+    batch_size: int,
+    lease: Optional[MigrationLease] = None
+) -> dict:
+    """
+    Convert string date fields to BSON dates in one collection
+    Walks documents in _id order, one find + one bulk_write per batch
+    (renewing the lease, if any, after each checkpoint)
+    """
+    checkpoint = await _load_checkpoint(db, collection) or {}
+    if checkpoint.get("done"):
+        return {"converted": checkpoint.get("converted", 0), "unparseable": checkpoint.get("unparseable", 0), "skipped": True}
+    
+    stats = {
+        "converted": checkpoint.get("converted", 0),
+        "unparseable": checkpoint.get("unparseable", 0)
+    }
+    last_id = checkpoint.get("last_id")
+    
+    string_dates = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    
+    while True:
+        query = string_dates if last_id is None else {"$and": [string_dates, {"_id": {"$gt": last_id}}]}
+        batch = await db[collection].find(query, projection).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        
+        if not batch:
+            break
+        
+        operations = []
+        for document in batch:
+            updates = {}
+            for field in fields:
+                value = document.get(field)
+                if not isinstance(value, str):
+                    continue
+                try:
+                    updates[field] = parse_datetime(value)
+                except ValueError:
+                    stats["unparseable"] += 1
+            
+            if updates:
+                # Guard on the old value so concurrent writers win
+                guard = {"_id": document["_id"], **{field: document[field] for field in updates}}
+                operations.append(UpdateOne(guard, {"$set": updates}))
+        
+        if operations:
+            result = await db[collection].bulk_write(operations, ordered=False)
+            stats["converted"] += result.modified_count
+        
+        last_id = batch[-1]["_id"]
+        await _save_checkpoint(db, collection, last_id, stats, done=False)
+        if lease:
+            await lease.renew()
+    
+    await _save_checkpoint(db, collection, last_id, stats, done=True)
+    return {**stats, "skipped": False}
+
+async def backfill_native_dates(
+    db: AsyncIOMotorDatabase,
+    batch_size: int = 500,
+    lease: Optional[MigrationLease] = None
+) -> dict:
+    """
+    Rewrite ISO-string timestamps as native BSON dates
+    
+    - Online: run in the background by one worker (run_backfills) or
+      manually via POST /dev/migrate/native-dates; date range filters
+      also match the string form until every collection is done
+    - Validators use validationLevel "moderate"
+    - Resumable: progress is checkpointed in schema_meta after every batch
+    - Idempotent: finished collections are skipped on later runs
+    
+    Returns per-collection counts
+    """
+    print("\n" + "=" * 50)
+    print("🗓️  Backfilling native BSON dates")
+    print("=" * 50)
+    
+    results = {}
+    for collection, fields in DATE_FIELDS.items():
+        results[collection] = await _backfill_collection(db, collection, fields, batch_size, lease)
+        print(f"   {collection}: {results[collection]}")
+    
+    print("=" * 50 + "\n")
+    return results
+
+async def native_dates_done(db: AsyncIOMotorDatabase) -> bool:
+    """Whether every collection's date backfill checkpoint is marked done"""
+    checkpoint_ids = [f"migration:{NATIVE_DATES_MIGRATION}:{collection}" for collection in DATE_FIELDS]
+    done = await db[Collections.SCHEMA_META].count_documents({"_id": {"$in": checkpoint_ids}, "done": True})
+    return done == len(checkpoint_ids)
+
+# ==========================================
+# LIFECYCLE FLAG BACKFILL
+# ==========================================
+
+# Flags the active-data filters and partial indexes match on with equality
+LIFECYCLE_FLAGS: Dict[str, List[str]] = {
+    Collections.TASKS: ["archived"],
+    Collections.HISTORY: ["archived", "summarized"]
+}
+
+async def backfill_lifecycle_flags(
+    db: AsyncIOMotorDatabase,
+    lease: Optional[MigrationLease] = None
+) -> dict:
+    """
+    Write archived/summarized = False where the field is missing
+    
+    Documents created before the flags were always written would
+    otherwise drop out of {"archived": False} reads and partial indexes.
+    One update_many per flag; safe to run repeatedly. Records the
+    done-marker the query helpers switch on.
+    
+    A time-series history rejects these updates; its documents were
+    given both flags when they were copied in, so it is skipped.
+    """
+    results = {}
+    for collection, flags in LIFECYCLE_FLAGS.items():
+        results[collection] = {}
+        for flag in flags:
+            try:
+                result = await db[collection].update_many(
+                    {flag: {"$exists": False}},
+                    {"$set": {flag: False}}
+                )
+            except OperationFailure as error:
+                print(f"   ⚠️  {collection}.{flag} not backfilled: {error}")
+                results[collection][flag] = "skipped"
+                continue
+            results[collection][flag] = result.modified_count
+            if lease:
+                await lease.renew()
+    
+    await db[Collections.SCHEMA_META].update_one(
+        {"_id": LIFECYCLE_FLAGS_MIGRATION},
+        {"$set": {"done": True, "results": results, "updated_at": utcnow()}},
+        upsert=True
+    )
+    print(f"🏷️  Backfilled lifecycle flags: {results}")
+    return results
+
+LIFECYCLE_FLAGS_MIGRATION = "migration:lifecycle_flags"
+
+# ==========================================
+# BACKGROUND BACKFILLS (one worker at a time)
+# ==========================================
+
+BACKFILL_LEASE = "lease:backfills"
+BACKFILL_POLL_SECONDS = 30
+
+# Keeps a reference so the background task isn't garbage-collected
+_backfill_task: Optional[asyncio.Task] = None
+
+async def refresh_backfill_state(db: AsyncIOMotorDatabase) -> bool:
+    """
+    Point this worker's query helpers at the done-markers in schema_meta
+    (one read). Returns True once every backfill is done
+    """
+    from app.db.lifecycle import LifecycleQueries
+    
+    date_ids = [f"migration:{NATIVE_DATES_MIGRATION}:{collection}" for collection in DATE_FIELDS]
+    done = {
+        marker["_id"]
+        async for marker in db[Collections.SCHEMA_META].find(
+            {"_id": {"$in": [LIFECYCLE_FLAGS_MIGRATION, *date_ids]}, "done": True},
+            {"_id": 1}
+        )
+    }
+    
+    LifecycleQueries.flags_backfilled = LIFECYCLE_FLAGS_MIGRATION in done
+    LifecycleQueries.dates_backfilled = all(marker_id in done for marker_id in date_ids)
+    return LifecycleQueries.flags_backfilled and LifecycleQueries.dates_backfilled
+
+async def _run_pending_backfills(db: AsyncIOMotorDatabase, lease: MigrationLease):
+    """Run every backfill that isn't marked done (lease held)"""
+    marker = await db[Collections.SCHEMA_META].find_one({"_id": LIFECYCLE_FLAGS_MIGRATION})
+    if not (marker and marker.get("done")):
+        await backfill_lifecycle_flags(db, lease=lease)
+    
+    if not await native_dates_done(db):
+        await backfill_native_dates(db, lease=lease)
+
+async def run_backfills(db: AsyncIOMotorDatabase, poll_seconds: float = BACKFILL_POLL_SECONDS):
+    """
+    Background loop started on every worker
+    
+    Whichever worker holds the lease runs the pending backfills; the
+    others poll schema_meta until the done-markers appear. Each worker
+    switches its own filters over when it sees them.
+    """
+    lease = MigrationLease(db, BACKFILL_LEASE)
+    
+    while not await refresh_backfill_state(db):
+        try:
+            if await lease.acquire():
+                try:
+                    await _run_pending_backfills(db, lease)
+                finally:
+                    await lease.release()
+                continue
+        except LeaseLost:
+            print("⚠️  Backfill lease lost to another worker")
+        except Exception as e:
+            print(f"⚠️  Backfill failed, will retry: {e}")
+        await asyncio.sleep(poll_seconds)
+    
+    print("✅ Data backfills done")
+
+def _log_backfill_failure(task: asyncio.Task):
+    """Report a crashed backfill loop"""
+    if not task.cancelled() and task.exception():
+        print(f"❌ Background backfill stopped: {task.exception()}")
+
+async def start_backfills(db: AsyncIOMotorDatabase):
+    """
+    Startup hook: one schema_meta read when everything is done,
+    otherwise run_backfills in a background task (doesn't block startup)
+    """
+    global _backfill_task
+    
+    if await refresh_backfill_state(db):
+        return
+    
+    if _backfill_task is None or _backfill_task.done():
+        _backfill_task = asyncio.create_task(run_backfills(db))
+        _backfill_task.add_done_callback(_log_backfill_failure)
+        print("⏳ Data backfills running in background")
+
+async def stop_backfills():
+    """Cancel the background loop (resumes from checkpoints next start)"""
+    if _backfill_task is not None and not _backfill_task.done():
+        _backfill_task.cancel()
+        await asyncio.gather(_backfill_task, return_exceptions=True)
+
+# ==========================================
+# HISTORY -> TIME-SERIES
+# ==========================================
+
+HISTORY_TIME_SERIES_MIGRATION = "migration:history_time_series"
+
+async def migrate_history_to_time_series(db: AsyncIOMotorDatabase, batch_size: int = 1000) -> dict:
+    """
+    Move a regular history collection to the time-series layout
+    
+    1. Rename history -> history_legacy (one atomic command)
+    2. Create history as a time-series collection and its indexes;
+       new events land there immediately
+    3. Copy legacy events over in _id order, checkpointed in schema_meta
+    
+    Time-series collections can't be renamed, so the swap happens
+    before the copy: older events reappear in reads as the copy
+    progresses. history_id is not unique in a time-series collection,
+    so each batch skips ids already copied (safe to re-run).
+    history_legacy is kept for a manual drop once verified.
+    """
+    from app.db.collections import (
+        HISTORY_TIME_SERIES_OPTIONS,
+        is_time_series,
+        _ensure_indexes
+    )
+    
+    history = db[Collections.HISTORY]
+    legacy = db[Collections.HISTORY_LEGACY]
+    names = set(await db.list_collection_names())
+    
+    # Step 1 + 2: swap layouts
+    if Collections.HISTORY in names and not await is_time_series(db, Collections.HISTORY):
+        if Collections.HISTORY_LEGACY in names:
+            raise RuntimeError("history_legacy already exists; drop or rename it before migrating again")
+        await history.rename(Collections.HISTORY_LEGACY)
+        names.add(Collections.HISTORY_LEGACY)
+        print("🔀 Renamed history -> history_legacy")
+    
+    if not await is_time_series(db, Collections.HISTORY):
+        try:
+            await db.create_collection(Collections.HISTORY, timeseries=HISTORY_TIME_SERIES_OPTIONS)
+        except CollectionInvalid:
+            # A write in the gap auto-created a regular collection
+            raise RuntimeError("history was recreated by a concurrent write; run the migration again")
+        print("✅ Created time-series history")
+    
+    await _ensure_indexes(db, Collections.HISTORY)
+    
+    if Collections.HISTORY_LEGACY not in names:
+        return {"copied": 0, "unparseable": 0, "legacy_remaining": False}
+    
+    # Step 3: resumable copy
+    checkpoint = await db[Collections.SCHEMA_META].find_one({"_id": HISTORY_TIME_SERIES_MIGRATION}) or {}
+    last_id = checkpoint.get("last_id")
+    stats = {"copied": checkpoint.get("copied", 0), "unparseable": checkpoint.get("unparseable", 0)}
+    
+    while True:
+        query = {} if last_id is None else {"_id": {"$gt": last_id}}
+        batch = await legacy.find(query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        
+        if not batch:
+            break
+        
+        ids = [event["history_id"] for event in batch]
+        copied_ids = set(await history.distinct("history_id", {"history_id": {"$in": ids}}))
+        
+        documents = []
+        for event in batch:
+            if event["history_id"] in copied_ids:
+                continue
+            
+            timestamp = event.get("timestamp")
+            if isinstance(timestamp, str):
+                try:
+                    timestamp = parse_datetime(timestamp)
+                except ValueError:
+                    stats["unparseable"] += 1
+                    continue
+            
+            event.pop("_id")
+            event["timestamp"] = timestamp
+            event.setdefault("summarized", False)
+            event.setdefault("archived", False)
+            documents.append(event)
+        
+        if documents:
+            await history.insert_many(documents, ordered=False)
+            stats["copied"] += len(documents)
+        
+        last_id = batch[-1]["_id"]
+        await db[Collections.SCHEMA_META].update_one(
+            {"_id": HISTORY_TIME_SERIES_MIGRATION},
+            {"$set": {"last_id": last_id, **stats, "updated_at": utcnow()}},
+            upsert=True
+        )
+    
+    print(f"🕒 History time-series migration: {stats}")
+    return {**stats, "legacy_remaining": True}
+
+# ==========================================
+# DAILY TASK DEDUPE
+# ==========================================
+
+def plan_daily_task_dedupe(groups: List[dict]) -> Tuple[List, List]:
+    """
+    Split duplicate daily tasks into (delete_ids, retype_ids)
+    
+    Per group the task the user acted on (completed, then skipped, then
+    oldest _id) is kept. Of the rest, completed/skipped tasks are retyped
+    and untouched ones deleted.
+    """
+    delete_ids = []
+    retype_ids = []
+    for group in groups:
+        ranked = sorted(
+            group["tasks"],
+            key=lambda task: (not task.get("completed"), not task.get("skipped"), task["_id"])
+        )
+        for task in ranked[1:]:
+            if task.get("completed") or task.get("skipped"):
+                retype_ids.append(task["_id"])
+            else:
+                delete_ids.append(task["_id"])
+    return delete_ids, retype_ids
+
+async def dedupe_daily_tasks(db: AsyncIOMotorDatabase) -> dict:
+    """
+    Clear out duplicate daily tasks (same user + assigned_date)
+    
+    Concurrent workspace loads used to insert a daily task each; the
+    unique_daily_task index can't build until only one is left per day.
+    plan_daily_task_dedupe picks what stays daily; extras that were
+    completed/skipped become "optional" so no user activity is lost.
+    Affected users' counters are rebuilt. Safe to run repeatedly.
+    """
+    from app.db.repositories import UserStatsRepository
+    
+    groups = await db[Collections.TASKS].aggregate([
+        {"$match": {"task_type": "daily"}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "assigned_date": "$assigned_date"},
+            "tasks": {"$push": {"_id": "$_id", "completed": "$completed", "skipped": "$skipped"}},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True).to_list(length=None)
+    
+    delete_ids, retype_ids = plan_daily_task_dedupe(groups)
+    
+    if delete_ids:
+        await db[Collections.TASKS].delete_many({"_id": {"$in": delete_ids}})
+    if retype_ids:
+        await db[Collections.TASKS].update_many({"_id": {"$in": retype_ids}}, {"$set": {"task_type": "optional"}})
+    
+    users = {group["_id"]["user_id"] for group in groups}
+    stats_repo = UserStatsRepository(db)
+    for user_id in users:
+        await stats_repo.rebuild(user_id)
+    
+    stats = {
+        "duplicate_groups": len(groups),
+        "deleted": len(delete_ids),
+        "retyped": len(retype_ids),
+        "users_rebuilt": len(users)
+    }
+    print(f"🧹 Daily task dedupe: {stats}")
+    return stats
@@ -0,0 +1,77 @@
+"""
+Keyset Pagination
+Opaque continuation tokens and range filters for cursor-based paging
+"""
+
+from bson import json_util
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+
+# Sort key: [(field, direction), ...] ending in a unique field (tie-breaker)
+SortSpec = List[Tuple[str, int]]
+
+# ==========================================
+# CONTINUATION TOKENS
+# ==========================================
+
+def encode_cursor(document: Dict[str, Any], sort: SortSpec) -> str:
+    """
+    Build an opaque token from the last document of a page
+    Holds only the sort key values (BSON-typed, so dates survive)
+    """
+    values = [document.get(field) for field, _ in sort]
+    raw = json_util.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: str, sort: SortSpec) -> List[Any]:
+    """
+    Read sort key values back from a token
+    Raises ValueError for malformed or foreign tokens
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("Invalid pagination cursor")
+    
+    return values
+
+# ==========================================
+# KEYSET FILTER
+# ==========================================
+
+def keyset_filter(sort: SortSpec, last_values: List[Any]) -> Dict[str, Any]:
+    """
+    Filter matching documents strictly after `last_values` in `sort` order
+    
+    For sort [(a, -1), (b, -1)] this is:
+        {"$or": [{a: {"$lt": va}}, {a: va, b: {"$lt": vb}}]}
+    """
+    branches = []
+    
+    for i, (field, direction) in enumerate(sort):
+        branch = {f: last_values[j] for j, (f, _) in enumerate(sort[:i])}
+        branch[field] = {"$lt" if direction < 0 else "$gt": last_values[i]}
+        branches.append(branch)
+    
+    return {"$or": branches}
+
+def with_sort_fields(
+    projection: Optional[Dict[str, Any]],
+    sort: SortSpec
+) -> Optional[Dict[str, Any]]:
+    """
+    Make sure an inclusion projection returns the sort key fields
+    (needed to build the next cursor)
+    """
+    if not projection:
+        return projection
+    
+    is_inclusion = any(v for k, v in projection.items() if k != "_id")
+    if not is_inclusion:
+        return projection
+    
+    return {**projection, **{field: 1 for field, _ in sort}}
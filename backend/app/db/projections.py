@@ -0,0 +1,92 @@
+"""
+Projection Profiles
+Named field sets for repository reads (only fetch what the caller uses)
+"""
+
+# ==========================================
+# PROJECTION PROFILES
+# ==========================================
+
+class Projections:
+    """
+    Reusable MongoDB projections
+    
+    Every profile excludes `_id` (ObjectId is never sent to clients).
+    Pass one as `projection=` to any repository read.
+    """
+    
+    # Existence checks
+    EXISTS = {"_id": 1}
+    
+    # Users: everything an authenticated request needs (never the password hash)
+    IDENTITY = {
+        "_id": 0,
+        "user_id": 1,
+        "name": 1,
+        "email": 1,
+        "role": 1,
+        "onboarding_completed": 1,
+        "token_version": 1,
+        "created_at": 1
+    }
+    
+    # Users: login (needs the hash)
+    CREDENTIALS = {
+        "_id": 0,
+        "user_id": 1,
+        "name": 1,
+        "email": 1,
+        "role": 1,
+        "onboarding_completed": 1,
+        "token_version": 1,
+        "created_at": 1,
+        "hashed_password": 1
+    }
+    
+    # Onboarding profiles: answers only
+    ONBOARDING_DATA = {"_id": 0, "data": 1}
+    
+    # Tasks: what task lists and workspace cards render
+    TASK_CARD = {
+        "_id": 0,
+        "task_id": 1,
+        "title": 1,
+        "description": 1,
+        "task_type": 1,
+        "difficulty": 1,
+        "estimated_time": 1,
+        "assigned_date": 1,
+        "due_date": 1,
+        "completed": 1,
+        "completed_at": 1,
+        "skipped": 1,
+        "skipped_reason": 1
+    }
+    
+    # Tasks: ownership/state checks and counting
+    TASK_STATUS = {
+        "_id": 0,
+        "task_id": 1,
+        "user_id": 1,
+        "title": 1,
+        "task_type": 1,
+        "assigned_date": 1,
+        "completed": 1,
+        "skipped": 1
+    }
+    
+    # Tasks: pre-image of a status transition (checks + counters + audit)
+    TASK_TRANSITION = {
+        **TASK_STATUS,
+        "difficulty": 1
+    }
+    
+    # History: audit trail rows
+    HISTORY_ROW = {
+        "_id": 0,
+        "history_id": 1,
+        "event_type": 1,
+        "description": 1,
+        "context": 1,
+        "timestamp": 1
+    }
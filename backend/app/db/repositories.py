@@ -4,6 +4,8 @@ Each repository enforces who can do what with the data
 """
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from app.models.database import (
     UserDB, 
     OnboardingProfileDB, 
@@ -11,9 +13,67 @@ from app.models.database import (
     HistoryDB, 
     SkillProofDB
 )
+from app.core.config import settings
 from app.core.database import Collections
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from app.core.cache import identity_cache
+from app.core.security import token_versions
+from app.core.serialization import utcnow, parse_datetime
+from app.db.singleflight import read_coalescer
+from app.db.audit import audit_queue
+from app.db.projections import Projections
+from app.db.lifecycle import LifecycleQueries
+from app.core.permissions import PermissionChecker
+from app.db.pagination import (
+    SortSpec,
+    encode_cursor,
+    decode_cursor,
+    keyset_filter,
+    with_sort_fields
+)
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import json
+
+# ==========================================
+# HELPERS
+# ==========================================
+
+def _status_counts(group: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Turn a counter group into total/completed/skipped/pending"""
+    total = group.get("total", 0) if group else 0
+    completed = group.get("completed", 0) if group else 0
+    skipped = group.get("skipped", 0) if group else 0
+    
+    return {
+        "total": total,
+        "completed": completed,
+        "skipped": skipped,
+        "pending": total - completed - skipped
+    }
+
+# $group accumulators shared by every task status count
+_STATUS_COUNTERS = {
+    "total": {"$sum": 1},
+    "completed": {"$sum": {"$cond": [{"$eq": ["$completed", True]}, 1, 0]}},
+    "skipped": {"$sum": {"$cond": [{"$eq": ["$skipped", True]}, 1, 0]}}
+}
+
+def _assigned_date_match(date: str) -> Dict[str, Any]:
+    """
+    Match one calendar day given as YYYY-MM-DD
+    Also matches the legacy string form until the date backfill has run
+    """
+    return {"$in": [parse_datetime(date), date]}
+
+class TaskTransition:
+    """Outcomes of TaskRepository.complete_task / skip_task"""
+    OK = "ok"
+    NOT_FOUND = "not_found"
+    FORBIDDEN = "forbidden"
+    ALREADY_COMPLETED = "already_completed"
+    ALREADY_SKIPPED = "already_skipped"
 
 # ==========================================
 # BASE REPOSITORY (Common operations)
@@ -27,26 +87,100 @@ class BaseRepository:
         self.db = db
         self.collection = db[collection_name]
     
-    async def find_one(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Find single document"""
-        return await self.collection.find_one(query)
+    async def find_one(
+        self,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find single document
+        Identical concurrent lookups share one round trip
+        """
+        key = (self.collection.name, repr(query), repr(projection))
+        return await read_coalescer.do(
+            key,
+            lambda: self.collection.find_one(query, projection)
+        )
     
     async def find_many(
         self, 
         query: Dict[str, Any], 
         limit: int = 100,
-        sort: Optional[List[tuple]] = None
+        sort: Optional[List[tuple]] = None,
+        projection: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """Find multiple documents"""
-        cursor = self.collection.find(query)
+        cursor = self.collection.find(query, projection)
         if sort:
             cursor = cursor.sort(sort)
         cursor = cursor.limit(limit)
         return await cursor.to_list(length=limit)
     
+    async def find_page(
+        self,
+        query: Dict[str, Any],
+        sort: SortSpec,
+        limit: int = 50,
+        after: Optional[str] = None,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Find one page of documents using keyset pagination
+        
+        `sort` must end in a unique field so the order is total.
+        Returns (documents, next_cursor); next_cursor is None on the last page.
+        Raises ValueError for an invalid cursor.
+        """
+        if after:
+            query = {"$and": [query, keyset_filter(sort, decode_cursor(after, sort))]}
+        
+        # Fetch one extra document to know if another page exists
+        cursor = self.collection.find(query, with_sort_fields(projection, sort))
+        cursor = cursor.sort(sort).limit(limit + 1)
+        documents = await cursor.to_list(length=limit + 1)
+        
+        if len(documents) <= limit:
+            return documents, None
+        
+        documents = documents[:limit]
+        return documents, encode_cursor(documents[-1], sort)
+    
+    async def iter_batches(
+        self,
+        query: Dict[str, Any],
+        sort: SortSpec,
+        batch_size: int = 500,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream all matching documents in batches
+        Memory stays bounded by batch_size, however many documents match
+        """
+        cursor = self.collection.find(query, projection).sort(sort).batch_size(batch_size)
+        
+        batch = []
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        
+        if batch:
+            yield batch
+    
+    async def count(self, query: Dict[str, Any]) -> int:
+        """Count matching documents server-side (nothing is materialized)"""
+        return await self.collection.count_documents(query)
+    
+    async def aggregate(self, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run an aggregation pipeline server-side"""
+        cursor = self.collection.aggregate(pipeline)
+        return await cursor.to_list(length=None)
+    
     async def insert_one(self, document: Dict[str, Any]) -> str:
         """Insert single document"""
         result = await self.collection.insert_one(document)
+        read_coalescer.forget(self.collection.name)
         return str(result.inserted_id)
     
     async def update_one(
@@ -56,11 +190,13 @@ class BaseRepository:
     ) -> bool:
         """Update single document"""
         result = await self.collection.update_one(query, {"$set": update})
+        read_coalescer.forget(self.collection.name)
         return result.modified_count > 0
     
     async def delete_one(self, query: Dict[str, Any]) -> bool:
         """Delete single document"""
         result = await self.collection.delete_one(query)
+        read_coalescer.forget(self.collection.name)
         return result.deleted_count > 0
 
 # ==========================================
@@ -80,8 +216,13 @@ class UserRepository(BaseRepository):
     - Delete: User (self), System (admin)
     """
     
+    # Fields baked into access tokens (changing them revokes old tokens)
+    TOKEN_VERSION_FIELDS = ("role", "onboarding_completed")
+    
     def __init__(self, db: AsyncIOMotorDatabase):
         super().__init__(db, Collections.USERS)
+        self.user_stats = UserStatsRepository(db)
+        self.snapshots = WorkspaceSnapshotRepository(db)
     
     async def create_user(self, user_data: UserDB) -> str:
         """
@@ -89,16 +230,47 @@ class UserRepository(BaseRepository):
         Called during signup
         """
         user_dict = user_data.model_dump()
-        user_dict["created_at"] = datetime.utcnow().isoformat()
+        user_dict["created_at"] = utcnow()
         return await self.insert_one(user_dict)
     
-    async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def get_user_by_id(
+        self,
+        user_id: str,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """Get user by ID"""
-        return await self.find_one({"user_id": user_id})
+        return await self.find_one({"user_id": user_id}, projection)
     
-    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+    async def get_cached_user(self, user_id: str, min_token_version: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Get user by ID through the identity cache
+        Used on every authenticated request (never returns hashed_password)
+        
+        min_token_version: the caller's JWT token_version. A cached entry
+        older than that predates a role/onboarding change made on another
+        worker, so it is dropped and re-read from MongoDB.
+        """
+        user = identity_cache.get(user_id)
+        if user is not None and user.get("token_version", 0) >= min_token_version:
+            return user
+        if user is not None:
+            identity_cache.invalidate(user_id)
+        
+        user = await self.get_user_by_id(user_id, Projections.IDENTITY)
+        if not user:
+            return None
+        
+        identity_cache.set(user_id, user)
+        token_versions.observe(user_id, user.get("token_version", 0))
+        return user
+    
+    async def get_user_by_email(
+        self,
+        email: str,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """Get user by email (for login)"""
-        return await self.find_one({"email": email})
+        return await self.find_one({"email": email}, projection)
     
     async def update_user(
         self, 
@@ -108,9 +280,48 @@ class UserRepository(BaseRepository):
         """
         Update user data
         Only user can update their own data
+        
+        Changing role or onboarding state bumps token_version,
+        which revokes every token issued before the change
         """
-        updates["updated_at"] = datetime.utcnow().isoformat()
-        return await self.update_one({"user_id": user_id}, updates)
+        updates["updated_at"] = utcnow()
+        
+        if any(field in updates for field in self.TOKEN_VERSION_FIELDS):
+            user = await self.collection.find_one_and_update(
+                {"user_id": user_id},
+                {"$set": updates, "$inc": {"token_version": 1}},
+                projection={"token_version": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            read_coalescer.forget(self.collection.name)
+            updated = user is not None
+            if user:
+                token_versions.observe(user_id, user["token_version"])
+                await self.snapshots.mark_stale(user_id)
+        else:
+            updated = await self.update_one({"user_id": user_id}, updates)
+        
+        # Write-through: next request re-reads the fresh document
+        identity_cache.invalidate(user_id)
+        await self.user_stats.bump_data_version(user_id)
+        return updated
+    
+    async def get_token_version(self, user_id: str) -> int:
+        """Current token_version (0 for users created before versioning)"""
+        user = await self.get_cached_user(user_id)
+        return user.get("token_version", 0) if user else 0
+    
+    async def load_token_version(self, user_id: str) -> Optional[int]:
+        """
+        token_version straight from MongoDB (projected, bypasses the
+        identity cache) and recorded in the version map; None if no user
+        """
+        user = await self.find_one({"user_id": user_id}, {"_id": 0, "token_version": 1})
+        if user is None:
+            return None
+        
+        token_versions.observe(user_id, user.get("token_version", 0))
+        return user.get("token_version", 0)
     
     async def mark_onboarding_complete(self, user_id: str) -> bool:
         """Mark user's onboarding as complete"""
@@ -135,6 +346,8 @@ class OnboardingRepository(BaseRepository):
     
     def __init__(self, db: AsyncIOMotorDatabase):
         super().__init__(db, Collections.ONBOARDING_PROFILES)
+        self.user_stats = UserStatsRepository(db)
+        self.snapshots = WorkspaceSnapshotRepository(db)
     
     async def create_profile(self, profile_data: OnboardingProfileDB) -> str:
         """
@@ -142,15 +355,22 @@ class OnboardingRepository(BaseRepository):
         Called after user completes onboarding
         """
         profile_dict = profile_data.model_dump()
-        profile_dict["completed_at"] = datetime.utcnow().isoformat()
-        return await self.insert_one(profile_dict)
+        profile_dict["completed_at"] = utcnow()
+        inserted_id = await self.insert_one(profile_dict)
+        await self.user_stats.bump_data_version(profile_data.user_id)
+        await self.snapshots.mark_stale(profile_data.user_id)
+        return inserted_id
     
-    async def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def get_profile(
+        self,
+        user_id: str,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Get user's onboarding profile
         Returns None if not completed
         """
-        return await self.find_one({"user_id": user_id})
+        return await self.find_one({"user_id": user_id}, projection)
     
     async def update_profile(
         self, 
@@ -161,7 +381,20 @@ class OnboardingRepository(BaseRepository):
         Update onboarding profile (rare)
         Used when user wants to re-onboard
         """
-        return await self.update_one({"user_id": user_id}, {"data": new_data})
+        updated = await self.update_one({"user_id": user_id}, {"data": new_data})
+        await self.user_stats.bump_data_version(user_id)
+        await self.snapshots.mark_stale(user_id)
+        return updated
+    
+    async def delete_profile(self, user_id: str) -> bool:
+        """
+        Delete onboarding profile (reset)
+        The user's workspace snapshots go with it
+        """
+        deleted = await self.delete_one({"user_id": user_id})
+        await self.user_stats.bump_data_version(user_id)
+        await self.snapshots.delete_user_snapshots(user_id)
+        return deleted
 
 # ==========================================
 # 3. TASK REPOSITORY
@@ -180,8 +413,16 @@ class TaskRepository(BaseRepository):
     - Delete: System (cleanup old tasks)
     """
     
+    # Keyset order: newest assigned first, task_id breaks ties
+    PAGE_SORT: SortSpec = [("assigned_date", -1), ("task_id", -1)]
+    
+    # Task card lists, same cap find_many applies on the per-query path
+    CARD_LIMIT = 100
+    
     def __init__(self, db: AsyncIOMotorDatabase):
         super().__init__(db, Collections.TASKS)
+        self.user_stats = UserStatsRepository(db)
+        self.snapshots = WorkspaceSnapshotRepository(db)
     
     async def create_task(self, task_data: TaskDB) -> str:
         """
@@ -189,84 +430,493 @@ class TaskRepository(BaseRepository):
         Called by workspace logic or AI
         """
         task_dict = task_data.model_dump()
-        return await self.insert_one(task_dict)
+        inserted_id = await self.insert_one(task_dict)
+        await self.snapshots.mark_stale(task_data.user_id)
+        await self.user_stats.record_task_created(task_dict)
+        return inserted_id
+    
+    async def ensure_daily_task(self, task_data: TaskDB) -> Tuple[Dict[str, Any], bool]:
+        """
+        Create the user's daily task for its assigned_date unless one exists
+        
+        One upsert on (user_id, assigned_date, task_type="daily"), backed by
+        the unique_daily_task index, so concurrent workspace loads can't
+        both insert. Returns (the day's daily task, whether it was created).
+        """
+        task_dict = task_data.model_dump()
+        key = {
+            "user_id": task_dict["user_id"],
+            "assigned_date": task_dict["assigned_date"],
+            "task_type": "daily"
+        }
+        
+        try:
+            task = await self.collection.find_one_and_update(
+                key,
+                {"$setOnInsert": task_dict},
+                projection={"_id": 0},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lost the insert race; the winner's task is there now
+            task = await self.collection.find_one(key, {"_id": 0})
+        
+        created = task["task_id"] == task_dict["task_id"]
+        if created:
+            read_coalescer.forget(self.collection.name)
+            await self.snapshots.mark_stale(task_dict["user_id"])
+            await self.user_stats.record_task_created(task_dict)
+        return task, created
     
     async def get_user_tasks(
         self, 
         user_id: str,
         date: Optional[str] = None,
-        task_type: Optional[str] = None
+        task_type: Optional[str] = None,
+        projection: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get user's tasks
         Filters by date or type if provided
         """
-        query = {"user_id": user_id}
+        query = {"user_id": user_id, **LifecycleQueries.active_tasks_filter()}
         
         if date:
-            query["assigned_date"] = date
+            query["assigned_date"] = _assigned_date_match(date)
         
         if task_type:
             query["task_type"] = task_type
         
         return await self.find_many(
             query, 
-            sort=[("assigned_date", -1)]  # Newest first
+            sort=[("assigned_date", -1)],  # Newest first
+            projection=projection
         )
     
-    async def get_task_by_id(self, task_id: str) -> Optional[Dict[str, Any]]:
+    async def get_completed_tasks(
+        self,
+        user_id: str,
+        limit: int = 100,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get user's completed tasks (newest first)"""
+        return await self.find_many(
+            {"user_id": user_id, "completed": True, **LifecycleQueries.active_tasks_filter()},
+            limit=limit,
+            sort=[("assigned_date", -1)],
+            projection=projection
+        )
+    
+    async def get_user_tasks_page(
+        self,
+        user_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        date: Optional[str] = None,
+        task_type: Optional[str] = None,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of user's tasks (newest first)
+        Pass the returned cursor back to get the next page
+        """
+        query = {"user_id": user_id, **LifecycleQueries.active_tasks_filter()}
+        
+        if date:
+            query["assigned_date"] = _assigned_date_match(date)
+        
+        if task_type:
+            query["task_type"] = task_type
+        
+        return await self.find_page(
+            query,
+            sort=self.PAGE_SORT,
+            limit=limit,
+            after=cursor,
+            projection=projection
+        )
+    
+    async def iter_user_tasks(
+        self,
+        user_id: str,
+        batch_size: int = 500,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream all of a user's tasks in batches (newest first)"""
+        async for batch in self.iter_batches(
+            {"user_id": user_id, **LifecycleQueries.active_tasks_filter()},
+            sort=self.PAGE_SORT,
+            batch_size=batch_size,
+            projection=projection
+        ):
+            yield batch
+    
+    async def get_task_by_id(
+        self,
+        task_id: str,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """Get specific task"""
-        return await self.find_one({"task_id": task_id})
+        return await self.find_one({"task_id": task_id}, projection)
     
-    async def complete_task(self, task_id: str, user_id: str) -> bool:
+    async def _transition(
+        self,
+        task_id: str,
+        user_id: str,
+        allowed: Dict[str, Any],
+        changes: Dict[str, Any]
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Guarded status change in one round trip
+        
+        Matches on task_id only and applies `changes` through a pipeline
+        update only when the caller owns the task and `allowed` holds;
+        otherwise every field keeps its value (a no-op write). The
+        returned pre-image tells the outcomes apart.
+        """
+        owner = {"$eq": ["$user_id", {"$literal": user_id}]}
+        ok = {"$and": [owner, allowed]}
+        
+        task = await self.collection.find_one_and_update(
+            {"task_id": task_id},
+            [{"$set": {
+                field: {"$cond": [ok, {"$literal": value}, f"${field}"]}
+                for field, value in changes.items()
+            }}],
+            projection=Projections.TASK_TRANSITION,
+            return_document=ReturnDocument.BEFORE
+        )
+        
+        if not task:
+            return TaskTransition.NOT_FOUND, None
+        if task["user_id"] != user_id:
+            return TaskTransition.FORBIDDEN, task
+        if task.get("completed"):
+            return TaskTransition.ALREADY_COMPLETED, task
+        if task.get("skipped") and "skipped" in changes:
+            return TaskTransition.ALREADY_SKIPPED, task
+        
+        read_coalescer.forget(self.collection.name)
+        await self.snapshots.mark_stale(user_id)
+        return TaskTransition.OK, task
+    
+    async def complete_task(self, task_id: str, user_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
         """
         Mark task as completed
         Only owner can complete their task
+        
+        Returns (TaskTransition outcome, task before the update)
+        Counters move only on TaskTransition.OK, so exactly once
         """
-        return await self.update_one(
-            {"task_id": task_id, "user_id": user_id},
-            {
-                "completed": True,
-                "completed_at": datetime.utcnow().isoformat()
-            }
+        outcome, task = await self._transition(
+            task_id,
+            user_id,
+            allowed={"$ne": ["$completed", True]},
+            changes={"completed": True, "completed_at": utcnow()}
         )
+        
+        if outcome == TaskTransition.OK:
+            await self.user_stats.record_task_status(user_id, task, "completed")
+        return outcome, task
     
     async def skip_task(
         self, 
         task_id: str, 
         user_id: str, 
         reason: Optional[str] = None
-    ) -> bool:
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
         """
         Mark task as skipped
         Only owner can skip their task
+        
+        Returns (TaskTransition outcome, task before the update)
+        Counters move only on TaskTransition.OK, so exactly once
         """
-        return await self.update_one(
-            {"task_id": task_id, "user_id": user_id},
-            {
-                "skipped": True,
-                "skipped_reason": reason
-            }
+        changes = {"skipped": True, "skipped_at": utcnow()}
+        if reason is not None:
+            changes["skipped_reason"] = reason
+        
+        outcome, task = await self._transition(
+            task_id,
+            user_id,
+            allowed={"$and": [{"$ne": ["$completed", True]}, {"$ne": ["$skipped", True]}]},
+            changes=changes
         )
+        
+        if outcome == TaskTransition.OK:
+            await self.user_stats.record_task_status(user_id, task, "skipped")
+        return outcome, task
+    
+    async def apply_status_batch(
+        self,
+        user_id: str,
+        operations: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply many complete/skip operations for one user
+        
+        operations: [{"task_id": ..., "action": "complete" | "skip", "reason": ...}]
+        
+        1. One $in read for ownership + state (PermissionChecker rules)
+        2. One unordered bulk_write of guarded updates
+        3. One $inc for the counters
+        
+        Returns one result per operation, in order:
+        {"task_id", "action", "reason", "status": TaskTransition.*, "task": pre-image or None}
+        Later operations see the effect of earlier ones on the same task.
+        """
+        task_ids = list({op["task_id"] for op in operations})
+        tasks = {
+            task["task_id"]: task
+            for task in await self.find_many(
+                {"task_id": {"$in": task_ids}},
+                limit=len(task_ids),
+                projection=Projections.TASK_TRANSITION
+            )
+        }
+        now = utcnow()
+        results, updates = self.plan_status_batch(user_id, tasks, operations, now)
+        if not updates:
+            return results
+        
+        writes = [UpdateOne(guard, {"$set": changes}) for guard, changes in updates]
+        outcome = await self.collection.bulk_write(writes, ordered=False)
+        read_coalescer.forget(self.collection.name)
+        await self.snapshots.mark_stale(user_id)
+        
+        applied = [r for r in results if r["status"] == TaskTransition.OK]
+        if outcome.modified_count < len(writes):
+            await self._reconcile_batch(applied, now)
+        
+        await self.user_stats.record_task_statuses(user_id, [
+            (r["task"], "completed" if r["action"] == "complete" else "skipped")
+            for r in applied
+            if r["status"] == TaskTransition.OK
+        ])
+        return results
+    
+    @staticmethod
+    def plan_status_batch(
+        user_id: str,
+        tasks: Dict[str, Dict[str, Any]],
+        operations: List[Dict[str, Any]],
+        now
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+        """
+        Decide each operation's outcome from the tasks read up front
+        
+        tasks: {task_id: task} (left unmodified)
+        Returns (results, [(guard filter, $set changes), ...]) with the
+        guards matching only tasks still in the state planned against
+        """
+        state = {task_id: dict(task) for task_id, task in tasks.items()}
+        
+        results = []
+        updates = []
+        for op in operations:
+            task = state.get(op["task_id"])
+            result = {"task_id": op["task_id"], "action": op["action"], "reason": op.get("reason"), "task": None}
+            results.append(result)
+            
+            if task is None:
+                result["status"] = TaskTransition.NOT_FOUND
+                continue
+            if not PermissionChecker.can_update_task_status(user_id, task["user_id"]):
+                result["status"] = TaskTransition.FORBIDDEN
+                continue
+            if task.get("completed"):
+                result["status"] = TaskTransition.ALREADY_COMPLETED
+                continue
+            
+            guard = {"task_id": op["task_id"], "user_id": user_id, "completed": {"$ne": True}}
+            if op["action"] == "skip":
+                if task.get("skipped"):
+                    result["status"] = TaskTransition.ALREADY_SKIPPED
+                    continue
+                guard["skipped"] = {"$ne": True}
+                changes = {"skipped": True, "skipped_at": now}
+                if op.get("reason") is not None:
+                    changes["skipped_reason"] = op["reason"]
+            else:
+                changes = {"completed": True, "completed_at": now}
+            
+            result["status"] = TaskTransition.OK
+            result["task"] = dict(task)
+            task.update(changes)
+            updates.append((guard, changes))
+        
+        return results, updates
+    
+    async def _reconcile_batch(self, applied: List[Dict[str, Any]], stamp):
+        """
+        A concurrent request changed some tasks between read and write
+        Keep OK only where our timestamp landed; report the rest by state
+        """
+        current = {
+            task["task_id"]: task
+            for task in await self.find_many(
+                {"task_id": {"$in": [r["task_id"] for r in applied]}},
+                limit=len(applied),
+                projection={"_id": 0, "task_id": 1, "completed": 1, "completed_at": 1, "skipped_at": 1}
+            )
+        }
+        
+        for result in applied:
+            task = current.get(result["task_id"], {})
+            field = "completed_at" if result["action"] == "complete" else "skipped_at"
+            if task.get(field) == stamp:
+                continue
+            result["status"] = TaskTransition.ALREADY_COMPLETED if task.get("completed") else TaskTransition.ALREADY_SKIPPED
     
-    async def get_completion_stats(self, user_id: str) -> Dict[str, int]:
+    async def get_completion_stats(self, user_id: str) -> Dict[str, Any]:
         """
         Get task completion statistics
         Used for accountability tracking
+        
+        O(1): reads the materialized user_stats document.
+        Users without one get it built from the tasks collection first.
+        Counts active (non-archived) tasks, like every task list.
+        """
+        stats = await self.user_stats.get_task_stats(user_id)
+        if stats is None:
+            await self.user_stats.rebuild(user_id)
+            stats = await self.user_stats.get_task_stats(user_id)
+        
+        return stats
+    
+    async def aggregate_completion_stats(self, user_id: str) -> Dict[str, Any]:
         """
-        all_tasks = await self.get_user_tasks(user_id)
+        Compute task completion statistics from the tasks collection
+        Source of truth for user_stats reconciliation
         
-        total = len(all_tasks)
-        completed = len([t for t in all_tasks if t.get("completed")])
-        skipped = len([t for t in all_tasks if t.get("skipped")])
-        pending = total - completed - skipped
+        One $facet aggregation over the user's active (non-archived)
+        tasks, exact for any number of tasks: the same set the task
+        lists show. Archiving rebuilds the user's counters from here.
         
+        Returns total/completed/skipped/pending plus the same counts
+        broken down by_type and by_difficulty
+        """
+        result = (await self.aggregate(self.completion_stats_pipeline(user_id)))[0]
+        return self.parse_completion_stats(result)
+    
+    @staticmethod
+    def completion_stats_pipeline(user_id: str) -> List[Dict[str, Any]]:
+        """
+        Task stats pipeline (one output document)
+        Also embedded by other aggregations via $lookup
+        """
+        return [
+            {"$match": {"user_id": user_id, **LifecycleQueries.active_tasks_filter()}},
+            {"$project": {"_id": 0, "completed": 1, "skipped": 1, "task_type": 1, "difficulty": 1}},
+            {"$facet": TaskRepository.completion_stats_facets()}
+        ]
+    
+    @staticmethod
+    def completion_stats_facets() -> Dict[str, List[Dict[str, Any]]]:
+        """$facet branches behind completion stats (totals, by_type, by_difficulty)"""
         return {
-            "total": total,
-            "completed": completed,
-            "skipped": skipped,
-            "pending": pending
+            "totals": [{"$group": {"_id": None, **_STATUS_COUNTERS}}],
+            "by_type": [{"$group": {"_id": "$task_type", **_STATUS_COUNTERS}}],
+            "by_difficulty": [{"$group": {"_id": "$difficulty", **_STATUS_COUNTERS}}]
         }
+    
+    async def load_view_data(
+        self,
+        user_id: str,
+        today: Optional[str] = None,
+        recent_days: Optional[int] = None,
+        include_stats: bool = False,
+        include_completed: bool = False,
+        task_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        All task-side data a workspace view needs, in one $facet aggregation
+        
+        Only the requested branches run:
+        - today: "today_tasks" (TASK_CARD rows assigned on YYYY-MM-DD)
+        - recent_days: "recent" counts for tasks assigned in the window
+        - include_stats: "stats" (same shape as get_completion_stats,
+          computed from the tasks rather than read from user_stats)
+        - include_completed: "completed_tasks" (TASK_CARD rows, newest first)
+        - task_type: "typed_tasks" (TASK_CARD rows of that type, newest first)
+        
+        Card lists are capped at CARD_LIMIT, keeping the $facet result
+        well under the 16MB document limit for heavy users
+        """
+        active = LifecycleQueries.active_tasks_filter()
+        card = {key: value for key, value in Projections.TASK_CARD.items() if key != "_id"}
+        facets: Dict[str, List[Dict[str, Any]]] = {}
+        
+        if today:
+            facets["today_tasks"] = [
+                {"$match": {**active, "assigned_date": _assigned_date_match(today)}},
+                {"$sort": {"assigned_date": -1}},
+                {"$limit": self.CARD_LIMIT},
+                {"$project": {"_id": 0, **card}}
+            ]
+        
+        if recent_days is not None:
+            cutoff = utcnow() - timedelta(days=recent_days)
+            facets["recent"] = [
+                {"$match": {**active, **LifecycleQueries.date_range("assigned_date", "$gte", datetime(cutoff.year, cutoff.month, cutoff.day))}},
+                {"$group": {"_id": None, **_STATUS_COUNTERS}}
+            ]
+        
+        if include_stats:
+            facets.update({
+                name: [{"$match": active}, *stages]
+                for name, stages in self.completion_stats_facets().items()
+            })
+        
+        if include_completed:
+            facets["completed_tasks"] = [
+                {"$match": {**active, "completed": True}},
+                {"$sort": {"assigned_date": -1}},
+                {"$limit": self.CARD_LIMIT},
+                {"$project": {"_id": 0, **card}}
+            ]
+        
+        if task_type:
+            facets["typed_tasks"] = [
+                {"$match": {**active, "task_type": task_type}},
+                {"$sort": {"assigned_date": -1}},
+                {"$limit": self.CARD_LIMIT},
+                {"$project": {"_id": 0, **card}}
+            ]
+        
+        if not facets:
+            return {}
+        
+        result = (await self.aggregate([{"$match": {"user_id": user_id}}, {"$facet": facets}]))[0]
+        
+        data = {}
+        if today:
+            data["today_tasks"] = result["today_tasks"]
+        if recent_days is not None:
+            data["recent"] = _status_counts(result["recent"][0] if result["recent"] else None)
+        if include_stats:
+            data["stats"] = self.parse_completion_stats(result)
+        if include_completed:
+            data["completed_tasks"] = result["completed_tasks"]
+        if task_type:
+            data["typed_tasks"] = result["typed_tasks"]
+        return data
+    
+    @staticmethod
+    def parse_completion_stats(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape the completion_stats_pipeline output"""
+        stats = _status_counts(result["totals"][0] if result["totals"] else None)
+        stats["by_type"] = {
+            group["_id"]: _status_counts(group)
+            for group in result["by_type"]
+        }
+        stats["by_difficulty"] = {
+            group["_id"] or "unset": _status_counts(group)
+            for group in result["by_difficulty"]
+        }
+        
+        return stats
 
 # ==========================================
 # 4. HISTORY REPOSITORY
@@ -285,49 +935,267 @@ class HistoryRepository(BaseRepository):
     - Delete: Never (audit integrity)
     """
     
+    # Keyset order: newest first, history_id breaks ties
+    PAGE_SORT: SortSpec = [("timestamp", -1), ("history_id", -1)]
+    
     def __init__(self, db: AsyncIOMotorDatabase):
         super().__init__(db, Collections.HISTORY)
+        self.user_stats = UserStatsRepository(db)
+        self.insights = InsightRepository(db)
     
     async def log_event(self, event_data: HistoryDB) -> str:
         """
         Log system event
         Called automatically by system
+        
+        Queued for the write-behind flusher; written inline only if the
+        queue isn't running or stays full. Returns the history_id.
         """
         event_dict = event_data.model_dump()
-        event_dict["timestamp"] = datetime.utcnow().isoformat()
-        return await self.insert_one(event_dict)
+        event_dict["timestamp"] = utcnow()
+        
+        if await audit_queue.enqueue(event_dict):
+            return event_dict["history_id"]
+        
+        await self.insert_one(event_dict)
+        await self.user_stats.record_event(event_dict)
+        return event_dict["history_id"]
+    
+    async def log_events(self, events: List[HistoryDB]) -> List[str]:
+        """
+        Log many system events at once
+        
+        Queued for the write-behind flusher (one insert_many per flush);
+        anything the queue doesn't take is written with one insert_many
+        here. Returns the history_ids.
+        """
+        now = utcnow()
+        inline = []
+        for event_data in events:
+            event_dict = event_data.model_dump()
+            event_dict["timestamp"] = now
+            if not await audit_queue.enqueue(event_dict):
+                inline.append(event_dict)
+        
+        if inline:
+            await self.collection.insert_many(inline, ordered=False)
+            read_coalescer.forget(self.collection.name)
+            await self.user_stats.record_events(inline)
+        
+        return [event.history_id for event in events]
+    
+    async def log_insight(self, event_data: HistoryDB) -> bool:
+        """
+        Log a Pipoo insight, coalescing repeats
+        
+        The insight always lands in the per-user ring; a history event is
+        written only when it differs from the last one for that view (or
+        the dedupe window has passed). Returns True if an event was logged.
+        """
+        context = event_data.context or {}
+        if not await self.insights.record(event_data.user_id, context.get("view", "unknown"), context):
+            return False
+        
+        await self.log_event(event_data)
+        return True
+    
+    async def load_view_data(
+        self,
+        user_id: str,
+        events_limit: Optional[int] = None,
+        recent_event_type: Optional[str] = None,
+        recent_days: int = 7
+    ) -> Dict[str, Any]:
+        """
+        All history-side data a workspace view needs, read concurrently
+        
+        - events_limit: "events" (latest HISTORY_ROW rows, PAGE_SORT order)
+          and "events_next_cursor" for get_history_page
+        - recent_event_type: "recent_count" of that event type in the
+          last recent_days days
+        
+        Not a $facet: sorts and range matches inside $facet can't use an
+        index, so each read stays an index-backed find/count instead
+        """
+        reads = {}
+        
+        if events_limit:
+            reads["events"] = self.get_history_page(user_id, limit=events_limit, projection=Projections.HISTORY_ROW)
+        
+        if recent_event_type:
+            reads["recent_count"] = self.count_recent_events(user_id, recent_event_type, recent_days)
+        
+        results = dict(zip(reads, await asyncio.gather(*reads.values())))
+        
+        data = {}
+        if events_limit:
+            data["events"], data["events_next_cursor"] = results["events"]
+        if recent_event_type:
+            data["recent_count"] = results["recent_count"]
+        return data
+    
+    async def count_events_by_type(self, user_id: str) -> Dict[str, Any]:
+        """
+        Count a user's events per event_type (server-side)
+        Returns {"events": {type: count}, "total": n, "last_activity_at": ts}
+        """
+        groups = await self.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$group": {
+                "_id": "$event_type",
+                "count": {"$sum": 1},
+                "last": {"$max": "$timestamp"}
+            }}
+        ])
+        
+        return {
+            "events": {group["_id"]: group["count"] for group in groups},
+            "total": sum(group["count"] for group in groups),
+            "last_activity_at": max((group["last"] for group in groups), default=None)
+        }
     
     async def get_user_history(
         self, 
         user_id: str,
-        limit: int = 50
+        limit: int = 50,
+        projection: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get user's activity history
         Used in History view
         """
         return await self.find_many(
-            {"user_id": user_id},
+            {"user_id": user_id, **LifecycleQueries.active_history_filter()},
+            limit=limit,
+            sort=[("timestamp", -1)],  # Newest first
+            projection=projection
+        )
+    
+    async def get_activity_summary(self, user_id: str) -> Dict[str, Any]:
+        """
+        Full activity summary in one aggregation (single round trip)
+        
+        - Event counts by type and by day over active (non-archived) events
+        - First and last event time
+        - Task stats, joined from the tasks collection via $lookup
+        """
+        pipeline = [
+            {"$match": {"user_id": user_id, **LifecycleQueries.active_history_filter()}},
+            {"$project": {"_id": 0, "event_type": 1, "timestamp": 1}},
+            {"$facet": {
+                "by_type": [
+                    {"$group": {"_id": "$event_type", "count": {"$sum": 1}}}
+                ],
+                "by_day": [
+                    {"$group": {
+                        "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": {"$toDate": "$timestamp"}}},
+                        "count": {"$sum": 1}
+                    }},
+                    {"$sort": {"_id": 1}}
+                ],
+                "range": [
+                    {"$group": {
+                        "_id": None,
+                        "total": {"$sum": 1},
+                        "first": {"$min": "$timestamp"},
+                        "last": {"$max": "$timestamp"}
+                    }}
+                ]
+            }},
+            {"$lookup": {
+                "from": Collections.TASKS,
+                "pipeline": TaskRepository.completion_stats_pipeline(user_id),
+                "as": "task_stats"
+            }}
+        ]
+        
+        result = (await self.aggregate(pipeline))[0]
+        event_range = result["range"][0] if result["range"] else {}
+        
+        return {
+            "task_stats": TaskRepository.parse_completion_stats(result["task_stats"][0]),
+            "event_counts": {group["_id"]: group["count"] for group in result["by_type"]},
+            "events_by_day": {group["_id"]: group["count"] for group in result["by_day"]},
+            "total_events": event_range.get("total", 0),
+            "first_event_at": event_range.get("first"),
+            "last_event_at": event_range.get("last")
+        }
+    
+    async def get_history_page(
+        self,
+        user_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of user's history (newest first)
+        Pass the returned cursor back to get older events
+        """
+        return await self.find_page(
+            {"user_id": user_id, **LifecycleQueries.active_history_filter()},
+            sort=self.PAGE_SORT,
             limit=limit,
-            sort=[("timestamp", -1)]  # Newest first
+            after=cursor,
+            projection=projection
         )
     
+    async def iter_user_history(
+        self,
+        user_id: str,
+        batch_size: int = 500,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream a user's whole history in batches (newest first)"""
+        async for batch in self.iter_batches(
+            {"user_id": user_id, **LifecycleQueries.active_history_filter()},
+            sort=self.PAGE_SORT,
+            batch_size=batch_size,
+            projection=projection
+        ):
+            yield batch
+    
     async def get_recent_events(
         self, 
         user_id: str,
         event_type: str,
-        days: int = 7
+        days: int = 7,
+        projection: Optional[Dict[str, Any]] = None,
+        limit: int = 100
     ) -> List[Dict[str, Any]]:
         """
-        Get recent events of specific type
+        Get recent events of specific type (last `days` days)
         Used for pattern analysis
         """
-        # In production, add date filtering here
         return await self.find_many(
-            {"user_id": user_id, "event_type": event_type},
-            limit=100,
-            sort=[("timestamp", -1)]
+            self._recent_events_query(user_id, event_type, days),
+            limit=limit,
+            sort=[("timestamp", -1)],
+            projection=projection
         )
+    
+    async def count_recent_events(
+        self,
+        user_id: str,
+        event_type: str,
+        days: int = 7
+    ) -> int:
+        """
+        Count events of a type in the last `days` days
+        Range scan on the (user_id, event_type, timestamp) index
+        """
+        return await self.count(self._recent_events_query(user_id, event_type, days))
+    
+    @staticmethod
+    def _recent_events_query(user_id: str, event_type: str, days: int) -> Dict[str, Any]:
+        """Filter for one event type inside a trailing time window"""
+        cutoff = utcnow() - timedelta(days=days)
+        return {
+            "user_id": user_id,
+            "event_type": event_type,
+            **LifecycleQueries.date_range("timestamp", "$gte", cutoff),
+            **LifecycleQueries.active_history_filter()
+        }
 
 # ==========================================
 # 5. SKILL PROOF REPOSITORY
@@ -359,7 +1227,8 @@ class SkillProofRepository(BaseRepository):
     
     async def get_candidate_proofs(
         self, 
-        candidate_id: str
+        candidate_id: str,
+        projection: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get all proofs for a candidate
@@ -367,12 +1236,14 @@ class SkillProofRepository(BaseRepository):
         """
         return await self.find_many(
             {"candidate_id": candidate_id},
-            sort=[("submitted_at", -1)]
+            sort=[("submitted_at", -1)],
+            projection=projection
         )
     
     async def get_company_candidates(
         self, 
-        company_id: str
+        company_id: str,
+        projection: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get all candidate proofs for a company
@@ -380,7 +1251,8 @@ class SkillProofRepository(BaseRepository):
         """
         return await self.find_many(
             {"company_id": company_id},
-            sort=[("evaluated_at", -1)]
+            sort=[("evaluated_at", -1)],
+            projection=projection
         )
     
     async def update_evaluation(
@@ -400,6 +1272,478 @@ class SkillProofRepository(BaseRepository):
                 "score": score,
                 "flags": flags,
                 "evaluation_data": evaluation_data,
-                "evaluated_at": datetime.utcnow().isoformat()
+                "evaluated_at": utcnow()
             }
-        )
\ No newline at end of file
+        )
+# ==========================================
+# 6. USER STATS REPOSITORY
+# Owner: System (materialized counters)
+# ==========================================
+
+class UserStatsRepository(BaseRepository):
+    """
+    Per-user counters, kept up to date with atomic $inc
+    
+    Task counters cover active (non-archived) tasks; archiving changes
+    that set in bulk, so LifecycleManager rebuilds the affected users.
+    Event counters are lifetime totals.
+    
+    Ownership: System maintains counters
+    CRUD Rules:
+    - Create: System (upsert on first write, or rebuild)
+    - Read: User (own stats)
+    - Update: System ($inc from task/history writes, reconciliation)
+    - Delete: Never (rebuilt from source collections instead)
+    
+    Document shape:
+    {
+        "user_id": "user_123",
+        "tasks": {"total": 10, "completed": 6, "skipped": 1},
+        "tasks_by_type": {"daily": {"total": 8, "completed": 5, "skipped": 1}},
+        "tasks_by_difficulty": {"medium": {...}},
+        "events": {"login": 4, "task_completed": 6},
+        "events_total": 10,
+        "last_activity_at": "2024-01-01T14:30:00",
+        "data_version": 42
+    }
+    
+    `data_version` moves with every write that can change what the
+    user's workspace shows (it rides along in the counter $inc, plus
+    bump_data_version for onboarding/user changes). Every worker reads
+    the same value, so versioned response caches agree across processes.
+    """
+    
+    def __init__(self, db: AsyncIOMotorDatabase):
+        super().__init__(db, Collections.USER_STATS)
+    
+    async def _increment(self, user_id: str, inc: Dict[str, int], extra: Optional[Dict[str, Any]] = None):
+        """Apply $inc and bump data_version (creating the document on first write)"""
+        update = {
+            "$inc": {**inc, "data_version": 1},
+            "$set": {"updated_at": utcnow()}
+        }
+        if extra:
+            update.update(extra)
+        
+        await self.collection.update_one({"user_id": user_id}, update, upsert=True)
+    
+    # ==========================================
+    # WRITE PATHS
+    # ==========================================
+    
+    async def record_task_created(self, task: Dict[str, Any]):
+        """Count a new task"""
+        difficulty = task.get("difficulty") or "unset"
+        await self._increment(task["user_id"], {
+            "tasks.total": 1,
+            f"tasks_by_type.{task['task_type']}.total": 1,
+            f"tasks_by_difficulty.{difficulty}.total": 1
+        })
+    
+    async def record_task_status(self, user_id: str, task: Dict[str, Any], status: str):
+        """Count a task moving to completed or skipped"""
+        await self.record_task_statuses(user_id, [(task, status)])
+    
+    async def record_task_statuses(self, user_id: str, changes: List[Tuple[Dict[str, Any], str]]):
+        """Count many (task, status) moves for one user in a single $inc"""
+        inc: Dict[str, int] = {}
+        for task, status in changes:
+            difficulty = task.get("difficulty") or "unset"
+            for key in (
+                f"tasks.{status}",
+                f"tasks_by_type.{task['task_type']}.{status}",
+                f"tasks_by_difficulty.{difficulty}.{status}"
+            ):
+                inc[key] = inc.get(key, 0) + 1
+        
+        if inc:
+            await self._increment(user_id, inc)
+    
+    async def record_event(self, event: Dict[str, Any]):
+        """Count a history event and move last activity forward"""
+        await self._increment(
+            event["user_id"],
+            {f"events.{event['event_type']}": 1, "events_total": 1},
+            extra={"$max": {"last_activity_at": event["timestamp"]}}
+        )
+    
+    async def record_events(self, events: List[Dict[str, Any]]):
+        """
+        Count a batch of history events (write-behind flush)
+        One bulk_write with one $inc per user
+        """
+        per_user: Dict[str, Dict[str, Any]] = {}
+        for event in events:
+            user = per_user.setdefault(event["user_id"], {"inc": {"events_total": 0, "data_version": 1}, "last": event["timestamp"]})
+            key = f"events.{event['event_type']}"
+            user["inc"][key] = user["inc"].get(key, 0) + 1
+            user["inc"]["events_total"] += 1
+            user["last"] = max(user["last"], event["timestamp"])
+        
+        if not per_user:
+            return
+        
+        now = utcnow()
+        await self.collection.bulk_write([
+            UpdateOne(
+                {"user_id": user_id},
+                {
+                    "$inc": user["inc"],
+                    "$set": {"updated_at": now},
+                    "$max": {"last_activity_at": user["last"]}
+                },
+                upsert=True
+            )
+            for user_id, user in per_user.items()
+        ], ordered=False)
+    
+    async def bump_data_version(self, user_id: str):
+        """Mark the user's workspace data as changed (non-counter writes)"""
+        await self._increment(user_id, {})
+    
+    # ==========================================
+    # READ PATHS
+    # ==========================================
+    
+    async def get_data_version(self, user_id: str) -> int:
+        """Current data version (0 before the first write)"""
+        doc = await self.find_one({"user_id": user_id}, {"_id": 0, "data_version": 1})
+        return doc.get("data_version", 0) if doc else 0
+    
+    async def get_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Raw counters document (single indexed lookup)"""
+        return await self.find_one({"user_id": user_id}, {"_id": 0})
+    
+    async def get_task_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Task counters in get_completion_stats shape
+        Returns None until the counters have been built once by rebuild()
+        (events can create the document before any task counters exist)
+        """
+        doc = await self.get_stats(user_id)
+        if doc is None or "reconciled_at" not in doc:
+            return None
+        
+        stats = _status_counts(doc.get("tasks"))
+        stats["by_type"] = {
+            task_type: _status_counts(group)
+            for task_type, group in doc.get("tasks_by_type", {}).items()
+        }
+        stats["by_difficulty"] = {
+            difficulty: _status_counts(group)
+            for difficulty, group in doc.get("tasks_by_difficulty", {}).items()
+        }
+        return stats
+    
+    # ==========================================
+    # RECONCILIATION
+    # ==========================================
+    
+    @staticmethod
+    def _counter_group(stats: Dict[str, Any]) -> Dict[str, int]:
+        """Stored form of a status group (pending is derived)"""
+        return {
+            "total": stats["total"],
+            "completed": stats["completed"],
+            "skipped": stats["skipped"]
+        }
+    
+    @staticmethod
+    def _flatten(doc: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+        """Flatten nested counters to dotted paths for comparison"""
+        flat = {}
+        for key, value in doc.items():
+            path = f"{prefix}{key}"
+            if isinstance(value, dict):
+                flat.update(UserStatsRepository._flatten(value, f"{path}."))
+            else:
+                flat[path] = value
+        return flat
+    
+    async def rebuild(self, user_id: str, max_attempts: int = 3) -> Dict[str, Any]:
+        """
+        Recompute a user's counters from tasks and history
+        
+        Overwrites the stored counters and returns the drift found:
+        {"user_id": ..., "drift": {"tasks.completed": {"stored": 4, "actual": 5}}, "applied": True}
+        
+        Every $inc also bumps data_version, so the write is guarded on the
+        version read before aggregating: if a counter moved in between,
+        the rebuild starts over instead of overwriting that $inc.
+        """
+        for _ in range(max_attempts):
+            result = await self._rebuild_once(user_id)
+            if result["applied"]:
+                return result
+        
+        print(f"⚠️  Stats rebuild for {user_id} kept racing with writes; counters left as is")
+        return result
+    
+    async def _rebuild_once(self, user_id: str) -> Dict[str, Any]:
+        """One guarded rebuild attempt (applied=False if a write raced it)"""
+        stored = await self.collection.find_one({"user_id": user_id}, {"_id": 0}) or {}
+        version = stored.get("data_version")
+        
+        task_stats = await TaskRepository(self.db).aggregate_completion_stats(user_id)
+        event_stats = await HistoryRepository(self.db).count_events_by_type(user_id)
+        
+        counters = {
+            "tasks": self._counter_group(task_stats),
+            "tasks_by_type": {
+                task_type: self._counter_group(group)
+                for task_type, group in task_stats["by_type"].items()
+            },
+            "tasks_by_difficulty": {
+                difficulty: self._counter_group(group)
+                for difficulty, group in task_stats["by_difficulty"].items()
+            },
+            "events": event_stats["events"],
+            "events_total": event_stats["total"],
+            "last_activity_at": event_stats["last_activity_at"]
+        }
+        
+        stored_flat = self._flatten({k: stored.get(k) for k in counters if k in stored})
+        actual_flat = self._flatten(counters)
+        
+        drift = {
+            path: {"stored": stored_flat.get(path, 0), "actual": actual_flat.get(path, 0)}
+            for path in set(stored_flat) | set(actual_flat)
+            if (stored_flat.get(path) or 0) != (actual_flat.get(path) or 0)
+        }
+        
+        # $set (not replace) keeps data_version; corrected counters are a change
+        guard = {"data_version": version} if version is not None else {"data_version": {"$exists": False}}
+        try:
+            result = await self.collection.update_one(
+                {"user_id": user_id, **guard},
+                {
+                    "$set": {**counters, "updated_at": utcnow(), "reconciled_at": utcnow()},
+                    "$inc": {"data_version": 1}
+                },
+                upsert=True
+            )
+            applied = result.matched_count > 0 or result.upserted_id is not None
+        except DuplicateKeyError:
+            # Guard missed and the upsert hit the existing document
+            applied = False
+        read_coalescer.forget(self.collection.name)
+        
+        return {"user_id": user_id, "drift": drift, "applied": applied}
+
+# ==========================================
+# 7. INSIGHT REPOSITORY
+# Owner: System (Pipoo insight ring)
+# ==========================================
+
+class InsightRepository(BaseRepository):
+    """
+    Recent Pipoo insights, one document per user
+    
+    Ownership: System writes on workspace renders
+    CRUD Rules:
+    - Create: System (upsert on first insight)
+    - Read: User (own insights)
+    - Update: System ($push/$slice ring, dedupe markers)
+    - Delete: Never (ring is bounded)
+    
+    Document shape:
+    {
+        "user_id": "user_123",
+        "latest": {"overview": {"hash": "...", "at": ..., "seen_at": ..., "repeats": 3}},
+        "recent": [{"view": "overview", "message": "...", "context": {...}, "hash": "...", "at": ...}]
+    }
+    """
+    
+    def __init__(self, db: AsyncIOMotorDatabase):
+        super().__init__(db, Collections.PIPOO_INSIGHTS)
+    
+    @staticmethod
+    def insight_hash(context: Dict[str, Any]) -> str:
+        """Stable hash of an insight's message + context"""
+        encoded = json.dumps(context, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+    
+    async def record(self, user_id: str, view: str, context: Dict[str, Any]) -> bool:
+        """
+        Record an insight; returns False if it repeats the latest one
+        for this view inside PIPOO_INSIGHT_DEDUPE_SECONDS
+        
+        Repeat: one small update (repeats counter), nothing else written
+        New: pushed onto the ring, trimmed to PIPOO_INSIGHT_RING_SIZE
+        """
+        insight_hash = self.insight_hash(context)
+        now = utcnow()
+        cutoff = now - timedelta(seconds=settings.PIPOO_INSIGHT_DEDUPE_SECONDS)
+        latest = f"latest.{view}"
+        
+        repeat = await self.collection.update_one(
+            {"user_id": user_id, f"{latest}.hash": insight_hash, f"{latest}.at": {"$gte": cutoff}},
+            {"$set": {f"{latest}.seen_at": now}, "$inc": {f"{latest}.repeats": 1}}
+        )
+        if repeat.matched_count:
+            return False
+        
+        entry = {
+            "view": view,
+            "message": context.get("message"),
+            "context": context,
+            "hash": insight_hash,
+            "at": now
+        }
+        
+        try:
+            # Guarded so two concurrent renders can't both push the same insight
+            await self.collection.update_one(
+                {"user_id": user_id, "$or": [
+                    {f"{latest}.hash": {"$ne": insight_hash}},
+                    {f"{latest}.at": {"$lt": cutoff}}
+                ]},
+                {
+                    "$set": {
+                        latest: {"hash": insight_hash, "at": now, "seen_at": now, "repeats": 0},
+                        "updated_at": now
+                    },
+                    "$push": {"recent": {"$each": [entry], "$slice": -settings.PIPOO_INSIGHT_RING_SIZE}}
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Document exists and the guard failed: a concurrent render won
+            return False
+        finally:
+            read_coalescer.forget(self.collection.name)
+        
+        return True
+    
+    async def get_recent_insights(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most recent insights, newest first"""
+        doc = await self.find_one(
+            {"user_id": user_id},
+            {"_id": 0, "recent": {"$slice": -limit}}
+        )
+        return list(reversed(doc.get("recent", []))) if doc else []
+
+# ==========================================
+# 8. WORKSPACE SNAPSHOT REPOSITORY
+# Owner: System (precomputed workspace views)
+# ==========================================
+
+class WorkspaceSnapshotRepository(BaseRepository):
+    """
+    Precomputed workspace payloads, one document per user and view
+    
+    Ownership: System materializes, User reads
+    CRUD Rules:
+    - Create: System (claimed before the first build)
+    - Read: User (own snapshots, via /workspace)
+    - Update: System (mark stale on writes, save after a build)
+    - Delete: System (onboarding reset)
+    
+    Document shape:
+    {
+        "user_id": "user_123", "view": "overview", "role": "student",
+        "day": "2024-01-15", "payload": {...}, "stale": False,
+        "generation": 4, "built_at": ...
+    }
+    
+    Every write that changes a user's workspace marks their snapshots
+    stale and bumps `generation`. A build records the generation it
+    started from and only saves if it is unchanged, so a write that lands
+    mid-build can never be hidden by an older payload.
+    """
+    
+    def __init__(self, db: AsyncIOMotorDatabase):
+        super().__init__(db, Collections.WORKSPACE_SNAPSHOTS)
+    
+    async def mark_stale(self, user_id: str):
+        """Invalidate all of a user's snapshots (no-op when snapshots are off)"""
+        if not settings.WORKSPACE_SNAPSHOTS:
+            return
+        
+        await self.collection.update_many(
+            {"user_id": user_id},
+            {"$set": {"stale": True}, "$inc": {"generation": 1}}
+        )
+        read_coalescer.forget(self.collection.name)
+    
+    async def get_views(self, user_id: str, views: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Snapshot documents for these views, keyed by view (one indexed read)"""
+        docs = await self.find_many(
+            {"user_id": user_id, "view": {"$in": views}},
+            limit=len(views),
+            projection={"_id": 0}
+        )
+        return {doc["view"]: doc for doc in docs}
+    
+    @staticmethod
+    def fresh_payloads(
+        docs: Dict[str, Dict[str, Any]],
+        role: str,
+        views: List[str],
+        day: str
+    ) -> Optional[Dict[str, dict]]:
+        """Payloads for every view, or None if any is missing, stale or from another day/role"""
+        payloads = {}
+        for view in views:
+            doc = docs.get(view)
+            if not doc or doc.get("stale", True) or doc.get("day") != day or doc.get("role") != role:
+                return None
+            payloads[view] = doc["payload"]
+        return payloads
+    
+    async def claim(self, user_id: str, views: List[str]):
+        """
+        Create stale placeholders for views without a snapshot
+        Lets mark_stale see (and bump) them while the first build runs
+        """
+        if not views:
+            return
+        
+        await self.collection.bulk_write([
+            UpdateOne(
+                {"user_id": user_id, "view": view},
+                {"$setOnInsert": {"stale": True, "generation": 0}},
+                upsert=True
+            )
+            for view in views
+        ], ordered=False)
+    
+    async def save(
+        self,
+        user_id: str,
+        role: str,
+        day: str,
+        payloads: Dict[str, dict],
+        generations: Dict[str, int]
+    ) -> int:
+        """
+        Store freshly built payloads
+        Each one only lands if its generation is unchanged; returns how many did
+        """
+        if not payloads:
+            return 0
+        
+        now = utcnow()
+        writes = [
+            UpdateOne(
+                {"user_id": user_id, "view": view, "generation": generations.get(view, 0)},
+                {"$set": {"role": role, "day": day, "payload": payload, "stale": False, "built_at": now}}
+            )
+            for view, payload in payloads.items()
+        ]
+        
+        try:
+            result = await self.collection.bulk_write(writes, ordered=False)
+        except BulkWriteError as error:
+            print(f"⚠️  Snapshot save failed for {user_id}: {error.details.get('writeErrors', [])[:1]}")
+            return error.details.get("nModified", 0)
+        finally:
+            read_coalescer.forget(self.collection.name)
+        
+        return result.modified_count
+    
+    async def delete_user_snapshots(self, user_id: str) -> int:
+        """Drop every snapshot for a user (onboarding reset)"""
+        result = await self.collection.delete_many({"user_id": user_id})
+        read_coalescer.forget(self.collection.name)
+        return result.deleted_count
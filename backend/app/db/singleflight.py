@@ -0,0 +1,75 @@
+"""
+Single-Flight Read Coalescing
+Identical concurrent reads share one MongoDB round trip
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import copy
+
+# ==========================================
+# SINGLE FLIGHT GROUP
+# ==========================================
+
+class SingleFlight:
+    """
+    Deduplicates identical in-flight reads
+    
+    The first caller for a key (the leader) runs the query.
+    Callers that arrive while it is still running await the same
+    task and receive a copy of its result instead of issuing
+    their own query.
+    
+    Only in-flight calls are shared: nothing is cached after the
+    query completes.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        
+        self.calls = 0
+        self.round_trips = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() once per key among concurrent callers"""
+        self.calls += 1
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            # Followers get their own copy so mutations don't leak
+            return copy.deepcopy(await asyncio.shield(task))
+        
+        self.round_trips += 1
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._forget_task(key, task))
+        
+        # Shield so a cancelled leader doesn't cancel its followers
+        return await asyncio.shield(task)
+    
+    def _forget_task(self, key: Hashable, task: asyncio.Task):
+        """Remove a finished task (unless already replaced)"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+    
+    def forget(self, namespace: str):
+        """
+        Stop sharing in-flight reads for a namespace
+        Called after writes so later readers don't join a stale read
+        """
+        for key in [k for k in self._inflight if k[0] == namespace]:
+            del self._inflight[key]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing metrics"""
+        return {
+            "calls": self.calls,
+            "round_trips": self.round_trips,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight)
+        }
+
+# Shared across all repository instances (repositories are per-request)
+read_coalescer = SingleFlight()
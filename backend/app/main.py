@@ -4,7 +4,11 @@ from app.routes import auth, onboarding, workspace, dev  # Add dev
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import connect_to_mongodb, close_mongodb_connection  # ⭐ NEW
+from app.core.database import connect_to_mongodb, close_mongodb_connection, get_database  # ⭐ NEW
+from app.core.security import password_pool
+from app.db.audit import audit_queue
+from app.services.snapshot_materializer import snapshot_materializer
+from app.db.migrations import stop_backfills
 from app.routes import auth, onboarding, workspace
 
 # Create FastAPI app instance
@@ -83,6 +87,20 @@ async def startup_event():
     
     # ⭐ NEW - Connect to MongoDB
     await connect_to_mongodb()
+    
+    # Start write-behind audit flusher
+    if settings.AUDIT_WRITE_BEHIND:
+        try:
+            audit_queue.start(get_database())
+        except Exception as e:
+            print(f"⚠️  Audit queue not started, events will be written inline: {e}")
+    
+    # Start background workspace snapshot rebuilds
+    if settings.WORKSPACE_SNAPSHOTS:
+        try:
+            snapshot_materializer.start(get_database())
+        except Exception as e:
+            print(f"⚠️  Snapshot materializer not started, snapshots will be built on read: {e}")
 
 # ==========================================
 # SHUTDOWN EVENT
@@ -94,8 +112,16 @@ async def shutdown_event():
     """
     print("\n👋 Server shutting down...")
     
+    # Flush queued audit events before the connection closes
+    await audit_queue.stop()
+    await snapshot_materializer.stop()
+    await stop_backfills()
+    
     # ⭐ NEW - Close MongoDB connection
     await close_mongodb_connection()
+    
+    # Stop password hashing workers
+    password_pool.shutdown()
 
 # ==========================================
 # EXAMPLE: API PREFIX ROUTE
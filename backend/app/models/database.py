@@ -25,8 +25,9 @@ class UserDB(BaseModel):
     hashed_password: str
     role: Literal["student", "professional", "company"]
     onboarding_completed: bool = False
-    created_at: str
-    updated_at: Optional[str] = None
+    token_version: int = 0  # Bumped on role/onboarding change (revokes old tokens)
+    created_at: datetime  # BSON date
+    updated_at: Optional[datetime] = None
     
     class Config:
         json_schema_extra = {
@@ -37,6 +38,7 @@ class UserDB(BaseModel):
                 "hashed_password": "$2b$12$...",
                 "role": "student",
                 "onboarding_completed": True,
+                "token_version": 1,
                 "created_at": "2024-01-01T00:00:00",
                 "updated_at": "2024-01-02T00:00:00"
             }
@@ -56,7 +58,7 @@ class OnboardingProfileDB(BaseModel):
     user_id: str  # Foreign key to users
     role: Literal["student", "professional", "company"]
     data: Dict[str, Any]  # Role-specific onboarding answers
-    completed_at: str
+    completed_at: datetime
     
     class Config:
         json_schema_extra = {
@@ -90,12 +92,14 @@ class TaskDB(BaseModel):
     task_type: Literal["daily", "skill", "optional", "micro"]
     difficulty: Optional[Literal["easy", "medium", "hard"]] = None
     estimated_time: str
-    assigned_date: str
-    due_date: Optional[str] = None
+    assigned_date: datetime  # Midnight UTC of the assigned day
+    due_date: Optional[datetime] = None
     completed: bool = False
-    completed_at: Optional[str] = None
+    completed_at: Optional[datetime] = None
     skipped: bool = False
+    skipped_at: Optional[datetime] = None
     skipped_reason: Optional[str] = None
+    archived: bool = False  # Always written so partial indexes can match on it
     
     class Config:
         json_schema_extra = {
@@ -131,11 +135,14 @@ class HistoryDB(BaseModel):
         "evaluation_flagged",
         "onboarding_completed",
         "login",
+        "pipoo_insight",
         "other"
     ]
     description: str
     context: Optional[Dict[str, Any]] = None  # Additional context data
-    timestamp: str
+    timestamp: datetime
+    summarized: bool = False  # Always written so partial indexes can match on it
+    archived: bool = False
     
     class Config:
         json_schema_extra = {
@@ -170,8 +177,8 @@ class SkillProofDB(BaseModel):
     task_type: str
     score: int  # 0-100
     flags: list[str] = []  # ["plagiarism", "ai-assisted", "pattern-match"]
-    submitted_at: str
-    evaluated_at: str
+    submitted_at: datetime
+    evaluated_at: datetime
     evaluation_data: Optional[Dict[str, Any]] = None
     
     class Config:
@@ -101,6 +101,7 @@ class OnboardingResponse(BaseModel):
     user_id: str
     role: str
     onboarding_completed: bool
+    access_token: Optional[str] = None  # Fresh token (old one is revoked by the state change)
     
     class Config:
         json_schema_extra = {
@@ -109,7 +110,8 @@ class OnboardingResponse(BaseModel):
                 "message": "Onboarding completed successfully",
                 "user_id": "user_123",
                 "role": "student",
-                "onboarding_completed": True
+                "onboarding_completed": True,
+                "access_token": "eyJhbGciOiJIUzI1NiIs..."
             }
         }
 
@@ -81,6 +81,14 @@ class WorkspaceDataResponse(BaseModel):
             }
         }
 
+class WorkspaceMultiViewResponse(BaseModel):
+    """
+    Several views from one request (?views=overview,focus)
+    All views share a single data load
+    """
+    role: Literal["student", "professional", "company"]
+    views: Dict[str, WorkspaceDataResponse]
+
 # ==========================================
 # ALLOWED VIEWS PER ROLE
 # ==========================================
@@ -6,14 +6,21 @@ Handles signup, login, and user verification with MongoDB persistence
 from fastapi import APIRouter, HTTPException, status, Depends
 from app.models.user import SignupRequest, LoginRequest, AuthResponse, UserResponse
 from app.models.database import UserDB, HistoryDB
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import (
+    hash_password_async,
+    verify_password_async,
+    create_access_token,
+    token_versions
+)
 from app.core.dependencies import (
     get_current_user,
+    get_token_claims,
     get_user_repo,
     get_history_repo
 )
 from app.db.repositories import UserRepository, HistoryRepository
-from datetime import datetime
+from app.db.projections import Projections
+from app.core.serialization import utcnow, to_iso
 import uuid
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -35,14 +42,14 @@ async def signup(
     
     Process:
     1. Check if email already exists
-    2. Hash password (never store plain text)
+    2. Hash password in worker pool (never store plain text)
     3. Create user record in MongoDB
     4. Log signup event in history
     5. Generate JWT token
     6. Return token + user data
     """
     # Check if email already exists
-    existing_user = await user_repo.get_user_by_email(request.email)
+    existing_user = await user_repo.get_user_by_email(request.email, Projections.EXISTS)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -53,7 +60,7 @@ async def signup(
     user_id = f"user_{uuid.uuid4().hex[:12]}"
     
     # Hash password
-    hashed_password = hash_password(request.password)
+    hashed_password = await hash_password_async(request.password)
     
     # Create user document
     user_data = UserDB(
@@ -63,7 +70,7 @@ async def signup(
         hashed_password=hashed_password,
         role=request.role,
         onboarding_completed=False,
-        created_at=datetime.utcnow().isoformat()
+        created_at=utcnow()
     )
     
     # Save to MongoDB
@@ -80,7 +87,7 @@ async def signup(
             "role": request.role,
             "name": request.name
         },
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utcnow()
     )
     await history_repo.log_event(history_data)
     
@@ -89,9 +96,11 @@ async def signup(
         "sub": user_id,
         "email": request.email,
         "role": request.role,
-        "onboarding_completed": False
+        "onboarding_completed": False,
+        "token_version": user_data.token_version
     }
     access_token = create_access_token(token_data)
+    token_versions.observe(user_id, user_data.token_version)
     
     # Prepare response (WITHOUT password)
     user_response = UserResponse(
@@ -100,7 +109,7 @@ async def signup(
         email=request.email,
         role=request.role,
         onboarding_completed=False,
-        created_at=user_data.created_at
+        created_at=to_iso(user_data.created_at)
     )
     
     print(f"✅ New user created: {request.email} ({request.role}) - ID: {user_id}")
@@ -127,13 +136,13 @@ async def login(
     
     Process:
     1. Find user by email in MongoDB
-    2. Verify password
+    2. Verify password in worker pool (503 if saturated)
     3. Log login event
     4. Generate new JWT token
     5. Return token + user data
     """
     # Find user by email
-    user = await user_repo.get_user_by_email(request.email)
+    user = await user_repo.get_user_by_email(request.email, Projections.CREDENTIALS)
     
     # User not found
     if not user:
@@ -143,7 +152,7 @@ async def login(
         )
     
     # Verify password
-    if not verify_password(request.password, user["hashed_password"]):
+    if not await verify_password_async(request.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -156,18 +165,21 @@ async def login(
         event_type="login",
         description="User logged in",
         context={"action": "login"},
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utcnow()
     )
     await history_repo.log_event(history_data)
     
     # Create JWT token
+    token_version = user.get("token_version", 0)
     token_data = {
         "sub": user["user_id"],
         "email": user["email"],
         "role": user["role"],
-        "onboarding_completed": user.get("onboarding_completed", False)
+        "onboarding_completed": user.get("onboarding_completed", False),
+        "token_version": token_version
     }
     access_token = create_access_token(token_data)
+    token_versions.observe(user["user_id"], token_version)
     
     # Prepare response (WITHOUT password)
     user_response = UserResponse(
@@ -176,7 +188,7 @@ async def login(
         email=user["email"],
         role=user["role"],
         onboarding_completed=user.get("onboarding_completed", False),
-        created_at=user["created_at"]
+        created_at=to_iso(user["created_at"])
     )
     
     print(f"✅ User logged in: {request.email} - ID: {user['user_id']}")
@@ -208,7 +220,7 @@ async def get_me(
     user_id = current_user["user_id"]
     
     # Get fresh user data from MongoDB
-    user = await user_repo.get_user_by_id(user_id)
+    user = await user_repo.get_user_by_id(user_id, Projections.IDENTITY)
     
     if not user:
         raise HTTPException(
@@ -222,7 +234,7 @@ async def get_me(
         email=user["email"],
         role=user["role"],
         onboarding_completed=user.get("onboarding_completed", False),
-        created_at=user["created_at"]
+        created_at=to_iso(user["created_at"])
     )
 
 # ==========================================
@@ -230,10 +242,15 @@ async def get_me(
 # ==========================================
 
 @router.get("/verify")
-async def verify_token(current_user: dict = Depends(get_current_user)):
+async def verify_token(current_user: dict = Depends(get_token_claims)):
     """
     Verify if token is valid
-    Returns basic token info without database lookup
+    Returns basic token info, usually without a database lookup
+    
+    Checks signature, expiry and token_version (in-memory map, one
+    projected users read per user per TOKEN_VERSION_TTL_SECONDS), so
+    tokens issued before a role/onboarding change are rejected within
+    TOKEN_VERSION_TTL_SECONDS, even if another worker made the change
     
     Used for quick token validation
     """
@@ -267,7 +284,7 @@ async def logout(
         event_type="other",
         description="User logged out",
         context={"action": "logout"},
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utcnow()
     )
     await history_repo.log_event(history_data)
     
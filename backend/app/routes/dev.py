@@ -4,8 +4,14 @@ Development utilities
 """
 
 from fastapi import APIRouter, Depends
-from app.core.database import get_database
-from app.db.collections import list_collections, drop_all_collections
+from app.core.database import get_database, pool_metrics
+from app.db.collections import list_collections, drop_all_collections, create_collections_with_validation
+from app.core.security import password_pool, token_versions
+from app.core.cache import identity_cache, workspace_cache
+from app.db.singleflight import read_coalescer
+from app.db.audit import audit_queue
+from app.core.timing import view_timings
+from app.services.snapshot_materializer import snapshot_materializer
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
@@ -18,6 +24,77 @@ async def get_collections_info(db: AsyncIOMotorDatabase = Depends(get_database))
     await list_collections(db)
     return {"message": "Check console for collection info"}
 
+@router.get("/dev/metrics")
+async def get_metrics():
+    """
+    In-process performance counters
+    Useful for sizing worker pools and caches
+    """
+    return {
+        "password_pool": password_pool.stats(),
+        "identity_cache": identity_cache.stats(),
+        "workspace_cache": workspace_cache.stats(),
+        "token_versions": token_versions.stats(),
+        "read_coalescing": read_coalescer.stats(),
+        "audit_queue": audit_queue.stats(),
+        "workspace_views": view_timings.stats(),
+        "snapshot_materializer": snapshot_materializer.stats(),
+        "mongodb_pool": pool_metrics.stats()
+    }
+
+@router.post("/dev/reconcile-stats")
+async def reconcile_stats(db: AsyncIOMotorDatabase = Depends(get_database)):
+    """
+    Rebuild user_stats counters from tasks + history
+    Returns per-user drift
+    """
+    from app.db.lifecycle import LifecycleManager
+    return await LifecycleManager(db).reconcile_user_stats()
+
+@router.post("/dev/migrate/native-dates")
+async def migrate_native_dates(
+    batch_size: int = 500,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Convert ISO-string timestamps to BSON dates (resumable)
+    Safe to call repeatedly; finished collections are skipped
+    """
+    from app.db.migrations import backfill_native_dates
+    return await backfill_native_dates(db, batch_size=batch_size)
+
+@router.post("/dev/migrate/lifecycle-flags")
+async def migrate_lifecycle_flags(db: AsyncIOMotorDatabase = Depends(get_database)):
+    """
+    Add explicit archived/summarized flags to legacy documents
+    Manual trigger; startup runs this in the background on one worker
+    """
+    from app.db.migrations import backfill_lifecycle_flags
+    return await backfill_lifecycle_flags(db)
+
+@router.post("/dev/migrate/history-time-series")
+async def migrate_history_time_series(
+    batch_size: int = 1000,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Convert history to a time-series collection (resumable)
+    Set HISTORY_TIME_SERIES=true so later bootstraps keep the layout
+    """
+    from app.db.migrations import migrate_history_to_time_series
+    return await migrate_history_to_time_series(db, batch_size=batch_size)
+
+@router.post("/dev/migrate/dedupe-daily-tasks")
+async def migrate_dedupe_daily_tasks(db: AsyncIOMotorDatabase = Depends(get_database)):
+    """
+    Remove duplicate daily tasks, then build unique_daily_task
+    Safe to call repeatedly
+    """
+    from app.db.migrations import dedupe_daily_tasks
+    result = await dedupe_daily_tasks(db)
+    await create_collections_with_validation(db, force=True)
+    return result
+
 @router.delete("/dev/reset")
 async def reset_database(db: AsyncIOMotorDatabase = Depends(get_database)):
     """
@@ -25,9 +102,12 @@ async def reset_database(db: AsyncIOMotorDatabase = Depends(get_database)):
     Use only in development
     """
     await drop_all_collections(db)
+    identity_cache.clear()
+    token_versions.clear()
+    workspace_cache.clear()
     
     # Recreate collections
     from app.db.collections import create_collections_with_validation
-    await create_collections_with_validation(db)
+    await create_collections_with_validation(db, force=True)
     
     return {"message": "Database reset complete"}
\ No newline at end of file
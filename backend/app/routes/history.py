@@ -3,14 +3,18 @@ History Routes
 Provides audit trail view by querying history and tasks collections
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from app.core.dependencies import (
     get_current_user,
     get_history_repo,
     get_task_repo
 )
 from app.db.repositories import HistoryRepository, TaskRepository
+from app.db.projections import Projections
+from app.core.serialization import serialize_document, parse_datetime
+from datetime import datetime
 from typing import Optional
+import heapq
 
 router = APIRouter(prefix="/history", tags=["History"])
 
@@ -22,8 +26,10 @@ router = APIRouter(prefix="/history", tags=["History"])
 async def get_user_history(
     current_user: dict = Depends(get_current_user),
     history_repo: HistoryRepository = Depends(get_history_repo),
-    limit: int = Query(50, description="Number of events to return"),
-    event_type: Optional[str] = Query(None, description="Filter by event type")
+    limit: int = Query(50, ge=1, le=500, description="Number of events to return"),
+    event_type: Optional[str] = Query(None, description="Filter by event type"),
+    days: int = Query(30, ge=1, le=365, description="Time window for event_type filter"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
     """
     Get user's activity history (audit trail)
@@ -36,28 +42,42 @@ async def get_user_history(
     Query params:
     - limit: Max events to return (default: 50)
     - event_type: Filter by type (task_completed, task_skipped, login, etc.)
+    - days: Time window applied with event_type (default: 30)
+    - cursor: Continuation token for older events (unfiltered history only)
     """
     user_id = current_user["user_id"]
+    next_cursor = None
     
     if event_type:
         # Get filtered events
         events = await history_repo.get_recent_events(
             user_id=user_id,
             event_type=event_type,
-            days=30  # Last 30 days
-        )
-    else:
-        # Get all recent events
-        events = await history_repo.get_user_history(
-            user_id=user_id,
+            days=days,  # Last N days (default 30)
+            projection=Projections.HISTORY_ROW,
             limit=limit
         )
+    else:
+        # Get one page of events (keyset paginated)
+        try:
+            events, next_cursor = await history_repo.get_history_page(
+                user_id=user_id,
+                limit=limit,
+                cursor=cursor,
+                projection=Projections.HISTORY_ROW
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
     
     return {
         "user_id": user_id,
-        "events": events,
+        "events": serialize_document(events),
         "total": len(events),
-        "filter": event_type
+        "filter": event_type,
+        "next_cursor": next_cursor
     }
 
 # ==========================================
@@ -76,28 +96,36 @@ async def get_task_history(
     CRUD Permission: User reads their own task history
     
     Returns completed and skipped tasks
+    Streams all tasks in batches, keeping only the newest `limit` in memory
     """
     user_id = current_user["user_id"]
     
-    # Get all tasks
-    all_tasks = await task_repo.get_user_tasks(user_id=user_id)
-    
-    # Filter completed or skipped
-    history_tasks = [
-        task for task in all_tasks
-        if task.get("completed") or task.get("skipped")
-    ]
-    
-    # Sort by completion date (most recent first)
-    history_tasks.sort(
-        key=lambda t: t.get("completed_at") or t.get("assigned_date"),
-        reverse=True
-    )
+    def sort_key(task: dict) -> datetime:
+        # Unparseable leftovers from the date backfill sort last
+        value = task.get("completed_at") or task.get("assigned_date")
+        try:
+            return parse_datetime(value) or datetime.min
+        except (TypeError, ValueError):
+            return datetime.min
+    
+    history_tasks = []
+    total = 0
+    
+    async for batch in task_repo.iter_user_tasks(user_id, projection=Projections.TASK_CARD):
+        # Filter completed or skipped
+        finished = [
+            task for task in batch
+            if task.get("completed") or task.get("skipped")
+        ]
+        total += len(finished)
+        
+        # Keep most recent first
+        history_tasks = heapq.nlargest(limit, history_tasks + finished, key=sort_key)
     
     return {
         "user_id": user_id,
-        "tasks": history_tasks[:limit],
-        "total": len(history_tasks)
+        "tasks": serialize_document(history_tasks),
+        "total": total
     }
 
 # ==========================================
@@ -107,8 +135,7 @@ async def get_task_history(
 @router.get("/summary")
 async def get_activity_summary(
     current_user: dict = Depends(get_current_user),
-    history_repo: HistoryRepository = Depends(get_history_repo),
-    task_repo: TaskRepository = Depends(get_task_repo)
+    history_repo: HistoryRepository = Depends(get_history_repo)
 ):
     """
     Get activity summary
@@ -116,23 +143,13 @@ async def get_activity_summary(
     CRUD Permission: User reads their own activity summary
     
     Combines data from history and tasks collections
+    in a single aggregation (exact counts, one round trip)
     """
     user_id = current_user["user_id"]
     
-    # Get task stats
-    task_stats = await task_repo.get_completion_stats(user_id)
-    
-    # Get event counts by type
-    all_events = await history_repo.get_user_history(user_id, limit=1000)
-    
-    event_counts = {}
-    for event in all_events:
-        event_type = event.get("event_type", "other")
-        event_counts[event_type] = event_counts.get(event_type, 0) + 1
+    summary = await history_repo.get_activity_summary(user_id)
     
     return {
         "user_id": user_id,
-        "task_stats": task_stats,
-        "event_counts": event_counts,
-        "total_events": len(all_events)
+        **serialize_document(summary)
     }
\ No newline at end of file
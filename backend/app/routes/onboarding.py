@@ -19,11 +19,36 @@ from app.core.dependencies import (
     get_history_repo
 )
 from app.db.repositories import OnboardingRepository, UserRepository, HistoryRepository
-from datetime import datetime
+from app.db.projections import Projections
+from app.core.security import create_access_token
+from app.core.serialization import utcnow
+from app.services.snapshot_materializer import snapshot_materializer
 import uuid
 
 router = APIRouter(prefix="/onboarding", tags=["Onboarding"])
 
+# ==========================================
+# HELPERS
+# ==========================================
+
+async def _issue_fresh_token(
+    current_user: dict,
+    user_repo: UserRepository,
+    onboarding_completed: bool
+) -> str:
+    """
+    Issue a new access token after onboarding state changed
+    The previous token was revoked by the token_version bump
+    """
+    token_data = {
+        "sub": current_user["user_id"],
+        "email": current_user["email"],
+        "role": current_user["role"],
+        "onboarding_completed": onboarding_completed,
+        "token_version": await user_repo.get_token_version(current_user["user_id"])
+    }
+    return create_access_token(token_data)
+
 # ==========================================
 # STUDENT ONBOARDING ENDPOINT
 # ==========================================
@@ -45,9 +70,9 @@ async def complete_student_onboarding(
     1. Verify user is student role
     2. Check if onboarding already completed
     3. Save onboarding data to MongoDB
-    4. Mark user's onboarding as complete
+    4. Mark user's onboarding as complete (revokes old token)
     5. Log event in history
-    6. Return success
+    6. Return success with a fresh token
     """
     user_id = current_user["user_id"]
     user_role = current_user["role"]
@@ -60,7 +85,7 @@ async def complete_student_onboarding(
         )
     
     # Check if onboarding already completed
-    existing_profile = await onboarding_repo.get_profile(user_id)
+    existing_profile = await onboarding_repo.get_profile(user_id, Projections.EXISTS)
     if existing_profile:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -72,7 +97,7 @@ async def complete_student_onboarding(
         user_id=user_id,
         role="student",
         data=request.model_dump(),
-        completed_at=datetime.utcnow().isoformat()
+        completed_at=utcnow()
     )
     
     # Save to MongoDB
@@ -80,6 +105,7 @@ async def complete_student_onboarding(
     
     # Mark user's onboarding as complete
     await user_repo.mark_onboarding_complete(user_id)
+    snapshot_materializer.schedule(user_id)
     
     # Log onboarding completion in history
     history_data = HistoryDB(
@@ -93,7 +119,7 @@ async def complete_student_onboarding(
             "timeline": request.timeline,
             "blocker": request.blocker
         },
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utcnow()
     )
     await history_repo.log_event(history_data)
     
@@ -105,7 +131,8 @@ async def complete_student_onboarding(
         message="Student onboarding completed successfully",
         user_id=user_id,
         role=user_role,
-        onboarding_completed=True
+        onboarding_completed=True,
+        access_token=await _issue_fresh_token(current_user, user_repo, onboarding_completed=True)
     )
 
 # ==========================================
@@ -129,9 +156,9 @@ async def complete_professional_onboarding(
     1. Verify user is professional role
     2. Check if onboarding already completed
     3. Save onboarding data to MongoDB
-    4. Mark user's onboarding as complete
+    4. Mark user's onboarding as complete (revokes old token)
     5. Log event in history
-    6. Return success
+    6. Return success with a fresh token
     """
     user_id = current_user["user_id"]
     user_role = current_user["role"]
@@ -144,7 +171,7 @@ async def complete_professional_onboarding(
         )
     
     # Check if onboarding already completed
-    existing_profile = await onboarding_repo.get_profile(user_id)
+    existing_profile = await onboarding_repo.get_profile(user_id, Projections.EXISTS)
     if existing_profile:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -156,7 +183,7 @@ async def complete_professional_onboarding(
         user_id=user_id,
         role="professional",
         data=request.model_dump(),
-        completed_at=datetime.utcnow().isoformat()
+        completed_at=utcnow()
     )
     
     # Save to MongoDB
@@ -164,6 +191,7 @@ async def complete_professional_onboarding(
     
     # Mark user's onboarding as complete
     await user_repo.mark_onboarding_complete(user_id)
+    snapshot_materializer.schedule(user_id)
     
     # Log onboarding completion in history
     history_data = HistoryDB(
@@ -177,7 +205,7 @@ async def complete_professional_onboarding(
             "objective": request.objective,
             "blocker": request.blocker
         },
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utcnow()
     )
     await history_repo.log_event(history_data)
     
@@ -189,7 +217,8 @@ async def complete_professional_onboarding(
         message="Professional onboarding completed successfully",
         user_id=user_id,
         role=user_role,
-        onboarding_completed=True
+        onboarding_completed=True,
+        access_token=await _issue_fresh_token(current_user, user_repo, onboarding_completed=True)
     )
 
 # ==========================================
@@ -213,9 +242,9 @@ async def complete_company_onboarding(
     1. Verify user is company role
     2. Check if onboarding already completed
     3. Save onboarding data to MongoDB
-    4. Mark user's onboarding as complete
+    4. Mark user's onboarding as complete (revokes old token)
     5. Log event in history
-    6. Return success
+    6. Return success with a fresh token
     """
     user_id = current_user["user_id"]
     user_role = current_user["role"]
@@ -228,7 +257,7 @@ async def complete_company_onboarding(
         )
     
     # Check if onboarding already completed
-    existing_profile = await onboarding_repo.get_profile(user_id)
+    existing_profile = await onboarding_repo.get_profile(user_id, Projections.EXISTS)
     if existing_profile:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -240,7 +269,7 @@ async def complete_company_onboarding(
         user_id=user_id,
         role="company",
         data=request.model_dump(),
-        completed_at=datetime.utcnow().isoformat()
+        completed_at=utcnow()
     )
     
     # Save to MongoDB
@@ -248,6 +277,7 @@ async def complete_company_onboarding(
     
     # Mark user's onboarding as complete
     await user_repo.mark_onboarding_complete(user_id)
+    snapshot_materializer.schedule(user_id)
     
     # Log onboarding completion in history
     history_data = HistoryDB(
@@ -261,7 +291,7 @@ async def complete_company_onboarding(
             "hiring_goal": request.hiring_goal,
             "hiring_challenge": request.hiring_challenge
         },
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utcnow()
     )
     await history_repo.log_event(history_data)
     
@@ -273,7 +303,8 @@ async def complete_company_onboarding(
         message="Company onboarding completed successfully",
         user_id=user_id,
         role=user_role,
-        onboarding_completed=True
+        onboarding_completed=True,
+        access_token=await _issue_fresh_token(current_user, user_repo, onboarding_completed=True)
     )
 
 # ==========================================
@@ -296,7 +327,7 @@ async def get_onboarding_status(
     user_role = current_user["role"]
     
     # Get onboarding profile from MongoDB
-    profile = await onboarding_repo.get_profile(user_id)
+    profile = await onboarding_repo.get_profile(user_id, Projections.ONBOARDING_DATA)
     
     return OnboardingStatusResponse(
         user_id=user_id,
@@ -326,10 +357,8 @@ async def reset_onboarding(
     """
     user_id = current_user["user_id"]
     
-    # Delete onboarding profile from MongoDB
-    from app.core.database import get_database, Collections
-    db = get_database()
-    await db[Collections.ONBOARDING_PROFILES].delete_one({"user_id": user_id})
+    # Delete onboarding profile (and workspace snapshots) from MongoDB
+    await onboarding_repo.delete_profile(user_id)
     
     # Mark user's onboarding as incomplete
     await user_repo.update_user(user_id, {"onboarding_completed": False})
@@ -341,7 +370,7 @@ async def reset_onboarding(
         event_type="other",
         description="Onboarding reset",
         context={"action": "reset_onboarding"},
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utcnow()
     )
     await history_repo.log_event(history_data)
     
@@ -350,5 +379,6 @@ async def reset_onboarding(
     return {
         "success": True,
         "message": "Onboarding reset successfully",
-        "onboarding_completed": False
+        "onboarding_completed": False,
+        "access_token": await _issue_fresh_token(current_user, user_repo, onboarding_completed=False)
     }
\ No newline at end of file
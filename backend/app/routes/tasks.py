@@ -3,16 +3,20 @@ Task Management Routes
 System creates tasks, Users mark status
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from app.models.database import TaskDB, HistoryDB
 from app.core.dependencies import (
     get_current_user,
     get_task_repo,
     get_history_repo
 )
-from app.db.repositories import TaskRepository, HistoryRepository
-from pydantic import BaseModel
-from datetime import datetime
+from app.db.repositories import TaskRepository, HistoryRepository, TaskTransition
+from app.db.projections import Projections
+from pydantic import BaseModel, Field
+from pymongo.errors import DuplicateKeyError
+from typing import List, Literal
+from app.core.serialization import utcnow, parse_datetime, serialize_document
+from app.services.snapshot_materializer import snapshot_materializer
 import uuid
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
@@ -28,6 +32,14 @@ class SkipTaskRequest(BaseModel):
     task_id: str
     reason: str | None = None
 
+class BatchTaskOperation(BaseModel):
+    task_id: str
+    action: Literal["complete", "skip"]
+    reason: str | None = None
+
+class BatchTaskRequest(BaseModel):
+    operations: List[BatchTaskOperation] = Field(..., min_length=1, max_length=200)
+
 class CreateTaskRequest(BaseModel):
     """
     System-only request (not exposed to users)
@@ -50,29 +62,43 @@ async def get_user_tasks(
     current_user: dict = Depends(get_current_user),
     task_repo: TaskRepository = Depends(get_task_repo),
     date: str | None = None,
-    task_type: str | None = None
+    task_type: str | None = None,
+    limit: int = Query(100, ge=1, le=500, description="Page size"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page")
 ):
     """
-    Get current user's tasks
+    Get current user's tasks (keyset paginated, newest first)
     
     CRUD Permission: User reads their own tasks
     
     Query params:
     - date: Filter by assigned date (YYYY-MM-DD)
     - task_type: Filter by type (daily, skill, optional, micro)
+    - limit: Page size (default: 100)
+    - cursor: Continuation token; omit for the first page
     """
     user_id = current_user["user_id"]
     
-    tasks = await task_repo.get_user_tasks(
-        user_id=user_id,
-        date=date,
-        task_type=task_type
-    )
+    try:
+        tasks, next_cursor = await task_repo.get_user_tasks_page(
+            user_id=user_id,
+            limit=limit,
+            cursor=cursor,
+            date=date,
+            task_type=task_type,
+            projection=Projections.TASK_CARD
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     return {
         "user_id": user_id,
-        "tasks": tasks,
-        "total": len(tasks)
+        "tasks": serialize_document(tasks),
+        "total": len(tasks),
+        "next_cursor": next_cursor
     }
 
 # ==========================================
@@ -93,44 +119,34 @@ async def complete_task(
     System automatically logs completion in history
     
     Process:
-    1. Verify task belongs to user
-    2. Mark as completed in tasks collection
+    1. Mark as completed, guarded on owner + state (one round trip)
+    2. Map the outcome to an error if the guard failed
     3. Auto-log event in history collection
     4. Return success
     """
     user_id = current_user["user_id"]
     
-    # Get task to verify ownership
-    task = await task_repo.get_task_by_id(request.task_id)
-    if not task:
+    # Verify ownership + state and mark as completed atomically
+    outcome, task = await task_repo.complete_task(request.task_id, user_id)
+    
+    if outcome == TaskTransition.NOT_FOUND:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
     
-    # Verify ownership
-    if task["user_id"] != user_id:
+    if outcome == TaskTransition.FORBIDDEN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only complete your own tasks"
         )
     
-    # Check if already completed
-    if task.get("completed"):
+    if outcome == TaskTransition.ALREADY_COMPLETED:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Task already completed"
         )
     
-    # Mark as completed
-    success = await task_repo.complete_task(request.task_id, user_id)
-    
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to complete task"
-        )
-    
     # AUTO-LOG in history (System responsibility)
     history_data = HistoryDB(
         history_id=f"hist_{uuid.uuid4().hex[:12]}",
@@ -143,9 +159,10 @@ async def complete_task(
             "task_type": task["task_type"],
             "assigned_date": task["assigned_date"]
         },
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utcnow()
     )
     await history_repo.log_event(history_data)
+    snapshot_materializer.schedule(user_id)
     
     print(f"✅ Task completed: {task['title']} by {current_user['email']}")
     
@@ -173,50 +190,40 @@ async def skip_task(
     System automatically logs skip in history
     
     Process:
-    1. Verify task belongs to user
-    2. Mark as skipped in tasks collection
+    1. Mark as skipped, guarded on owner + state (one round trip)
+    2. Map the outcome to an error if the guard failed
     3. Auto-log event in history collection
     4. Return success
     """
     user_id = current_user["user_id"]
     
-    # Get task to verify ownership
-    task = await task_repo.get_task_by_id(request.task_id)
-    if not task:
+    # Verify ownership + state and mark as skipped atomically
+    outcome, task = await task_repo.skip_task(request.task_id, user_id, request.reason)
+    
+    if outcome == TaskTransition.NOT_FOUND:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
     
-    # Verify ownership
-    if task["user_id"] != user_id:
+    if outcome == TaskTransition.FORBIDDEN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only skip your own tasks"
         )
     
-    # Check if already completed or skipped
-    if task.get("completed"):
+    if outcome == TaskTransition.ALREADY_COMPLETED:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot skip completed task"
         )
     
-    if task.get("skipped"):
+    if outcome == TaskTransition.ALREADY_SKIPPED:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Task already skipped"
         )
     
-    # Mark as skipped
-    success = await task_repo.skip_task(request.task_id, user_id, request.reason)
-    
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to skip task"
-        )
-    
     # AUTO-LOG in history (System responsibility)
     history_data = HistoryDB(
         history_id=f"hist_{uuid.uuid4().hex[:12]}",
@@ -230,9 +237,10 @@ async def skip_task(
             "reason": request.reason,
             "assigned_date": task["assigned_date"]
         },
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utcnow()
     )
     await history_repo.log_event(history_data)
+    snapshot_materializer.schedule(user_id)
     
     print(f"⚠️ Task skipped: {task['title']} by {current_user['email']} (Reason: {request.reason})")
     
@@ -243,6 +251,80 @@ async def skip_task(
         "reason": request.reason
     }
 
+# ==========================================
+# BATCH COMPLETE / SKIP
+# ==========================================
+
+@router.post("/batch")
+async def batch_update_tasks(
+    request: BatchTaskRequest,
+    current_user: dict = Depends(get_current_user),
+    task_repo: TaskRepository = Depends(get_task_repo),
+    history_repo: HistoryRepository = Depends(get_history_repo)
+):
+    """
+    Complete or skip many tasks in one request
+    
+    CRUD Permission: User updates status of their own tasks
+    (same ownership rules as /complete and /skip, checked per item)
+    
+    Process:
+    1. Read all tasks once, plan guarded updates
+    2. Apply them in one unordered bulk_write
+    3. Log all history events together
+    4. Return per-item results (status "ok" or the reason it failed)
+    """
+    user_id = current_user["user_id"]
+    
+    results = await task_repo.apply_status_batch(
+        user_id,
+        [op.model_dump() for op in request.operations]
+    )
+    
+    # AUTO-LOG in history (System responsibility)
+    events = []
+    for result in results:
+        if result["status"] != TaskTransition.OK:
+            continue
+        
+        task = result["task"]
+        completed = result["action"] == "complete"
+        context = {
+            "task_id": task["task_id"],
+            "task_title": task["title"],
+            "task_type": task["task_type"],
+            "assigned_date": task["assigned_date"],
+            "batch": True
+        }
+        if not completed:
+            context["reason"] = result["reason"]
+        
+        events.append(HistoryDB(
+            history_id=f"hist_{uuid.uuid4().hex[:12]}",
+            user_id=user_id,
+            event_type="task_completed" if completed else "task_skipped",
+            description=f"{'Completed' if completed else 'Skipped'} task: {task['title']}",
+            context=context,
+            timestamp=utcnow()
+        ))
+    
+    if events:
+        await history_repo.log_events(events)
+        snapshot_materializer.schedule(user_id)
+    
+    applied = len(events)
+    print(f"📦 Batch task update: {applied}/{len(results)} applied by {current_user['email']}")
+    
+    return {
+        "success": applied == len(results),
+        "applied": applied,
+        "failed": len(results) - applied,
+        "results": [
+            {"task_id": r["task_id"], "action": r["action"], "status": r["status"]}
+            for r in results
+        ]
+    }
+
 # ==========================================
 # GET TASK STATS
 # ==========================================
@@ -293,6 +375,16 @@ async def create_task_system(
     # Generate task_id
     task_id = f"task_{uuid.uuid4().hex[:12]}"
     
+    # Dates are stored as native BSON dates
+    try:
+        assigned_date = parse_datetime(request.assigned_date)
+        due_date = parse_datetime(request.due_date)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="assigned_date and due_date must be ISO dates (YYYY-MM-DD)"
+        )
+    
     # Create task document
     task_data = TaskDB(
         task_id=task_id,
@@ -302,13 +394,20 @@ async def create_task_system(
         task_type=request.task_type,
         difficulty=request.difficulty,
         estimated_time=request.estimated_time,
-        assigned_date=request.assigned_date,
-        due_date=request.due_date,
+        assigned_date=assigned_date,
+        due_date=due_date,
         completed=False,
         skipped=False
     )
     
-    await task_repo.create_task(task_data)
+    try:
+        await task_repo.create_task(task_data)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A daily task already exists for this date"
+        )
+    snapshot_materializer.schedule(user_id)
     
     print(f"📝 Task created: {request.title} for {current_user['email']}")
     
@@ -316,5 +415,5 @@ async def create_task_system(
         "success": True,
         "message": "Task created successfully",
         "task_id": task_id,
-        "task": task_data.model_dump()
+        "task": serialize_document(task_data.model_dump())
     }
\ No newline at end of file
@@ -3,8 +3,8 @@ Workspace Routes
 Handles workspace data for all three roles with MongoDB persistence
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from app.models.workspace import WorkspaceDataResponse, ALLOWED_VIEWS
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Header, Response
+from app.models.workspace import WorkspaceDataResponse, WorkspaceMultiViewResponse, ALLOWED_VIEWS
 from app.services.workspace_service import WorkspaceService  # Use the class
 from app.core.dependencies import (
     get_current_user,
@@ -17,8 +17,15 @@ from app.db.repositories import (
     UserRepository,
     OnboardingRepository,
     TaskRepository,
-    HistoryRepository
+    HistoryRepository,
+    WorkspaceSnapshotRepository
 )
+from app.services.view_registry import snapshot_views
+from app.db.projections import Projections
+from app.core.cache import workspace_cache, compute_etag, etag_matches
+from app.core.config import settings
+from app.core.serialization import utcnow
+from typing import Union
 
 router = APIRouter(prefix="/workspace", tags=["Workspace"])
 
@@ -26,9 +33,12 @@ router = APIRouter(prefix="/workspace", tags=["Workspace"])
 # SINGLE WORKSPACE ENDPOINT (OPTION A)
 # ==========================================
 
-@router.get("", response_model=WorkspaceDataResponse)
+@router.get("", response_model=Union[WorkspaceDataResponse, WorkspaceMultiViewResponse])
 async def get_workspace(
-    view: str = Query(..., description="Workspace view to load (overview, career, focus, etc.)"),
+    response: Response,
+    view: str | None = Query(None, description="Workspace view to load (overview, career, focus, etc.)"),
+    views: str | None = Query(None, description="Comma-separated views to load together (overview,focus)"),
+    if_none_match: str | None = Header(None),
     current_user: dict = Depends(get_current_user),
     user_repo: UserRepository = Depends(get_user_repo),
     onboarding_repo: OnboardingRepository = Depends(get_onboarding_repo),
@@ -39,7 +49,7 @@ async def get_workspace(
     Get workspace data for specific view
     
     NOW WITH DATABASE LOGIC:
-    1. Reads onboarding profile from MongoDB
+    1. Reads onboarding profile from MongoDB (user comes from identity cache)
     2. Reads user's tasks from MongoDB
     3. Reads recent history from MongoDB
     4. Decides what to show based on real state
@@ -50,42 +60,52 @@ async def get_workspace(
     - GET /api/workspace?view=overview
     - GET /api/workspace?view=career
     - GET /api/workspace?view=focus
+    - GET /api/workspace?views=overview,focus (one data load, {"views": {...}})
+    
+    Responses carry a strong ETag and are cached per (user, views, day,
+    data version); any task/onboarding/history write bumps the version
+    (stored on user_stats, so all workers agree). Polling with
+    If-None-Match gets a 304 after a single indexed version read.
+    
+    With WORKSPACE_SNAPSHOTS on, views are served from workspace_snapshots
+    (one indexed read) and computed live when a snapshot is missing/stale.
     """
     user_id = current_user["user_id"]
     user_role = current_user["role"]
     
-    # Get user from MongoDB
-    user = await user_repo.get_user_by_id(user_id)
-    if not user:
+    if bool(view) == bool(views):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass exactly one of 'view' or 'views'"
         )
     
-    # Check if onboarding is complete
-    if not user.get("onboarding_completed", False):
+    requested = [view] if view else list(dict.fromkeys(v.strip() for v in views.split(",") if v.strip()))
+    
+    # Check if onboarding is complete (current_user is already fresh)
+    if not current_user["onboarding_completed"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Please complete onboarding first"
         )
     
-    # Validate view is allowed for role
+    # Validate views are allowed for role
     allowed_views = ALLOWED_VIEWS.get(user_role, [])
-    if view not in allowed_views:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"View '{view}' not allowed for role '{user_role}'. Allowed views: {allowed_views}"
-        )
+    for name in requested:
+        if name not in allowed_views:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"View '{name}' not allowed for role '{user_role}'. Allowed views: {allowed_views}"
+            )
     
-    # Get onboarding profile from MongoDB
-    onboarding_profile = await onboarding_repo.get_profile(user_id)
-    if not onboarding_profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Onboarding profile not found"
-        )
-    
-    onboarding_data = onboarding_profile.get("data", {})
+    # Versioned response cache (a hit costs one indexed user_stats read)
+    caching = settings.WORKSPACE_CACHE_TTL_SECONDS > 0
+    version = await task_repo.user_stats.get_data_version(user_id) if caching else None
+    today = utcnow().date().isoformat()
+    cache_key = (user_id, user_role, tuple(requested), today, version)
+    cached = workspace_cache.get(cache_key) if caching else None
+    if cached is not None:
+        etag, payload = cached
+        return _respond(response, payload, etag, if_none_match, "cache;desc=hit")
     
     # Initialize workspace service with repositories
     workspace_service = WorkspaceService(
@@ -95,18 +115,46 @@ async def get_workspace(
         history_repo=history_repo
     )
     
-    # Call service layer with DATABASE LOGIC
+    # Precomputed snapshots (served only if every requested view is fresh)
+    snapshot_docs = None
+    kept = snapshot_views(user_role, requested)
+    if settings.WORKSPACE_SNAPSHOTS and kept:
+        snapshot_docs = await workspace_service.snapshots.get_views(user_id, kept)
+        fresh = WorkspaceSnapshotRepository.fresh_payloads(snapshot_docs, user_role, requested, today)
+        if fresh is not None:
+            print(f"✅ Workspace snapshot served: {user_role}/{','.join(requested)} for {current_user['email']}")
+            return _serve(response, cache_key if caching else None, user_role, view, fresh, if_none_match, "snapshot;desc=hit")
+    
+    # Get onboarding profile from MongoDB
+    onboarding_profile = await onboarding_repo.get_profile(user_id, Projections.ONBOARDING_DATA)
+    if not onboarding_profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Onboarding profile not found"
+        )
+    
+    onboarding_data = onboarding_profile.get("data", {})
+    
+    # Call service layer with DATABASE LOGIC (saves snapshots when enabled)
     try:
-        workspace_data = await workspace_service.get_workspace_data(
+        workspace_data, _ = await workspace_service.materialize_views(
             user_id=user_id,
             role=user_role,
-            view=view,
-            onboarding_data=onboarding_data
+            views=requested,
+            onboarding_data=onboarding_data,
+            snapshot_docs=snapshot_docs
         )
         
-        print(f"✅ Workspace data served: {user_role}/{view} for {user['email']}")
+        print(f"✅ Workspace data served: {user_role}/{','.join(requested)} for {current_user['email']}")
         
-        return workspace_data
+        # Only cache if no write landed while building (e.g. the daily task)
+        unchanged = caching and await task_repo.user_stats.get_data_version(user_id) == version
+        
+        # Per-stage timings (independent reads run concurrently)
+        return _serve(
+            response, cache_key if unchanged else None, user_role, view, workspace_data,
+            if_none_match, workspace_service.timings.server_timing()
+        )
     
     except ValueError as e:
         raise HTTPException(
@@ -122,6 +170,44 @@ async def get_workspace(
             detail="Failed to generate workspace data"
         )
 
+def _serve(
+    response: Response,
+    cache_key: tuple | None,
+    role: str,
+    view: str | None,
+    workspace_data: dict,
+    if_none_match: str | None,
+    server_timing: str
+):
+    """
+    Shape the payload (single view or {"views": ...}), cache it and respond
+    cache_key is None when the result must not be cached
+    """
+    payload = workspace_data[view] if view else {"role": role, "views": workspace_data}
+    etag = compute_etag(payload)
+    
+    if cache_key is not None:
+        workspace_cache.set(cache_key, (etag, payload))
+    
+    return _respond(response, payload, etag, if_none_match, server_timing)
+
+def _respond(response: Response, payload: dict, etag: str, if_none_match: str | None, server_timing: str):
+    """
+    Attach validators and timings
+    304 with no body when the client already has this version
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Server-Timing": server_timing
+    }
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return payload
+
 # ==========================================
 # GET ALLOWED VIEWS FOR CURRENT USER
 # ==========================================
@@ -145,29 +231,19 @@ async def get_allowed_views(current_user: dict = Depends(get_current_user)):
 # ==========================================
 
 @router.get("/info")
-async def get_workspace_info(
-    current_user: dict = Depends(get_current_user),
-    user_repo: UserRepository = Depends(get_user_repo)
-):
+async def get_workspace_info(current_user: dict = Depends(get_current_user)):
     """
     Get basic workspace information
     Returns role, onboarding status, and allowed views
     """
     user_id = current_user["user_id"]
     user_role = current_user["role"]
-    
-    # Get fresh user data from MongoDB
-    user = await user_repo.get_user_by_id(user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+    onboarding_completed = current_user["onboarding_completed"]
     
     return {
         "user_id": user_id,
         "role": user_role,
-        "onboarding_completed": user.get("onboarding_completed", False),
+        "onboarding_completed": onboarding_completed,
         "allowed_views": ALLOWED_VIEWS.get(user_role, []),
-        "workspace_ready": user.get("onboarding_completed", False)
+        "workspace_ready": onboarding_completed
     }
\ No newline at end of file
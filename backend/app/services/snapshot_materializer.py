@@ -0,0 +1,156 @@
+"""
+Workspace Snapshot Materializer
+Rebuilds a user's workspace_snapshots in the background after writes
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.db.repositories import (
+    UserRepository,
+    OnboardingRepository,
+    TaskRepository,
+    HistoryRepository
+)
+from app.db.projections import Projections
+from app.services.view_registry import snapshot_views
+from typing import Any, Dict, Optional, Set
+import asyncio
+
+# ==========================================
+# SNAPSHOT MATERIALIZER
+# ==========================================
+
+class SnapshotMaterializer:
+    """
+    Event-driven snapshot rebuilds
+
+    - Routes call schedule(user_id) after task/onboarding writes
+      (the repositories have already marked the snapshots stale)
+    - Writes for the same user within `debounce` share one rebuild
+    - All of the role's snapshot views are built from one data load
+    - At most `max_concurrency` users are rebuilt at once
+
+    Best effort: a missed or failed rebuild only means the next
+    /workspace read computes live and saves the snapshot itself.
+    """
+
+    def __init__(self, debounce: float, max_concurrency: int = 4, max_attempts: int = 2):
+        self.debounce = debounce
+        self.max_attempts = max_attempts
+
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.scheduled = 0
+        self.coalesced = 0
+        self.rebuilds = 0
+        self.saved = 0
+        self.failures = 0
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Enable background rebuilds"""
+        self._db = db
+        print("✅ Snapshot materializer started")
+
+    async def stop(self):
+        """Cancel outstanding rebuilds (reads fall back to live computation)"""
+        self._db = None
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._pending.clear()
+
+    def schedule(self, user_id: str):
+        """Queue a rebuild for this user (no-op when snapshots are off)"""
+        if self._db is None or not settings.WORKSPACE_SNAPSHOTS:
+            return
+
+        if user_id in self._pending:
+            self.coalesced += 1
+            return
+
+        self._pending.add(user_id)
+        self.scheduled += 1
+        task = asyncio.create_task(self._rebuild_later(user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _rebuild_later(self, user_id: str):
+        """Wait out the debounce window, then rebuild"""
+        await asyncio.sleep(self.debounce)
+
+        # Writes from here on schedule a fresh rebuild
+        self._pending.discard(user_id)
+
+        async with self._semaphore:
+            try:
+                await self.rebuild(user_id)
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️  Snapshot rebuild failed for {user_id}: {e}")
+
+    async def rebuild(self, user_id: str) -> int:
+        """
+        Build and save every snapshot view for the user's role
+        
+        Render only: no daily task is created and no insight logged, so a
+        view that would need today's daily task is left for the next live
+        read. Retried once if a write moved the generation mid-build.
+        Returns snapshots saved.
+        """
+        from app.services.workspace_service import WorkspaceService
+
+        db = self._db
+        if db is None:
+            return 0
+
+        user_repo = UserRepository(db)
+        onboarding_repo = OnboardingRepository(db)
+
+        user = await user_repo.get_cached_user(user_id)
+        if not user or not user.get("onboarding_completed"):
+            return 0
+
+        profile = await onboarding_repo.get_profile(user_id, Projections.ONBOARDING_DATA)
+        views = snapshot_views(user["role"])
+        if not profile or not views:
+            return 0
+
+        service = WorkspaceService(
+            user_repo=user_repo,
+            onboarding_repo=onboarding_repo,
+            task_repo=TaskRepository(db),
+            history_repo=HistoryRepository(db)
+        )
+
+        saved = 0
+        for _ in range(self.max_attempts):
+            _, saved = await service.materialize_views(
+                user_id, user["role"], views, profile.get("data", {}), render_only=True
+            )
+            if saved == len(views) - len(service.deferred):
+                break
+
+        self.rebuilds += 1
+        self.saved += saved
+        return saved
+
+    def stats(self) -> Dict[str, Any]:
+        """Materializer metrics"""
+        return {
+            "enabled": settings.WORKSPACE_SNAPSHOTS and self._db is not None,
+            "pending": len(self._pending),
+            "running": len(self._tasks),
+            "scheduled": self.scheduled,
+            "coalesced": self.coalesced,
+            "rebuilds": self.rebuilds,
+            "saved": self.saved,
+            "failures": self.failures
+        }
+
+snapshot_materializer = SnapshotMaterializer(
+    debounce=settings.WORKSPACE_SNAPSHOT_DEBOUNCE_MS / 1000
+)
@@ -0,0 +1,253 @@
+"""
+Workspace View Registry
+Declares every view per role, the builder that renders it and the
+datasets it reads, plus the loader that fetches those datasets once
+"""
+
+from app.models.workspace import ALLOWED_VIEWS
+from app.db.repositories import TaskRepository, HistoryRepository
+from app.db.projections import Projections
+from app.core.config import settings
+from app.core.serialization import utcnow
+from app.core.timing import StageTimings
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# ==========================================
+# DATASETS
+# ==========================================
+
+class Dataset:
+    """Named pieces of data a view can depend on"""
+    TASKS_TODAY = "tasks_today"  # Today's task cards
+    STATS = "stats"  # Completion stats
+    RECENT_COMPLETIONS = "recent_completions"  # task_completed events, last 7 days
+    RECENT_TASK_COUNTS = "recent_task_counts"  # Status counts, tasks assigned in last 7 days
+    SKILL_TASKS = "skill_tasks"  # Skill task cards
+    COMPLETED_TASKS = "completed_tasks"  # Completed task cards
+    EVENTS_PAGE = "events_page"  # First page of history rows + next cursor
+    INSIGHTS = "insights"  # Pipoo insight ring
+
+RECENT_DAYS = 7
+EVENTS_PAGE_SIZE = 50
+
+# ==========================================
+# VIEW SPECS
+# ==========================================
+
+class ViewSpec:
+    """
+    One workspace view
+    
+    builder: WorkspaceService method name, called as builder(ctx)
+    datasets: what the builder reads from ctx.data
+    snapshot: kept in workspace_snapshots (False for views that change
+              on every history event, which are always computed live)
+    """
+    
+    def __init__(self, builder: str, datasets: Tuple[str, ...] = (), snapshot: bool = True):
+        self.builder = builder
+        self.datasets = datasets
+        self.snapshot = snapshot
+
+_HISTORY_DATASETS = (Dataset.EVENTS_PAGE, Dataset.COMPLETED_TASKS, Dataset.INSIGHTS)
+
+VIEW_REGISTRY: Dict[str, Dict[str, ViewSpec]] = {
+    "student": {
+        "overview": ViewSpec("_student_overview", (Dataset.TASKS_TODAY, Dataset.STATS, Dataset.RECENT_COMPLETIONS)),
+        "career": ViewSpec("_student_career"),
+        "focus": ViewSpec("_student_focus", (Dataset.RECENT_TASK_COUNTS,)),
+        "skillproof": ViewSpec("_student_skill", (Dataset.SKILL_TASKS,)),
+        "history": ViewSpec("_student_history", _HISTORY_DATASETS, snapshot=False)
+    },
+    "professional": {
+        "overview": ViewSpec("_professional_overview", (Dataset.TASKS_TODAY, Dataset.STATS)),
+        "direction": ViewSpec("_professional_direction"),
+        "focus": ViewSpec("_professional_focus", (Dataset.RECENT_TASK_COUNTS,)),
+        "skilledge": ViewSpec("_professional_skill_edge", (Dataset.SKILL_TASKS,)),
+        "history": ViewSpec("_professional_history", _HISTORY_DATASETS, snapshot=False)
+    },
+    "company": {
+        view: ViewSpec("_company_placeholder", snapshot=False)
+        for view in ["dashboard", "candidates", "skillproof", "reports", "history"]
+    }
+}
+
+# ALLOWED_VIEWS is the frontend contract; fail at import if they drift apart
+for _role, _views in ALLOWED_VIEWS.items():
+    if list(VIEW_REGISTRY.get(_role, {})) != _views:
+        raise RuntimeError(f"VIEW_REGISTRY[{_role!r}] does not match ALLOWED_VIEWS: {_views}")
+
+def get_view_spec(role: str, view: str) -> ViewSpec:
+    """Look up a view; ValueError if the role or view is unknown"""
+    if role not in VIEW_REGISTRY:
+        raise ValueError(f"Unknown role: {role}")
+    if view not in VIEW_REGISTRY[role]:
+        raise ValueError(f"Unknown view: {view}")
+    return VIEW_REGISTRY[role][view]
+
+def snapshot_views(role: str, views: Optional[List[str]] = None) -> List[str]:
+    """Views (all of the role's by default) kept in workspace_snapshots"""
+    specs = VIEW_REGISTRY.get(role, {})
+    return [view for view in (views or list(specs)) if view in specs and specs[view].snapshot]
+
+# ==========================================
+# VIEW CONTEXT
+# ==========================================
+
+class ViewContext:
+    """
+    Everything a view builder gets: who, which view, and loaded data
+    
+    render_only: build from the loaded data without writing (no daily
+    task creation, no insight logging); a builder that needed a write
+    sets deferred so the result isn't stored as a snapshot
+    """
+    
+    def __init__(
+        self,
+        user_id: str,
+        role: str,
+        view: str,
+        onboarding_data: dict,
+        data: Dict[str, Any],
+        render_only: bool = False
+    ):
+        self.user_id = user_id
+        self.role = role
+        self.view = view
+        self.onboarding_data = onboarding_data
+        self.data = data  # Shared by every view in the request
+        self.render_only = render_only
+        self.deferred = False
+
+# ==========================================
+# DATA LOADER
+# ==========================================
+
+_TASK_SIDE = {
+    Dataset.TASKS_TODAY,
+    Dataset.STATS,
+    Dataset.RECENT_TASK_COUNTS,
+    Dataset.SKILL_TASKS,
+    Dataset.COMPLETED_TASKS
+}
+_HISTORY_SIDE = {Dataset.RECENT_COMPLETIONS, Dataset.EVENTS_PAGE}
+
+class ViewDataLoader:
+    """
+    Fetches the union of datasets for one or more views, once
+    
+    - Each dataset is loaded at most once per request, however many
+      views need it
+    - Independent fetches run concurrently (stage timings recorded)
+    - With WORKSPACE_FACET_LOADER, all task-side datasets come from one
+      $facet on tasks; history-side ones stay indexed reads (run
+      concurrently) because $facet can't use an index to sort
+    """
+    
+    def __init__(
+        self,
+        task_repo: TaskRepository,
+        history_repo: HistoryRepository,
+        timings: StageTimings
+    ):
+        self.task_repo = task_repo
+        self.history_repo = history_repo
+        self.timings = timings
+    
+    @staticmethod
+    def datasets_for(specs: Iterable[ViewSpec]) -> set:
+        """Deduplicated datasets for a set of views"""
+        return {dataset for spec in specs for dataset in spec.datasets}
+    
+    async def load(self, user_id: str, datasets: set) -> Dict[str, Any]:
+        """Fetch every dataset in one concurrent pass"""
+        if not datasets:
+            return {}
+        
+        if settings.WORKSPACE_FACET_LOADER:
+            return await self._load_batched(user_id, datasets)
+        return await self._load_per_query(user_id, datasets)
+    
+    async def _load_per_query(self, user_id: str, datasets: set) -> Dict[str, Any]:
+        """One query per dataset, all in flight together"""
+        today = utcnow().date().isoformat()
+        fetchers = {
+            Dataset.TASKS_TODAY: lambda: self.task_repo.get_user_tasks(
+                user_id=user_id,
+                date=today,
+                projection=Projections.TASK_CARD
+            ),
+            Dataset.STATS: lambda: self.task_repo.get_completion_stats(user_id),
+            Dataset.RECENT_COMPLETIONS: lambda: self.history_repo.count_recent_events(
+                user_id=user_id,
+                event_type="task_completed",
+                days=RECENT_DAYS
+            ),
+            Dataset.RECENT_TASK_COUNTS: lambda: self.task_repo.load_view_data(user_id, recent_days=RECENT_DAYS),
+            Dataset.SKILL_TASKS: lambda: self.task_repo.get_user_tasks(
+                user_id=user_id,
+                task_type="skill",
+                projection=Projections.TASK_CARD
+            ),
+            Dataset.COMPLETED_TASKS: lambda: self.task_repo.get_completed_tasks(
+                user_id,
+                projection=Projections.TASK_CARD
+            ),
+            Dataset.EVENTS_PAGE: lambda: self.history_repo.get_history_page(
+                user_id,
+                limit=EVENTS_PAGE_SIZE,
+                projection=Projections.HISTORY_ROW
+            ),
+            Dataset.INSIGHTS: lambda: self.history_repo.insights.get_recent_insights(user_id)
+        }
+        
+        data = await self.timings.gather(**{name: fetchers[name]() for name in sorted(datasets)})
+        
+        if Dataset.RECENT_TASK_COUNTS in data:
+            data[Dataset.RECENT_TASK_COUNTS] = data[Dataset.RECENT_TASK_COUNTS]["recent"]
+        if Dataset.EVENTS_PAGE in data:
+            events, next_cursor = data[Dataset.EVENTS_PAGE]
+            data[Dataset.EVENTS_PAGE] = {"events": events, "next_cursor": next_cursor}
+        return data
+    
+    async def _load_batched(self, user_id: str, datasets: set) -> Dict[str, Any]:
+        """One $facet on tasks, indexed history reads, plus the insight ring"""
+        stages = {}
+        
+        if datasets & _TASK_SIDE:
+            stages["tasks_facet"] = self.task_repo.load_view_data(
+                user_id,
+                today=utcnow().date().isoformat() if Dataset.TASKS_TODAY in datasets else None,
+                recent_days=RECENT_DAYS if Dataset.RECENT_TASK_COUNTS in datasets else None,
+                include_stats=Dataset.STATS in datasets,
+                include_completed=Dataset.COMPLETED_TASKS in datasets,
+                task_type="skill" if Dataset.SKILL_TASKS in datasets else None
+            )
+        
+        if datasets & _HISTORY_SIDE:
+            stages["history_reads"] = self.history_repo.load_view_data(
+                user_id,
+                events_limit=EVENTS_PAGE_SIZE if Dataset.EVENTS_PAGE in datasets else None,
+                recent_event_type="task_completed" if Dataset.RECENT_COMPLETIONS in datasets else None,
+                recent_days=RECENT_DAYS
+            )
+        
+        if Dataset.INSIGHTS in datasets:
+            stages["insights"] = self.history_repo.insights.get_recent_insights(user_id)
+        
+        reads = await self.timings.gather(**stages)
+        tasks = reads.get("tasks_facet", {})
+        history = reads.get("history_reads", {})
+        
+        mapping: List[Tuple[str, Any]] = [
+            (Dataset.TASKS_TODAY, lambda: tasks["today_tasks"]),
+            (Dataset.STATS, lambda: tasks["stats"]),
+            (Dataset.RECENT_TASK_COUNTS, lambda: tasks["recent"]),
+            (Dataset.SKILL_TASKS, lambda: tasks["typed_tasks"]),
+            (Dataset.COMPLETED_TASKS, lambda: tasks["completed_tasks"]),
+            (Dataset.RECENT_COMPLETIONS, lambda: history["recent_count"]),
+            (Dataset.EVENTS_PAGE, lambda: {"events": history["events"], "next_cursor": history["events_next_cursor"]}),
+            (Dataset.INSIGHTS, lambda: reads["insights"])
+        ]
+        return {name: value() for name, value in mapping if name in datasets}
@@ -9,9 +9,14 @@ from app.db.repositories import (
     UserRepository,
     OnboardingRepository,
     TaskRepository,
-    HistoryRepository
+    HistoryRepository,
+    WorkspaceSnapshotRepository
 )
-from datetime import datetime, timedelta
+from app.core.config import settings
+from app.core.serialization import utcnow, parse_datetime, to_iso, serialize_document
+from app.core.timing import StageTimings, view_timings
+from app.services.view_registry import ViewContext, ViewDataLoader, get_view_spec, snapshot_views
+from typing import Any, Dict, List, Optional, Tuple
 import uuid
 
 # ==========================================
@@ -34,6 +39,9 @@ class WorkspaceService:
         self.onboarding_repo = onboarding_repo
         self.task_repo = task_repo
         self.history_repo = history_repo
+        self.snapshots = WorkspaceSnapshotRepository(task_repo.db)
+        self.timings = StageTimings()
+        self.deferred = set()
     
     async def get_workspace_data(
         self,
@@ -45,109 +53,144 @@ class WorkspaceService:
         """
         Generate workspace data based on role and view
         Uses real database state instead of mock data
-        """
         
-        if role == "student":
-            return await self._get_student_workspace(user_id, view, onboarding_data)
-        elif role == "professional":
-            return await self._get_professional_workspace(user_id, view, onboarding_data)
-        elif role == "company":
-            return await self._get_company_workspace(user_id, view, onboarding_data)
-        else:
-            raise ValueError(f"Unknown role: {role}")
-    
-    # ==========================================
-    # STUDENT WORKSPACE
-    # ==========================================
+        Stage timings for this call are left in self.timings
+        """
+        views = await self.get_workspace_views(user_id, role, [view], onboarding_data)
+        return views[view]
     
-    async def _get_student_workspace(
+    async def get_workspace_views(
         self,
         user_id: str,
-        view: str,
-        onboarding_data: dict
-    ) -> dict:
+        role: str,
+        views: List[str],
+        onboarding_data: dict,
+        render_only: bool = False
+    ) -> Dict[str, dict]:
         """
-        Generate student workspace data
+        Generate several views from one data pass
+        
+        1. Look up each view in VIEW_REGISTRY (ValueError if unknown)
+        2. Load the union of their datasets once (ViewDataLoader)
+        3. Run each view's builder on the shared data
+        
+        render_only skips builder side effects (see ViewContext)
+        Returns {view: workspace data}; timings are left in self.timings
+        and views that needed a skipped write in self.deferred
+        """
+        self.timings = StageTimings()
+        self.deferred = set()
+        specs = {view: get_view_spec(role, view) for view in views}
+        
+        loader = ViewDataLoader(self.task_repo, self.history_repo, self.timings)
+        data = await loader.load(user_id, loader.datasets_for(specs.values()))
+        
+        results = {}
+        for view, spec in specs.items():
+            ctx = ViewContext(user_id, role, view, onboarding_data, data, render_only)
+            results[view] = await getattr(self, spec.builder)(ctx)
+            if ctx.deferred:
+                self.deferred.add(view)
+        
+        view_timings.record(f"{role}/{'+'.join(views)}", self.timings)
+        return results
+    
+    async def materialize_views(
+        self,
+        user_id: str,
+        role: str,
+        views: List[str],
+        onboarding_data: dict,
+        snapshot_docs: Optional[Dict[str, Dict[str, Any]]] = None,
+        render_only: bool = False
+    ) -> Tuple[Dict[str, dict], int]:
         """
+        Compute views live and store snapshots for those kept in
+        workspace_snapshots
         
-        if view == "overview":
-            return await self._student_overview(user_id, onboarding_data)
-        elif view == "career":
-            return await self._student_career(user_id, onboarding_data)
-        elif view == "focus":
-            return await self._student_focus(user_id, onboarding_data)
-        elif view == "skill":
-            return await self._student_skill(user_id, onboarding_data)
-        elif view == "history":
-            return await self._student_history(user_id)
-        else:
-            raise ValueError(f"Unknown view: {view}")
+        snapshot_docs: the caller's get_views() result, if it has one
+        render_only: background rebuilds; views that would have needed a
+        write (e.g. today's daily task) are left for the next live read
+        Returns (workspace data per view, snapshots saved)
+        """
+        if not settings.WORKSPACE_SNAPSHOTS:
+            return await self.get_workspace_views(user_id, role, views, onboarding_data, render_only), 0
+        
+        kept = snapshot_views(role, views)
+        if snapshot_docs is None:
+            snapshot_docs = await self.snapshots.get_views(user_id, kept)
+        
+        # Generations are read before building; a write mid-build bumps them
+        await self.snapshots.claim(user_id, [view for view in kept if view not in snapshot_docs])
+        generations = {view: snapshot_docs.get(view, {}).get("generation", 0) for view in kept}
+        day = utcnow().date().isoformat()
+        
+        results = await self.get_workspace_views(user_id, role, views, onboarding_data, render_only)
+        saved = await self.timings.run("save_snapshots", self.snapshots.save(
+            user_id, role, day, {view: results[view] for view in kept if view not in self.deferred}, generations
+        ))
+        return results, saved
     
-    async def _student_overview(self, user_id: str, onboarding_data: dict) -> dict:
+    # ==========================================
+    # STUDENT WORKSPACE
+    # ==========================================
+    
+    async def _student_overview(self, ctx: ViewContext) -> dict:
         """
         Student Overview - Daily dashboard
         
         Logic:
-        1. Read today's tasks from database
-        2. If no tasks exist, create one based on onboarding
-        3. Check recent completion pattern
-        4. Generate Pipoo message based on state
-        5. Log insight
-        """
+        1. If no tasks exist today, create one based on onboarding
+           (and re-read stats, which now include it)
+        2. Render from the loaded data (_render_student_overview)
+        3. Log insight
         
-        # Get today's date
-        today = datetime.utcnow().date().isoformat()
-        
-        # Read today's tasks
-        today_tasks = await self.task_repo.get_user_tasks(
-            user_id=user_id,
-            date=today
-        )
-        
-        # If no tasks for today, create one
-        if not today_tasks:
-            task = await self._create_daily_task(user_id, onboarding_data, today)
-            today_tasks = [task]
-        
-        # Get completion stats
-        stats = await self.task_repo.get_completion_stats(user_id)
-        
-        # Get recent history (last 7 days)
-        recent_events = await self.history_repo.get_recent_events(
-            user_id=user_id,
-            event_type="task_completed",
-            days=7
-        )
+        Steps 1 and 3 are skipped when ctx.render_only
+        """
+        await self._ensure_daily_task(ctx)
+        workspace = self._render_student_overview(ctx)
+        
+        if not ctx.render_only:
+            # Log this insight (Pipoo's message)
+            await self.timings.run("log_insight", self._log_pipoo_insight(
+                user_id=ctx.user_id,
+                view="overview",
+                message=workspace["pipoo"]["message"],
+                context={"stats": ctx.data["stats"], "tasks_today": len(ctx.data["tasks_today"])}
+            ))
+        
+        return workspace
+    
+    def _render_student_overview(self, ctx: ViewContext) -> dict:
+        """
+        Student overview payload from loaded data only (no writes)
+        Today's tasks, completion stats, recent completions + Pipoo message
+        """
+        today_tasks = ctx.data["tasks_today"]
+        stats = ctx.data["stats"]
+        recent_completions = ctx.data["recent_completions"]
         
         # Decide Pipoo message based on state
         pipoo_message = self._generate_student_overview_message(
-            onboarding_data=onboarding_data,
+            onboarding_data=ctx.onboarding_data,
             stats=stats,
-            recent_completions=len(recent_events)
-        )
-        
-        # Log this insight (Pipoo's message)
-        await self._log_pipoo_insight(
-            user_id=user_id,
-            view="overview",
-            message=pipoo_message,
-            context={"stats": stats, "tasks_today": len(today_tasks)}
+            recent_completions=recent_completions
         )
         
         return {
-            "role": "student",
-            "view": "overview",
+            "role": ctx.role,
+            "view": ctx.view,
             "pipoo": {
                 "message": pipoo_message
             },
             "data": {
                 "tasks": [self._format_task(t) for t in today_tasks],
                 "stats": stats,
-                "streak": len(recent_events)
+                "streak": recent_completions
             }
         }
     
-    async def _student_career(self, user_id: str, onboarding_data: dict) -> dict:
+    async def _student_career(self, ctx: ViewContext) -> dict:
         """
         Student Career View - Career guidance
         
@@ -156,6 +199,7 @@ class WorkspaceService:
         2. Generate honest assessment
         3. Show skill gaps (logic-based, not AI yet)
         """
+        onboarding_data = ctx.onboarding_data
         
         goal = onboarding_data.get("goal", "job-ready")
         timeline = onboarding_data.get("timeline", "6-12m")
@@ -176,8 +220,8 @@ class WorkspaceService:
         skill_gaps = self._analyze_skill_gaps(skills, target_role)
         
         return {
-            "role": "student",
-            "view": "career",
+            "role": ctx.role,
+            "view": ctx.view,
             "pipoo": {
                 "message": pipoo_message
             },
@@ -190,7 +234,7 @@ class WorkspaceService:
             }
         }
     
-    async def _student_focus(self, user_id: str, onboarding_data: dict) -> dict:
+    async def _student_focus(self, ctx: ViewContext) -> dict:
         """
         Student Focus View - Accountability check
         
@@ -200,59 +244,50 @@ class WorkspaceService:
         3. Adjust scope if needed
         """
         
-        # Get last 7 days of tasks
-        all_tasks = await self.task_repo.get_user_tasks(user_id=user_id)
-        recent_tasks = [
-            t for t in all_tasks
-            if self._is_recent(t.get("assigned_date"), days=7)
-        ]
-        
-        completed = [t for t in recent_tasks if t.get("completed")]
-        skipped = [t for t in recent_tasks if t.get("skipped")]
-        pending = [t for t in recent_tasks if not t.get("completed") and not t.get("skipped")]
+        # Counts for the last 7 days of tasks
+        counts = ctx.data["recent_task_counts"]
+        completed = counts["completed"]
+        skipped = counts["skipped"]
+        pending = counts["pending"]
         
-        blocker = onboarding_data.get("blocker", "unknown")
+        blocker = ctx.onboarding_data.get("blocker", "unknown")
         
         # Generate focus message
-        if len(skipped) > 3:
-            pipoo_message = f"You've skipped {len(skipped)} tasks this week. "
+        if skipped > 3:
+            pipoo_message = f"You've skipped {skipped} tasks this week. "
             pipoo_message += "Let's reduce scope. Doing 1 thing well beats planning 5 and doing 0."
-        elif len(completed) >= 5:
-            pipoo_message = f"Strong week. {len(completed)} tasks completed. Keep this momentum."
-        elif len(pending) > 5:
+        elif completed >= 5:
+            pipoo_message = f"Strong week. {completed} tasks completed. Keep this momentum."
+        elif pending > 5:
             pipoo_message = "You have many pending tasks. Let's be honest: pick 1 and finish it today."
         else:
             pipoo_message = "You're on track. Focus on today's task, nothing else."
         
         return {
-            "role": "student",
-            "view": "focus",
+            "role": ctx.role,
+            "view": ctx.view,
             "pipoo": {
                 "message": pipoo_message
             },
             "data": {
-                "completed": len(completed),
-                "skipped": len(skipped),
-                "pending": len(pending),
+                "completed": completed,
+                "skipped": skipped,
+                "pending": pending,
                 "blocker": blocker,
-                "warning": len(skipped) > 3
+                "warning": skipped > 3
             }
         }
     
-    async def _student_skill(self, user_id: str, onboarding_data: dict) -> dict:
+    async def _student_skill(self, ctx: ViewContext) -> dict:
         """
         Student Skill View - Skill proof tasks
         """
         
-        # Get skill tasks
-        skill_tasks = await self.task_repo.get_user_tasks(
-            user_id=user_id,
-            task_type="skill"
-        )
+        skill_tasks = ctx.data["skill_tasks"]
         
         return {
-            "role": "student",
-            "view": "skill",
+            "role": ctx.role,
+            "view": ctx.view,
             "pipoo": {
                 "message": "Skill proof tasks will appear here. Complete them to build credibility."
             },
@@ -262,26 +297,26 @@ class WorkspaceService:
             }
         }
     
-    async def _student_history(self, user_id: str) -> dict:
+    async def _student_history(self, ctx: ViewContext) -> dict:
         """
         Student History View - Audit trail
         """
         
-        # Get all history events
-        events = await self.history_repo.get_user_history(user_id, limit=50)
-        
-        # Get task history
-        all_tasks = await self.task_repo.get_user_tasks(user_id=user_id)
-        completed_tasks = [t for t in all_tasks if t.get("completed")]
+        events_page = ctx.data["events_page"]
+        events = events_page["events"]
+        insights = ctx.data["insights"]
+        completed_tasks = ctx.data["completed_tasks"]
         
         return {
-            "role": "student",
-            "view": "history",
+            "role": ctx.role,
+            "view": ctx.view,
             "pipoo": {
                 "message": f"You have {len(events)} events and {len(completed_tasks)} completed tasks in your history."
             },
             "data": {
-                "events": events,
+                "events": serialize_document(events),
+                "events_next_cursor": events_page["next_cursor"],
+                "insights": serialize_document(insights),
                 "completed_tasks": [self._format_task(t) for t in completed_tasks]
             }
         }
@@ -290,49 +325,23 @@ class WorkspaceService:
     # PROFESSIONAL WORKSPACE (Similar structure)
     # ==========================================
     
-    async def _get_professional_workspace(
-        self,
-        user_id: str,
-        view: str,
-        onboarding_data: dict
-    ) -> dict:
-        """
-        Generate professional workspace data
-        Similar to student but different messaging
-        """
-        
-        if view == "overview":
-            return await self._professional_overview(user_id, onboarding_data)
-        elif view == "direction":
-            return await self._professional_direction(user_id, onboarding_data)
-        elif view == "focus":
-            return await self._professional_focus(user_id, onboarding_data)
-        elif view == "skill-edge":
-            return await self._professional_skill_edge(user_id, onboarding_data)
-        elif view == "history":
-            return await self._professional_history(user_id)
-        else:
-            raise ValueError(f"Unknown view: {view}")
+    async def _professional_overview(self, ctx: ViewContext) -> dict:
+        """Professional overview - similar logic to student (no insight logged)"""
+        await self._ensure_daily_task(ctx)
+        return self._render_professional_overview(ctx)
     
-    async def _professional_overview(self, user_id: str, onboarding_data: dict) -> dict:
-        """Professional overview - similar logic to student"""
-        
-        today = datetime.utcnow().date().isoformat()
-        today_tasks = await self.task_repo.get_user_tasks(user_id=user_id, date=today)
-        
-        if not today_tasks:
-            task = await self._create_daily_task(user_id, onboarding_data, today)
-            today_tasks = [task]
+    def _render_professional_overview(self, ctx: ViewContext) -> dict:
+        """Professional overview payload from loaded data only (no writes)"""
+        today_tasks = ctx.data["tasks_today"]
+        stats = ctx.data["stats"]
         
-        stats = await self.task_repo.get_completion_stats(user_id)
-        
-        direction = onboarding_data.get("direction", "upskill")
+        direction = ctx.onboarding_data.get("direction", "upskill")
         
         pipoo_message = f"You're working on: {direction}. Today's focus is clear. Execute."
         
         return {
-            "role": "professional",
-            "view": "overview",
+            "role": ctx.role,
+            "view": ctx.view,
             "pipoo": {"message": pipoo_message},
             "data": {
                 "tasks": [self._format_task(t) for t in today_tasks],
@@ -340,15 +349,15 @@ class WorkspaceService:
             }
         }
     
-    async def _professional_direction(self, user_id: str, onboarding_data: dict) -> dict:
+    async def _professional_direction(self, ctx: ViewContext) -> dict:
         """Professional direction view"""
         
-        direction = onboarding_data.get("direction", "upskill")
-        objective = onboarding_data.get("objective", "")
+        direction = ctx.onboarding_data.get("direction", "upskill")
+        objective = ctx.onboarding_data.get("objective", "")
         
         return {
-            "role": "professional",
-            "view": "direction",
+            "role": ctx.role,
+            "view": ctx.view,
             "pipoo": {
                 "message": f"Your direction: {direction}. Your objective: {objective}."
             },
@@ -358,35 +367,30 @@ class WorkspaceService:
             }
         }
     
-    async def _professional_focus(self, user_id: str, onboarding_data: dict) -> dict:
+    async def _professional_focus(self, ctx: ViewContext) -> dict:
         """Professional focus view"""
-        return await self._student_focus(user_id, onboarding_data)  # Same logic
+        return await self._student_focus(ctx)  # Same logic
     
-    async def _professional_skill_edge(self, user_id: str, onboarding_data: dict) -> dict:
+    async def _professional_skill_edge(self, ctx: ViewContext) -> dict:
         """Professional skill edge view"""
-        return await self._student_skill(user_id, onboarding_data)  # Same logic
+        return await self._student_skill(ctx)  # Same logic
     
-    async def _professional_history(self, user_id: str) -> dict:
+    async def _professional_history(self, ctx: ViewContext) -> dict:
         """Professional history view"""
-        return await self._student_history(user_id)  # Same logic
+        return await self._student_history(ctx)  # Same logic
     
     # ==========================================
     # COMPANY WORKSPACE (Simplified for now)
     # ==========================================
     
-    async def _get_company_workspace(
-        self,
-        user_id: str,
-        view: str,
-        onboarding_data: dict
-    ) -> dict:
+    async def _company_placeholder(self, ctx: ViewContext) -> dict:
         """
         Generate company workspace data
         """
         
         return {
-            "role": "company",
-            "view": view,
+            "role": ctx.role,
+            "view": ctx.view,
             "pipoo": {
                 "message": "Company workspace - candidate evaluation features coming in Phase 5."
             },
@@ -409,6 +413,9 @@ class WorkspaceService:
         """
         Create a daily task based on onboarding context
         System responsibility
+        
+        Idempotent: concurrent loads of the same day get the same task
+        (one upsert, see TaskRepository.ensure_daily_task)
         """
         
         goal = onboarding_data.get("goal", "learning")
@@ -436,16 +443,17 @@ class WorkspaceService:
             task_type="daily",
             difficulty="medium",
             estimated_time=time_available,
-            assigned_date=assigned_date,
+            assigned_date=parse_datetime(assigned_date),
             completed=False,
             skipped=False
         )
         
-        await self.task_repo.create_task(task_data)
+        task, created = await self.task_repo.ensure_daily_task(task_data)
         
-        print(f"📝 Auto-created task: {title} for user {user_id}")
+        if created:
+            print(f"📝 Auto-created task: {title} for user {user_id}")
         
-        return task_data.model_dump()
+        return task
     
     def _generate_student_overview_message(
         self,
@@ -504,6 +512,9 @@ class WorkspaceService:
         """
         Log Pipoo's insight to history
         System responsibility
+        
+        Repeats of the last insight for this view are coalesced, so
+        dashboard refreshes don't write a history event each time
         """
         
         history_data = HistoryDB(
@@ -516,10 +527,35 @@ class WorkspaceService:
                 "message": message,
                 **context
             },
-            timestamp=datetime.utcnow().isoformat()
+            timestamp=utcnow()
         )
         
-        await self.history_repo.log_event(history_data)
+        await self.history_repo.log_insight(history_data)
+    
+    async def _ensure_daily_task(self, ctx: ViewContext) -> list:
+        """
+        Today's tasks, creating one on the first load of the day
+        Refreshes ctx.data["stats"] so every view in the request sees it
+        
+        With ctx.render_only nothing is created; the view is marked
+        deferred instead
+        """
+        today_tasks = ctx.data["tasks_today"]
+        if today_tasks:
+            return today_tasks
+        
+        if ctx.render_only:
+            ctx.deferred = True
+            return today_tasks
+        
+        today = utcnow().date().isoformat()
+        task = await self.timings.run(
+            "create_daily_task",
+            self._create_daily_task(ctx.user_id, ctx.onboarding_data, today)
+        )
+        ctx.data["tasks_today"] = [task]
+        ctx.data["stats"] = await self.timings.run("stats_refresh", self.task_repo.get_completion_stats(ctx.user_id))
+        return ctx.data["tasks_today"]
     
     def _format_task(self, task: dict) -> dict:
         """Format task for frontend"""
@@ -532,18 +568,9 @@ class WorkspaceService:
             "estimated_time": task.get("estimated_time"),
             "completed": task.get("completed", False),
             "skipped": task.get("skipped", False),
-            "assigned_date": task.get("assigned_date"),
-            "completed_at": task.get("completed_at")
+            "assigned_date": to_iso(task.get("assigned_date"), date_only=True),
+            "completed_at": to_iso(task.get("completed_at"))
         }
-    
-    def _is_recent(self, date_str: str, days: int = 7) -> bool:
-        """Check if date is within last N days"""
-        try:
-            task_date = datetime.fromisoformat(date_str.split("T")[0])
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
-            return task_date.date() >= cutoff_date.date()
-        except:
-            return False
 
 
 # ==========================================
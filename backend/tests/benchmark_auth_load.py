@@ -0,0 +1,116 @@
+"""
+Auth Load Benchmark
+Measures non-auth endpoint latency while a login burst is running
+
+Compare runs with PASSWORD_HASH_WORKERS / PASSWORD_HASH_MAX_QUEUE tuned
+to see how bcrypt affects the rest of the API.
+"""
+
+import asyncio
+import httpx
+import time
+from datetime import datetime
+
+BASE_URL = "http://localhost:8000/api"
+HEALTH_URL = "http://localhost:8000/health"
+
+LOGIN_CONCURRENCY = 50  # Parallel login requests
+LOGIN_ROUNDS = 4  # Bursts of LOGIN_CONCURRENCY
+PROBE_INTERVAL = 0.01  # Seconds between non-auth probes
+
+class AuthLoadBenchmark:
+    def __init__(self):
+        self.email = None
+        self.password = "bench123"
+        self.token = None
+        self.probe_latencies = {"health": [], "workspace_views": []}
+        self.login_statuses = {}
+
+    async def setup_user(self, client):
+        """Create a user to log in with"""
+        timestamp = int(datetime.utcnow().timestamp())
+        self.email = f"bench_{timestamp}@test.com"
+
+        response = await client.post(
+            f"{BASE_URL}/auth/signup",
+            json={
+                "name": "Bench User",
+                "email": self.email,
+                "password": self.password,
+                "role": "student"
+            }
+        )
+        response.raise_for_status()
+        self.token = response.json()["access_token"]
+
+    async def login_burst(self, client):
+        """Fire LOGIN_ROUNDS bursts of concurrent logins"""
+        async def login():
+            response = await client.post(
+                f"{BASE_URL}/auth/login",
+                json={"email": self.email, "password": self.password}
+            )
+            code = response.status_code
+            self.login_statuses[code] = self.login_statuses.get(code, 0) + 1
+
+        for _ in range(LOGIN_ROUNDS):
+            await asyncio.gather(*[login() for _ in range(LOGIN_CONCURRENCY)])
+
+    async def probe(self, client, stop: asyncio.Event):
+        """Hit non-auth endpoints while logins run"""
+        headers = {"Authorization": f"Bearer {self.token}"}
+
+        while not stop.is_set():
+            start = time.perf_counter()
+            await client.get(HEALTH_URL)
+            self.probe_latencies["health"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await client.get(f"{BASE_URL}/workspace/views", headers=headers)
+            self.probe_latencies["workspace_views"].append(time.perf_counter() - start)
+
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    async def run(self):
+        """Run the benchmark"""
+        limits = httpx.Limits(max_connections=LOGIN_CONCURRENCY + 10)
+
+        async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+            await self.setup_user(client)
+
+            stop = asyncio.Event()
+            probe_task = asyncio.create_task(self.probe(client, stop))
+
+            start = time.perf_counter()
+            await self.login_burst(client)
+            elapsed = time.perf_counter() - start
+
+            stop.set()
+            await probe_task
+
+        self.print_summary(elapsed)
+
+    def print_summary(self, elapsed: float):
+        """Print latency percentiles"""
+        print("\n" + "=" * 60)
+        print("AUTH LOAD BENCHMARK")
+        print("=" * 60)
+        print(f"Logins: {LOGIN_CONCURRENCY * LOGIN_ROUNDS} in {elapsed:.2f}s")
+        print(f"Login status codes: {self.login_statuses}")
+
+        for name, samples in self.probe_latencies.items():
+            if not samples:
+                continue
+            samples = sorted(samples)
+            p50 = samples[int(len(samples) * 0.50)] * 1000
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+            print(f"{name:>16}: n={len(samples):<5} p50={p50:7.1f}ms  p99={p99:7.1f}ms")
+
+        print("=" * 60 + "\n")
+
+# Run benchmark
+if __name__ == "__main__":
+    print("\n⏳ Starting auth load benchmark...")
+    print("Make sure backend is running at http://localhost:8000\n")
+
+    asyncio.run(AuthLoadBenchmark().run())
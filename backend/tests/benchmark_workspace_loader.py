@@ -0,0 +1,133 @@
+"""
+Workspace Loader Benchmark
+Compares per-query view loading against the $facet loader
+
+Talks to MongoDB directly (no server needed). Seeds one student with
+TASKS tasks and EVENTS history events in a scratch database, then
+times WorkspaceService views with WORKSPACE_FACET_LOADER off and on.
+
+Run from backend/: python tests/benchmark_workspace_loader.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.config import settings
+from app.core.serialization import utcnow
+from app.db.collections import create_collections_with_validation
+from app.db.repositories import (
+    UserRepository,
+    OnboardingRepository,
+    TaskRepository,
+    HistoryRepository
+)
+from app.services.workspace_service import WorkspaceService
+
+BENCH_DATABASE = "clarity_ai_bench"
+TASKS = 2000
+EVENTS = 10000
+ROUNDS = 200
+VIEWS = ["overview", "focus", "history"]
+
+ONBOARDING = {"goal": "job-ready", "timeline": "3-6m", "skills": "python", "blocker": "time"}
+
+async def seed(db, user_id: str):
+    """Insert TASKS tasks and EVENTS events spread over the last year"""
+    now = utcnow()
+    
+    tasks = []
+    for i in range(TASKS):
+        day = now - timedelta(days=i % 365)
+        tasks.append({
+            "task_id": f"task_{uuid.uuid4().hex[:12]}",
+            "user_id": user_id,
+            "title": f"Bench task {i}",
+            "task_type": ["daily", "skill", "optional", "micro"][i % 4],
+            "difficulty": ["easy", "medium", "hard"][i % 3],
+            "estimated_time": "30 min",
+            "assigned_date": day.replace(hour=0, minute=0, second=0, microsecond=0),
+            "completed": i % 3 == 0,
+            "skipped": i % 7 == 0 and i % 3 != 0,
+            "archived": False
+        })
+    await db["tasks"].insert_many(tasks)
+    
+    events = []
+    for i in range(EVENTS):
+        events.append({
+            "history_id": f"hist_{uuid.uuid4().hex[:12]}",
+            "user_id": user_id,
+            "event_type": ["task_completed", "task_skipped", "login"][i % 3],
+            "description": f"Bench event {i}",
+            "context": {},
+            "timestamp": now - timedelta(minutes=i * 50),
+            "summarized": False,
+            "archived": False
+        })
+    await db["history"].insert_many(events)
+    
+    # Materialize counters so the per-query path reads user_stats
+    await TaskRepository(db).user_stats.rebuild(user_id)
+
+async def time_view(service: WorkspaceService, user_id: str, view: str) -> list:
+    """Latency samples (seconds) for one view"""
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        await service.get_workspace_data(user_id, "student", view, ONBOARDING)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def summarize(samples: list) -> str:
+    samples = sorted(samples)
+    p50 = samples[int(len(samples) * 0.50)] * 1000
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    return f"p50={p50:7.2f}ms  p99={p99:7.2f}ms"
+
+async def main():
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    await client.drop_database(BENCH_DATABASE)
+    db = client[BENCH_DATABASE]
+    
+    await create_collections_with_validation(db, force=True)
+    
+    user_id = f"user_{uuid.uuid4().hex[:12]}"
+    await seed(db, user_id)
+    
+    service = WorkspaceService(
+        user_repo=UserRepository(db),
+        onboarding_repo=OnboardingRepository(db),
+        task_repo=TaskRepository(db),
+        history_repo=HistoryRepository(db)
+    )
+    
+    print("\n" + "=" * 60)
+    print(f"WORKSPACE LOADER BENCHMARK ({TASKS} tasks, {EVENTS} events, {ROUNDS} rounds)")
+    print("=" * 60)
+    
+    for view in VIEWS:
+        for facet in (False, True):
+            settings.WORKSPACE_FACET_LOADER = facet
+            await time_view(service, user_id, view)  # Warm up caches and plans
+            samples = await time_view(service, user_id, view)
+            label = "$facet" if facet else "per-query"
+            print(f"{view:>10} {label:>10}: {summarize(samples)}")
+    
+    print("=" * 60 + "\n")
+    
+    await client.drop_database(BENCH_DATABASE)
+    client.close()
+
+# Run benchmark
+if __name__ == "__main__":
+    print("\n⏳ Starting workspace loader benchmark...")
+    print(f"Using MongoDB at {settings.MONGODB_URL} (scratch database {BENCH_DATABASE})\n")
+    
+    asyncio.run(main())
@@ -0,0 +1,8 @@
+"""
+Pytest setup: make the `app` package importable from tests/
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,152 @@
+"""
+Audit queue flushes: what counts as inserted, counters, retries
+"""
+
+import asyncio
+from pymongo.errors import AutoReconnect, BulkWriteError
+import pytest
+from app.core.database import Collections
+from app.db.audit import AuditQueue
+from app.db.repositories import UserStatsRepository
+
+class FakeCursor:
+    """Async iteration over a list of documents"""
+    
+    def __init__(self, docs):
+        self._docs = list(docs)
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        if not self._docs:
+            raise StopAsyncIteration
+        return self._docs.pop(0)
+
+class FakeHistory:
+    """insert_many that fails as scripted: an exception to raise, or None to succeed"""
+    
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.docs = []
+    
+    async def insert_many(self, docs, ordered=True):
+        failure = self.failures.pop(0) if self.failures else None
+        if isinstance(failure, BulkWriteError):
+            bad = {e["index"] for e in failure.details["writeErrors"]}
+            self.docs += [doc for i, doc in enumerate(docs) if i not in bad]
+        elif failure is not None:
+            raise failure
+        else:
+            self.docs += docs
+            return
+        raise failure
+    
+    def find(self, query, projection=None):
+        ids = set(query["history_id"]["$in"])
+        return FakeCursor({"history_id": d["history_id"]} for d in self.docs if d["history_id"] in ids)
+
+class FakeStats:
+    """Records calls to the UserStatsRepository methods the queue uses"""
+    
+    def __init__(self, monkeypatch, record_error=None):
+        self.recorded = []
+        self.rebuilt = []
+        stats = self
+        
+        async def record_events(repo, events):
+            if record_error:
+                raise record_error
+            stats.recorded += events
+        
+        async def rebuild(repo, user_id, max_attempts=3):
+            stats.rebuilt.append(user_id)
+        
+        monkeypatch.setattr(UserStatsRepository, "__init__", lambda repo, db: None)
+        monkeypatch.setattr(UserStatsRepository, "record_events", record_events)
+        monkeypatch.setattr(UserStatsRepository, "rebuild", rebuild)
+
+def event(n, user_id="user_1"):
+    return {"history_id": f"hist_{n}", "user_id": user_id, "event_type": "task_completed", "timestamp": n}
+
+def flush(history, batch):
+    queue = AuditQueue(max_size=10, batch_size=10, flush_interval=0.01, enqueue_timeout=0.01)
+    queue._db = {Collections.HISTORY: history}
+    asyncio.run(queue._flush(batch))
+    return queue
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    async def sleep(seconds):
+        pass
+    monkeypatch.setattr("app.db.audit.asyncio.sleep", sleep)
+
+# ==========================================
+# INSERTED EVENTS ONLY
+# ==========================================
+
+def test_rejected_events_are_not_counted(monkeypatch):
+    stats = FakeStats(monkeypatch)
+    rejected = BulkWriteError({"writeErrors": [{"index": 1, "code": 121, "errmsg": "validation"}]})
+    batch = [event(1), event(2), event(3)]
+    
+    queue = flush(FakeHistory([rejected]), batch)
+    
+    assert [e["history_id"] for e in stats.recorded] == ["hist_1", "hist_3"]
+    assert queue.flushed_events == 2
+    assert queue.failed_events == 1
+
+def test_retry_skips_events_that_already_landed(monkeypatch):
+    stats = FakeStats(monkeypatch)
+    history = FakeHistory([AutoReconnect("lost"), None])
+    history.docs.append(event(1))  # landed before the connection dropped
+    
+    queue = flush(history, [event(1), event(2)])
+    
+    assert [d["history_id"] for d in history.docs] == ["hist_1", "hist_2"]
+    assert len(stats.recorded) == 2
+    assert queue.failed_events == 0
+
+def test_batch_dropped_after_max_retries(monkeypatch):
+    stats = FakeStats(monkeypatch)
+    history = FakeHistory([AutoReconnect("down")] * 3)
+    
+    queue = flush(history, [event(1), event(2)])
+    
+    assert queue.failed_events == 2
+    assert queue.flushed_events == 0
+    assert stats.recorded == []
+
+# ==========================================
+# COUNTERS
+# ==========================================
+
+def test_counter_failure_rebuilds_instead_of_failing_events(monkeypatch):
+    stats = FakeStats(monkeypatch, record_error=AutoReconnect("stats down"))
+    
+    queue = flush(FakeHistory(), [event(1, "user_1"), event(2, "user_2"), event(3, "user_1")])
+    
+    assert queue.flushed_events == 3
+    assert queue.failed_events == 0
+    assert sorted(stats.rebuilt) == ["user_1", "user_2"]
+
+def test_run_loop_survives_unexpected_errors(monkeypatch):
+    queue = AuditQueue(max_size=10, batch_size=2, flush_interval=0.01, enqueue_timeout=0.01)
+    calls = []
+    
+    async def flaky_flush(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+    
+    async def scenario():
+        queue.start(db=None)
+        queue._flush = flaky_flush
+        for n in range(4):
+            await queue.enqueue(event(n))
+        await queue.stop()
+    
+    asyncio.run(scenario())
+    
+    assert sum(calls) == 4
+    assert queue.failed_events == 2
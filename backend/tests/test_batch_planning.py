@@ -0,0 +1,100 @@
+"""
+apply_status_batch planning: per-operation outcomes and guarded updates
+"""
+
+from datetime import datetime
+from app.db.repositories import TaskRepository, TaskTransition
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def task(task_id, user_id="user_1", **state):
+    return {"task_id": task_id, "user_id": user_id, "title": task_id, **state}
+
+def plan(tasks, operations, user_id="user_1"):
+    return TaskRepository.plan_status_batch(
+        user_id, {t["task_id"]: t for t in tasks}, operations, NOW
+    )
+
+def statuses(results):
+    return [result["status"] for result in results]
+
+# ==========================================
+# OUTCOMES
+# ==========================================
+
+def test_rejections_follow_single_task_rules():
+    tasks = [
+        task("theirs", user_id="user_2"),
+        task("done", completed=True),
+        task("skipped", skipped=True)
+    ]
+    results, updates = plan(tasks, [
+        {"task_id": "missing", "action": "complete"},
+        {"task_id": "theirs", "action": "complete"},
+        {"task_id": "done", "action": "skip"},
+        {"task_id": "skipped", "action": "skip"}
+    ])
+    
+    assert statuses(results) == [
+        TaskTransition.NOT_FOUND,
+        TaskTransition.FORBIDDEN,
+        TaskTransition.ALREADY_COMPLETED,
+        TaskTransition.ALREADY_SKIPPED
+    ]
+    assert updates == []
+    assert all(result["task"] is None for result in results)
+
+def test_skipped_task_can_still_be_completed():
+    results, updates = plan([task("t1", skipped=True)], [{"task_id": "t1", "action": "complete"}])
+    
+    assert statuses(results) == [TaskTransition.OK]
+    assert updates == [(
+        {"task_id": "t1", "user_id": "user_1", "completed": {"$ne": True}},
+        {"completed": True, "completed_at": NOW}
+    )]
+
+def test_skip_guard_and_reason():
+    results, updates = plan([task("t1")], [{"task_id": "t1", "action": "skip", "reason": "busy"}])
+    
+    assert results[0]["reason"] == "busy"
+    assert updates == [(
+        {"task_id": "t1", "user_id": "user_1", "completed": {"$ne": True}, "skipped": {"$ne": True}},
+        {"skipped": True, "skipped_at": NOW, "skipped_reason": "busy"}
+    )]
+
+def test_skip_without_reason_leaves_reason_unset():
+    _, updates = plan([task("t1")], [{"task_id": "t1", "action": "skip"}])
+    
+    assert "skipped_reason" not in updates[0][1]
+
+# ==========================================
+# ORDERING + ISOLATION
+# ==========================================
+
+def test_later_operations_see_earlier_ones():
+    results, updates = plan([task("t1")], [
+        {"task_id": "t1", "action": "skip"},
+        {"task_id": "t1", "action": "skip"},
+        {"task_id": "t1", "action": "complete"},
+        {"task_id": "t1", "action": "complete"}
+    ])
+    
+    assert statuses(results) == [
+        TaskTransition.OK,
+        TaskTransition.ALREADY_SKIPPED,
+        TaskTransition.OK,
+        TaskTransition.ALREADY_COMPLETED
+    ]
+    assert len(updates) == 2
+
+def test_results_carry_pre_images_and_inputs_are_untouched():
+    tasks = [task("t1")]
+    results, _ = plan(tasks, [
+        {"task_id": "t1", "action": "skip"},
+        {"task_id": "t1", "action": "complete"}
+    ])
+    
+    assert "skipped" not in results[0]["task"]
+    assert results[1]["task"]["skipped"] is True
+    assert "completed" not in results[1]["task"]
+    assert tasks == [task("t1")]
@@ -0,0 +1,91 @@
+"""
+TTLCache: per-entry expiry and LRU eviction
+"""
+
+from app.core import cache
+from app.core.cache import TTLCache
+
+class FakeClock:
+    """Stands in for time.monotonic"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+def make_cache(monkeypatch, max_entries=3, ttl_seconds=10):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return TTLCache("test", max_entries=max_entries, ttl_seconds=ttl_seconds), clock
+
+# ==========================================
+# EXPIRY
+# ==========================================
+
+def test_entry_is_served_until_ttl(monkeypatch):
+    c, clock = make_cache(monkeypatch)
+    c.set("a", 1)
+    
+    clock.now += 9.9
+    assert c.get("a") == 1
+    assert c.hits == 1
+
+def test_entry_expires_at_ttl(monkeypatch):
+    c, clock = make_cache(monkeypatch)
+    c.set("a", 1)
+    
+    clock.now += 10
+    assert c.get("a") is None
+    assert c.misses == 1
+    assert c.stats()["size"] == 0
+
+def test_set_restarts_ttl(monkeypatch):
+    c, clock = make_cache(monkeypatch)
+    c.set("a", 1)
+    clock.now += 8
+    c.set("a", 2)
+    
+    clock.now += 8
+    assert c.get("a") == 2
+
+# ==========================================
+# LRU EVICTION
+# ==========================================
+
+def test_evicts_least_recently_stored(monkeypatch):
+    c, _ = make_cache(monkeypatch)
+    for key in "abcd":
+        c.set(key, key)
+    
+    assert c.get("a") is None
+    assert [c.get(key) for key in "bcd"] == ["b", "c", "d"]
+    assert c.evictions == 1
+
+def test_get_refreshes_recency(monkeypatch):
+    c, _ = make_cache(monkeypatch)
+    for key in "abc":
+        c.set(key, key)
+    
+    c.get("a")
+    c.set("d", "d")
+    
+    assert c.get("b") is None
+    assert c.get("a") == "a"
+
+def test_invalidate_and_stats(monkeypatch):
+    c, _ = make_cache(monkeypatch)
+    c.set("a", 1)
+    c.invalidate("a")
+    c.invalidate("missing")
+    
+    assert c.get("a") is None
+    stats = c.stats()
+    assert stats["invalidations"] == 1
+    assert stats["hit_rate"] == 0.0
+
+def test_capacity_is_at_least_one(monkeypatch):
+    c, _ = make_cache(monkeypatch, max_entries=0)
+    c.set("a", 1)
+    
+    assert c.get("a") == 1
@@ -0,0 +1,84 @@
+"""
+Completion stats: active-task semantics for the pipeline, facets and archiving
+"""
+
+from collections import defaultdict
+from types import SimpleNamespace
+import asyncio
+import pytest
+from app.db import repositories
+from app.db.lifecycle import LifecycleManager, LifecycleQueries
+from app.db.repositories import TaskRepository
+
+@pytest.fixture(autouse=True)
+def flags_backfilled(monkeypatch):
+    monkeypatch.setattr(LifecycleQueries, "flags_backfilled", True)
+    monkeypatch.setattr(LifecycleQueries, "dates_backfilled", True)
+
+def test_pipeline_counts_active_tasks_only():
+    match = TaskRepository.completion_stats_pipeline("user_1")[0]["$match"]
+    
+    assert match == {"user_id": "user_1", "archived": False}
+
+def test_view_loader_stats_facets_skip_archived_tasks():
+    repo = TaskRepository(defaultdict(object))
+    captured = []
+    
+    async def aggregate(pipeline, **kwargs):
+        captured.append(pipeline)
+        return [{"totals": [], "by_type": [], "by_difficulty": []}]
+    
+    repo.aggregate = aggregate
+    asyncio.run(repo.load_view_data("user_1", include_stats=True))
+    
+    facets = captured[0][-1]["$facet"]
+    assert set(facets) == {"totals", "by_type", "by_difficulty"}
+    assert all(stages[0] == {"$match": {"archived": False}} for stages in facets.values())
+
+def test_parse_completion_stats():
+    stats = TaskRepository.parse_completion_stats({
+        "totals": [{"total": 5, "completed": 2, "skipped": 1}],
+        "by_type": [{"_id": "daily", "total": 5, "completed": 2, "skipped": 1}],
+        "by_difficulty": [{"_id": None, "total": 5, "completed": 2, "skipped": 1}]
+    })
+    
+    assert stats["pending"] == 2
+    assert stats["by_type"]["daily"]["completed"] == 2
+    assert stats["by_difficulty"]["unset"]["total"] == 5
+
+# ==========================================
+# ARCHIVING
+# ==========================================
+
+class FakeTasks:
+    """distinct + update_many over a fixed set of archive candidates"""
+    
+    def __init__(self, owners):
+        self.owners = owners
+        self.updates = []
+    
+    async def distinct(self, field, query):
+        return sorted(set(self.owners))
+    
+    async def update_many(self, query, update):
+        self.updates.append((query, update))
+        return SimpleNamespace(modified_count=len(self.owners))
+
+def test_archiving_rebuilds_owner_counters(monkeypatch):
+    rebuilt, staled = [], []
+    
+    async def rebuild(repo, user_id, max_attempts=3):
+        rebuilt.append(user_id)
+    
+    async def mark_stale(repo, user_id):
+        staled.append(user_id)
+    
+    monkeypatch.setattr(repositories.UserStatsRepository, "rebuild", rebuild)
+    monkeypatch.setattr(repositories.WorkspaceSnapshotRepository, "mark_stale", mark_stale)
+    
+    db = defaultdict(object)
+    db["tasks"] = FakeTasks(["user_1", "user_2", "user_1"])
+    result = asyncio.run(LifecycleManager(db).archive_old_tasks())
+    
+    assert result["archived_count"] == 3
+    assert rebuilt == staled == ["user_1", "user_2"]
@@ -0,0 +1,166 @@
+"""
+Daily task creation: idempotent upsert under concurrency, duplicate cleanup
+"""
+
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+from app.core.database import Collections
+from app.db.migrations import plan_daily_task_dedupe
+from app.db.repositories import TaskRepository
+from app.models.database import TaskDB
+
+DAY = datetime(2024, 1, 15)
+
+class FakeTasks:
+    """
+    tasks with the unique_daily_task index: (user_id, assigned_date, task_type)
+
+    The upsert yields between its match and its insert, the window in
+    which concurrent upserts on a real server can collide.
+    """
+
+    name = Collections.TASKS
+
+    def __init__(self):
+        self.docs = []
+
+    def _match(self, query):
+        for doc in self.docs:
+            if all(doc.get(field) == value for field, value in query.items()):
+                return doc
+        return None
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False, return_document=None):
+        doc = self._match(query)
+        if doc is not None or not upsert:
+            return dict(doc) if doc else None
+
+        await asyncio.sleep(0)
+        if self._match(query) is not None:
+            raise DuplicateKeyError("E11000 duplicate key error: unique_daily_task")
+        doc = {**query, **update["$setOnInsert"]}
+        self.docs.append(doc)
+        return dict(doc)
+
+    async def find_one(self, query, projection=None):
+        doc = self._match(query)
+        return dict(doc) if doc else None
+
+def daily_task(task_id, user_id="user_1"):
+    return TaskDB(
+        task_id=task_id,
+        user_id=user_id,
+        title="Read for 20 minutes",
+        task_type="daily",
+        estimated_time="20 min",
+        assigned_date=DAY
+    )
+
+def repository():
+    db = defaultdict(object)
+    db[Collections.TASKS] = FakeTasks()
+    repo = TaskRepository(db)
+
+    repo.side_effects = []
+
+    async def mark_stale(user_id):
+        repo.side_effects.append(("stale", user_id))
+
+    async def record_task_created(task):
+        repo.side_effects.append(("created", task["task_id"]))
+
+    repo.snapshots.mark_stale = mark_stale
+    repo.user_stats.record_task_created = record_task_created
+    return repo
+
+# ==========================================
+# ENSURE DAILY TASK
+# ==========================================
+
+def test_first_call_creates_the_task():
+    repo = repository()
+
+    task, created = asyncio.run(repo.ensure_daily_task(daily_task("t1")))
+
+    assert created is True
+    assert task["task_id"] == "t1"
+    assert repo.side_effects == [("stale", "user_1"), ("created", "t1")]
+
+def test_existing_task_is_returned_unchanged():
+    repo = repository()
+    asyncio.run(repo.ensure_daily_task(daily_task("t1")))
+    repo.side_effects.clear()
+
+    task, created = asyncio.run(repo.ensure_daily_task(daily_task("t2")))
+
+    assert created is False
+    assert task["task_id"] == "t1"
+    assert len(repo.collection.docs) == 1
+    assert repo.side_effects == []
+
+def test_concurrent_loads_create_one_task():
+    repo = repository()
+
+    async def race():
+        return await asyncio.gather(*(
+            repo.ensure_daily_task(daily_task(f"t{i}")) for i in range(3)
+        ))
+
+    results = asyncio.run(race())
+
+    # The losers hit the unique index and read the winner's task
+    assert [created for _, created in results] == [True, False, False]
+    assert {task["task_id"] for task, _ in results} == {"t0"}
+    assert len(repo.collection.docs) == 1
+    assert repo.side_effects == [("stale", "user_1"), ("created", "t0")]
+
+def test_other_users_and_days_are_separate():
+    repo = repository()
+
+    _, first = asyncio.run(repo.ensure_daily_task(daily_task("t1")))
+    _, second = asyncio.run(repo.ensure_daily_task(daily_task("t2", user_id="user_2")))
+
+    assert first and second
+    assert len(repo.collection.docs) == 2
+
+# ==========================================
+# DUPLICATE CLEANUP
+# ==========================================
+
+def group(*tasks):
+    return {"tasks": [{"_id": _id, "completed": completed, "skipped": skipped} for _id, completed, skipped in tasks]}
+
+def test_untouched_duplicates_keep_the_oldest():
+    deleted, retyped = plan_daily_task_dedupe([group((3, False, False), (1, False, False), (2, False, False))])
+
+    assert deleted == [2, 3]
+    assert retyped == []
+
+def test_completed_task_is_kept_over_older_ones():
+    deleted, retyped = plan_daily_task_dedupe([group((1, False, False), (2, False, True), (3, True, False))])
+
+    # 3 stays daily, skipped 2 keeps its activity as "optional", 1 goes
+    assert deleted == [1]
+    assert retyped == [2]
+
+def test_extra_acted_on_tasks_are_retyped_not_deleted():
+    deleted, retyped = plan_daily_task_dedupe([group((1, True, False), (2, True, False), (3, False, True))])
+
+    assert deleted == []
+    assert retyped == [2, 3]
+
+def test_missing_flags_count_as_untouched():
+    groups = [{"tasks": [{"_id": 2}, {"_id": 1, "skipped": True}]}]
+
+    assert plan_daily_task_dedupe(groups) == ([2], [])
+
+def test_groups_are_planned_independently():
+    deleted, retyped = plan_daily_task_dedupe([
+        group((1, False, False), (2, False, False)),
+        group((3, False, True), (4, True, False))
+    ])
+
+    assert deleted == [2]
+    assert retyped == [3]
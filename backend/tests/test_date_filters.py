@@ -0,0 +1,57 @@
+"""
+Date range filters: legacy ISO strings match until the backfill is done
+"""
+
+from datetime import datetime
+import pytest
+from app.db.lifecycle import LifecycleQueries
+
+CUTOFF = datetime(2024, 3, 1, 6, 30)
+
+@pytest.fixture
+def backfilled(monkeypatch):
+    def set_state(done: bool):
+        monkeypatch.setattr(LifecycleQueries, "dates_backfilled", done)
+    return set_state
+
+def test_native_only_once_backfilled(backfilled):
+    backfilled(True)
+    
+    assert LifecycleQueries.date_range("timestamp", "$gte", CUTOFF) == {"timestamp": {"$gte": CUTOFF}}
+
+def test_legacy_strings_match_meanwhile(backfilled):
+    backfilled(False)
+    
+    assert LifecycleQueries.date_range("timestamp", "$lt", CUTOFF) == {"$or": [
+        {"timestamp": {"$lt": CUTOFF}},
+        {"timestamp": {"$lt": "2024-03-01T06:30:00"}}
+    ]}
+
+def test_calendar_fields_compare_as_dates(backfilled):
+    backfilled(False)
+    
+    condition = LifecycleQueries.date_range("assigned_date", "$gte", datetime(2024, 3, 1))
+    
+    assert condition["$or"][1] == {"assigned_date": {"$gte": "2024-03-01"}}
+    # The legacy form of the cutoff day itself is included
+    assert "2024-03-01" >= condition["$or"][1]["assigned_date"]["$gte"]
+
+def test_recent_tasks_filter_uses_it(backfilled):
+    backfilled(False)
+    
+    assert "$or" in LifecycleQueries.recent_tasks_filter(days=7)
+
+# ==========================================
+# LIFECYCLE FLAGS
+# ==========================================
+
+def test_active_filters_tolerate_missing_flags(monkeypatch):
+    monkeypatch.setattr(LifecycleQueries, "flags_backfilled", False)
+    
+    assert LifecycleQueries.active_tasks_filter() == {"archived": {"$ne": True}}
+    assert LifecycleQueries.active_history_filter() == {"archived": {"$ne": True}}
+
+def test_active_filters_use_equality_once_backfilled(monkeypatch):
+    monkeypatch.setattr(LifecycleQueries, "flags_backfilled", True)
+    
+    assert LifecycleQueries.active_tasks_filter() == {"archived": False}
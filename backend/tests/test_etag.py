@@ -0,0 +1,53 @@
+"""
+Workspace ETags: computing them and matching If-None-Match
+"""
+
+from datetime import datetime
+import pytest
+from app.core.cache import compute_etag, etag_matches
+
+PAYLOAD = {"role": "student", "view": "overview", "data": {"tasks": [], "stats": {"completed": 3}}}
+
+# ==========================================
+# COMPUTE
+# ==========================================
+
+def test_etag_is_quoted_and_stable():
+    etag = compute_etag(PAYLOAD)
+    
+    assert etag.startswith('"') and etag.endswith('"')
+    assert len(etag) == 34
+    assert compute_etag(PAYLOAD) == etag
+
+def test_etag_ignores_key_order():
+    reordered = {"data": {"stats": {"completed": 3}, "tasks": []}, "view": "overview", "role": "student"}
+    
+    assert compute_etag(reordered) == compute_etag(PAYLOAD)
+
+def test_etag_changes_with_content():
+    changed = {**PAYLOAD, "data": {"tasks": [], "stats": {"completed": 4}}}
+    
+    assert compute_etag(changed) != compute_etag(PAYLOAD)
+
+def test_etag_handles_non_json_values():
+    assert compute_etag({"at": datetime(2024, 1, 1)}) != compute_etag({"at": datetime(2024, 1, 2)})
+
+# ==========================================
+# MATCH
+# ==========================================
+
+ETAG = compute_etag(PAYLOAD)
+
+@pytest.mark.parametrize("header", [
+    ETAG,
+    f"W/{ETAG}",
+    f'"other", {ETAG}',
+    f'"other",{ETAG} ',
+    "*"
+])
+def test_matching_headers(header):
+    assert etag_matches(header, ETAG)
+
+@pytest.mark.parametrize("header", [None, "", '"other"', ETAG.strip('"'), f'"other", W/"x"'])
+def test_non_matching_headers(header):
+    assert not etag_matches(header, ETAG)
@@ -0,0 +1,188 @@
+"""
+InsightRepository.record: dedupe window, repeat bump, ring bound, races
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+import pytest
+from app.core.config import settings
+from app.core.database import Collections
+from app.db import repositories
+from app.db.repositories import InsightRepository
+
+START = datetime(2024, 1, 1, 12, 0)
+MISSING = object()
+
+def get_path(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return MISSING
+        doc = doc[part]
+    return doc
+
+def set_path(doc, path, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+            continue
+        value = get_path(doc, key)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "$ne":
+                    if value == operand:
+                        return False
+                elif value is MISSING:
+                    return False
+                elif op == "$gte" and not value >= operand:
+                    return False
+                elif op == "$lt" and not value < operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+class Result:
+    def __init__(self, matched_count):
+        self.matched_count = matched_count
+
+class FakeInsights:
+    """
+    One document per user_id (unique), interpreting the operators record uses
+
+    before_upsert runs once ahead of the next upsert, to stage a concurrent writer.
+    """
+
+    name = Collections.PIPOO_INSIGHTS
+
+    def __init__(self):
+        self.docs = {}
+        self.before_upsert = None
+
+    async def update_one(self, query, update, upsert=False):
+        if upsert and self.before_upsert:
+            staged, self.before_upsert = self.before_upsert, None
+            staged(self)
+
+        doc = self.docs.get(query["user_id"])
+        if doc is None or not matches(doc, query):
+            if not upsert:
+                return Result(0)
+            if doc is not None:
+                raise DuplicateKeyError("E11000 duplicate key error: user_id")
+            doc = self.docs[query["user_id"]] = {"user_id": query["user_id"]}
+
+        for path, value in update.get("$set", {}).items():
+            set_path(doc, path, value)
+        for path, step in update.get("$inc", {}).items():
+            current = get_path(doc, path)
+            set_path(doc, path, (0 if current is MISSING else current) + step)
+        for path, push in update.get("$push", {}).items():
+            ring = doc.setdefault(path, []) + push["$each"]
+            doc[path] = ring[push["$slice"]:]
+        return Result(1)
+
+class Clock:
+    def __init__(self):
+        self.now = START
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def insights(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(repositories, "utcnow", clock)
+    monkeypatch.setattr(settings, "PIPOO_INSIGHT_DEDUPE_SECONDS", 3600)
+    monkeypatch.setattr(settings, "PIPOO_INSIGHT_RING_SIZE", 3)
+
+    repo = InsightRepository({Collections.PIPOO_INSIGHTS: FakeInsights()})
+    repo.clock = clock
+    return repo
+
+def record(repo, message, view="overview", user_id="user_1"):
+    return asyncio.run(repo.record(user_id, view, {"message": message}))
+
+def document(repo, user_id="user_1"):
+    return repo.collection.docs[user_id]
+
+# ==========================================
+# DEDUPE WINDOW
+# ==========================================
+
+def test_repeat_inside_window_bumps_counter_only(insights):
+    assert record(insights, "drink water") is True
+    insights.clock.now += timedelta(minutes=10)
+
+    assert record(insights, "drink water") is False
+    assert record(insights, "drink water") is False
+
+    latest = document(insights)["latest"]["overview"]
+    assert latest["repeats"] == 2
+    assert latest["at"] == START
+    assert latest["seen_at"] == START + timedelta(minutes=10)
+    assert len(document(insights)["recent"]) == 1
+
+def test_repeat_after_window_is_recorded_again(insights):
+    record(insights, "drink water")
+    insights.clock.now += timedelta(seconds=3601)
+
+    assert record(insights, "drink water") is True
+
+    latest = document(insights)["latest"]["overview"]
+    assert latest["repeats"] == 0
+    assert latest["at"] == insights.clock.now
+    assert len(document(insights)["recent"]) == 2
+
+def test_dedupe_is_per_view(insights):
+    assert record(insights, "drink water", view="overview") is True
+    assert record(insights, "drink water", view="tasks") is True
+    assert record(insights, "stretch", view="overview") is True
+
+    assert set(document(insights)["latest"]) == {"overview", "tasks"}
+
+# ==========================================
+# RING BOUND
+# ==========================================
+
+def test_ring_keeps_newest_entries(insights):
+    for message in ["a", "b", "c", "d", "e"]:
+        insights.clock.now += timedelta(seconds=1)
+        assert record(insights, message) is True
+
+    ring = document(insights)["recent"]
+    assert [entry["message"] for entry in ring] == ["c", "d", "e"]
+
+# ==========================================
+# RACES
+# ==========================================
+
+def test_losing_first_insert_race_is_a_repeat(insights):
+    # Another render inserts the same insight between our two updates
+    def concurrent_render(collection):
+        collection.docs["user_1"] = {
+            "user_id": "user_1",
+            "latest": {"overview": {
+                "hash": InsightRepository.insight_hash({"message": "drink water"}),
+                "at": START, "seen_at": START, "repeats": 0
+            }},
+            "recent": [{"message": "drink water"}]
+        }
+    insights.collection.before_upsert = concurrent_render
+
+    assert record(insights, "drink water") is False
+    assert document(insights)["recent"] == [{"message": "drink water"}]
+
+def test_new_insight_for_existing_user_is_not_a_race(insights):
+    record(insights, "drink water")
+
+    # Document exists but the guard passes, so the update matches instead of inserting
+    assert record(insights, "stretch") is True
+    assert [entry["message"] for entry in document(insights)["recent"]] == ["drink water", "stretch"]
@@ -0,0 +1,77 @@
+"""
+Keyset pagination: cursor round trips and range filters
+"""
+
+from datetime import datetime
+import pytest
+from app.db.pagination import decode_cursor, encode_cursor, keyset_filter, with_sort_fields
+
+TASK_SORT = [("assigned_date", -1), ("task_id", -1)]
+
+# ==========================================
+# CURSORS
+# ==========================================
+
+def test_cursor_round_trips_sort_values():
+    document = {
+        "task_id": "task_abc",
+        "assigned_date": datetime(2024, 3, 1),
+        "title": "Not part of the cursor"
+    }
+    token = encode_cursor(document, TASK_SORT)
+    
+    assert decode_cursor(token, TASK_SORT) == [datetime(2024, 3, 1), "task_abc"]
+
+def test_cursor_is_url_safe_without_padding():
+    token = encode_cursor({"task_id": "t" * 7, "assigned_date": "2024-03-01"}, TASK_SORT)
+    
+    assert "=" not in token
+    assert "+" not in token and "/" not in token
+
+def test_missing_fields_encode_as_none():
+    token = encode_cursor({"task_id": "task_abc"}, TASK_SORT)
+    
+    assert decode_cursor(token, TASK_SORT) == [None, "task_abc"]
+
+@pytest.mark.parametrize("token", ["", "not-base64!", "bm90IGpzb24", "eyJhIjogMX0"])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        decode_cursor(token, TASK_SORT)
+
+def test_cursor_for_another_sort_is_rejected():
+    token = encode_cursor({"timestamp": datetime(2024, 3, 1)}, [("timestamp", -1)])
+    
+    with pytest.raises(ValueError):
+        decode_cursor(token, TASK_SORT)
+
+# ==========================================
+# KEYSET FILTER
+# ==========================================
+
+def test_descending_filter():
+    assert keyset_filter(TASK_SORT, ["2024-03-01", "task_abc"]) == {"$or": [
+        {"assigned_date": {"$lt": "2024-03-01"}},
+        {"assigned_date": "2024-03-01", "task_id": {"$lt": "task_abc"}}
+    ]}
+
+def test_mixed_directions():
+    sort = [("completed", 1), ("timestamp", -1), ("history_id", 1)]
+    
+    assert keyset_filter(sort, [False, 5, "h1"]) == {"$or": [
+        {"completed": {"$gt": False}},
+        {"completed": False, "timestamp": {"$lt": 5}},
+        {"completed": False, "timestamp": 5, "history_id": {"$gt": "h1"}}
+    ]}
+
+# ==========================================
+# PROJECTIONS
+# ==========================================
+
+def test_inclusion_projection_gains_sort_fields():
+    assert with_sort_fields({"_id": 0, "title": 1}, TASK_SORT) == {
+        "_id": 0, "title": 1, "assigned_date": 1, "task_id": 1
+    }
+
+@pytest.mark.parametrize("projection", [None, {}, {"_id": 0, "context": 0}])
+def test_other_projections_are_unchanged(projection):
+    assert with_sort_fields(projection, TASK_SORT) == projection
@@ -0,0 +1,74 @@
+"""
+Date serialization: parsing stored/legacy values and rendering for the API
+"""
+
+from datetime import date, datetime, timezone
+import pytest
+from app.core.serialization import parse_datetime, serialize_document, utcnow
+
+# ==========================================
+# PARSING
+# ==========================================
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-01-01", datetime(2024, 1, 1)),
+    ("2024-01-01T14:30:00", datetime(2024, 1, 1, 14, 30)),
+    ("2024-01-01T14:30:00.123000", datetime(2024, 1, 1, 14, 30, 0, 123000)),
+    ("2024-01-01T14:30:00Z", datetime(2024, 1, 1, 14, 30)),
+    ("2024-01-01T14:30:00+00:00", datetime(2024, 1, 1, 14, 30)),
+    (date(2024, 1, 1), datetime(2024, 1, 1)),
+    (None, None)
+])
+def test_parse_datetime(value, expected):
+    parsed = parse_datetime(value)
+    
+    assert parsed == expected
+    assert parsed is None or parsed.tzinfo is None
+
+def test_datetimes_pass_through():
+    value = datetime(2024, 1, 1, 9, 0)
+    
+    assert parse_datetime(value) is value
+
+@pytest.mark.parametrize("value", ["", "yesterday", "2024-13-01"])
+def test_unparseable_strings_raise(value):
+    with pytest.raises(ValueError):
+        parse_datetime(value)
+
+def test_utcnow_has_millisecond_precision():
+    now = utcnow()
+    
+    assert now.microsecond % 1000 == 0
+    assert now.tzinfo is None
+    assert abs(now - datetime.now(timezone.utc).replace(tzinfo=None)).total_seconds() < 5
+
+# ==========================================
+# API RENDERING
+# ==========================================
+
+def test_serialize_document_renders_nested_datetimes():
+    document = {
+        "task_id": "task_abc",
+        "created_at": datetime(2024, 1, 1, 14, 30),
+        "assigned_date": datetime(2024, 1, 1),
+        "due_date": None,
+        "completed": False,
+        "context": {"events": [{"timestamp": datetime(2024, 1, 2, 8, 0)}]}
+    }
+    
+    assert serialize_document(document) == {
+        "task_id": "task_abc",
+        "created_at": "2024-01-01T14:30:00",
+        "assigned_date": "2024-01-01",
+        "due_date": None,
+        "completed": False,
+        "context": {"events": [{"timestamp": "2024-01-02T08:00:00"}]}
+    }
+
+def test_serialize_document_leaves_legacy_strings():
+    document = {"assigned_date": "2024-01-01", "created_at": "2024-01-01T14:30:00"}
+    
+    assert serialize_document(document) == document
+
+def test_serialize_document_handles_lists():
+    assert serialize_document([datetime(2024, 1, 1), "x", 3]) == ["2024-01-01T00:00:00", "x", 3]
@@ -0,0 +1,144 @@
+"""
+SingleFlight: identical concurrent reads share one round trip
+"""
+
+import asyncio
+from app.db.singleflight import SingleFlight
+
+def run(coro):
+    return asyncio.run(coro)
+
+class SlowQuery:
+    """Counts calls; each call waits until released"""
+    
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+        self.release = None
+    
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.result
+
+# ==========================================
+# COALESCING
+# ==========================================
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        query = SlowQuery({"user_id": "u1"})
+        query.release = asyncio.Event()
+        
+        callers = [asyncio.create_task(flight.do(("users", "u1"), query)) for _ in range(5)]
+        await asyncio.sleep(0)
+        query.release.set()
+        results = await asyncio.gather(*callers)
+        return flight, query, results
+    
+    flight, query, results = run(scenario())
+    
+    assert query.calls == 1
+    assert all(result == {"user_id": "u1"} for result in results)
+    assert flight.stats() == {"calls": 5, "round_trips": 1, "coalesced": 4, "in_flight": 0}
+
+def test_different_keys_are_not_shared():
+    async def scenario():
+        flight = SingleFlight()
+        query = SlowQuery({})
+        query.release = asyncio.Event()
+        query.release.set()
+        await asyncio.gather(
+            flight.do(("users", "u1"), query),
+            flight.do(("users", "u2"), query)
+        )
+        return query
+    
+    assert run(scenario()).calls == 2
+
+def test_nothing_is_cached_after_completion():
+    async def scenario():
+        flight = SingleFlight()
+        query = SlowQuery({})
+        query.release = asyncio.Event()
+        query.release.set()
+        await flight.do(("users", "u1"), query)
+        await flight.do(("users", "u1"), query)
+        return query
+    
+    assert run(scenario()).calls == 2
+
+def test_forget_stops_sharing_namespace():
+    async def scenario():
+        flight = SingleFlight()
+        query = SlowQuery({})
+        query.release = asyncio.Event()
+        
+        first = asyncio.create_task(flight.do(("users", "u1"), query))
+        await asyncio.sleep(0)
+        flight.forget("users")
+        second = asyncio.create_task(flight.do(("users", "u1"), query))
+        await asyncio.sleep(0)
+        query.release.set()
+        await asyncio.gather(first, second)
+        return query
+    
+    assert run(scenario()).calls == 2
+
+def test_errors_reach_every_caller():
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+    
+    async def scenario():
+        flight = SingleFlight()
+        return await asyncio.gather(
+            flight.do("key", failing),
+            flight.do("key", failing),
+            return_exceptions=True
+        ), flight
+    
+    results, flight = run(scenario())
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.round_trips == 1
+
+# ==========================================
+# ISOLATION
+# ==========================================
+
+def test_followers_get_deep_copies():
+    async def scenario():
+        flight = SingleFlight()
+        query = SlowQuery({"profile": {"skills": ["python"]}})
+        query.release = asyncio.Event()
+        
+        callers = [asyncio.create_task(flight.do("key", query)) for _ in range(3)]
+        await asyncio.sleep(0)
+        query.release.set()
+        return await asyncio.gather(*callers)
+    
+    leader, *followers = run(scenario())
+    leader["profile"]["skills"].append("mongodb")
+    
+    for follower in followers:
+        assert follower == {"profile": {"skills": ["python"]}}
+        assert follower["profile"] is not leader["profile"]
+    assert followers[0]["profile"] is not followers[1]["profile"]
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        flight = SingleFlight()
+        query = SlowQuery("value")
+        query.release = asyncio.Event()
+        
+        leader = asyncio.create_task(flight.do("key", query))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", query))
+        await asyncio.sleep(0)
+        leader.cancel()
+        query.release.set()
+        return await follower
+    
+    assert run(scenario()) == "value"
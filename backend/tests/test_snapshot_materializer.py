@@ -0,0 +1,230 @@
+"""
+Snapshot materializer: debounce coalescing and generation-guarded saves
+"""
+
+import asyncio
+from collections import defaultdict
+import pytest
+from app.core.config import settings
+from app.core.database import Collections
+from app.db.repositories import UserRepository, OnboardingRepository
+from app.services.snapshot_materializer import SnapshotMaterializer
+from app.services.workspace_service import WorkspaceService
+
+STUDENT_VIEWS = ["overview", "career", "focus", "skillproof"]
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def limit(self, n):
+        self._docs = self._docs[:n]
+        return self
+
+    async def to_list(self, length=None):
+        return self._docs
+
+class BulkResult:
+    def __init__(self, modified_count):
+        self.modified_count = modified_count
+
+class FakeSnapshots:
+    """workspace_snapshots keyed by (user_id, view): claim, mark_stale, guarded save"""
+
+    name = Collections.WORKSPACE_SNAPSHOTS
+
+    def __init__(self):
+        self.docs = {}
+
+    def find(self, query, projection=None):
+        views = query["view"]["$in"]
+        return FakeCursor([
+            dict(doc) for (user_id, view), doc in self.docs.items()
+            if user_id == query["user_id"] and view in views
+        ])
+
+    async def update_many(self, query, update):
+        for (user_id, _), doc in self.docs.items():
+            if user_id == query["user_id"]:
+                doc.update(update["$set"])
+                doc["generation"] += update["$inc"]["generation"]
+
+    async def bulk_write(self, writes, ordered=True):
+        modified = 0
+        for write in writes:
+            query, update = write._filter, write._doc
+            key = (query["user_id"], query["view"])
+            doc = self.docs.get(key)
+            if doc is None:
+                if write._upsert:
+                    self.docs[key] = {"user_id": key[0], "view": key[1], **update["$setOnInsert"]}
+                continue
+            if "$set" in update and doc["generation"] == query.get("generation", doc["generation"]):
+                doc.update(update["$set"])
+                modified += 1
+        return BulkResult(modified)
+
+class Builds:
+    """
+    Stands in for WorkspaceService.get_workspace_views
+
+    writes_during: how many of the next builds see a concurrent write land
+    (mark_stale) before they save.
+    """
+
+    def __init__(self, writes_during=0, deferred=()):
+        self.count = 0
+        self.writes_during = writes_during
+        self.deferred = set(deferred)
+
+    def install(self, monkeypatch):
+        builds = self
+
+        async def get_workspace_views(service, user_id, role, views, onboarding_data, render_only=False):
+            builds.count += 1
+            service.deferred = set(builds.deferred)
+            if builds.writes_during:
+                builds.writes_during -= 1
+                await service.snapshots.mark_stale(user_id)
+            return {view: {"view": view, "build": builds.count} for view in views}
+
+        monkeypatch.setattr(WorkspaceService, "get_workspace_views", get_workspace_views)
+
+@pytest.fixture
+def snapshots_on(monkeypatch):
+    monkeypatch.setattr(settings, "WORKSPACE_SNAPSHOTS", True)
+
+@pytest.fixture
+def materializer(snapshots_on, monkeypatch):
+    async def get_cached_user(self, user_id, min_token_version=0):
+        return {"user_id": user_id, "role": "student", "onboarding_completed": True}
+
+    async def get_profile(self, user_id, projection=None):
+        return {"user_id": user_id, "data": {}}
+
+    monkeypatch.setattr(UserRepository, "get_cached_user", get_cached_user)
+    monkeypatch.setattr(OnboardingRepository, "get_profile", get_profile)
+
+    db = defaultdict(object)
+    db[Collections.WORKSPACE_SNAPSHOTS] = FakeSnapshots()
+
+    materializer = SnapshotMaterializer(debounce=0)
+    materializer._db = db
+    return materializer
+
+def snapshot_docs(materializer):
+    return materializer._db[Collections.WORKSPACE_SNAPSHOTS].docs
+
+# ==========================================
+# DEBOUNCE
+# ==========================================
+
+def recording(materializer, during=None):
+    calls = []
+
+    async def rebuild(user_id):
+        calls.append(user_id)
+        if during:
+            during(user_id, len(calls))
+        return 0
+
+    materializer.rebuild = rebuild
+    return calls
+
+def test_burst_of_writes_shares_one_rebuild(snapshots_on):
+    materializer = SnapshotMaterializer(debounce=0.01)
+    materializer._db = object()
+    calls = recording(materializer)
+
+    async def burst():
+        for _ in range(3):
+            materializer.schedule("user_1")
+        materializer.schedule("user_2")
+        await asyncio.sleep(0.05)
+
+    asyncio.run(burst())
+
+    assert sorted(calls) == ["user_1", "user_2"]
+    assert materializer.scheduled == 2
+    assert materializer.coalesced == 2
+    assert materializer.stats()["pending"] == 0
+
+def test_write_during_rebuild_schedules_another(snapshots_on):
+    materializer = SnapshotMaterializer(debounce=0)
+    materializer._db = object()
+
+    def write_mid_rebuild(user_id, call):
+        if call == 1:
+            materializer.schedule(user_id)
+
+    calls = recording(materializer, during=write_mid_rebuild)
+
+    async def run():
+        materializer.schedule("user_1")
+        await asyncio.sleep(0.02)
+
+    asyncio.run(run())
+
+    assert calls == ["user_1", "user_1"]
+    assert materializer.coalesced == 0
+
+def test_schedule_is_noop_when_snapshots_off(monkeypatch):
+    monkeypatch.setattr(settings, "WORKSPACE_SNAPSHOTS", False)
+    materializer = SnapshotMaterializer(debounce=0)
+    materializer._db = object()
+    calls = recording(materializer)
+
+    async def run():
+        materializer.schedule("user_1")
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+
+    assert calls == []
+    assert materializer.scheduled == 0
+
+# ==========================================
+# GENERATION-GUARDED SAVE
+# ==========================================
+
+def test_rebuild_saves_every_snapshot_view(materializer, monkeypatch):
+    builds = Builds()
+    builds.install(monkeypatch)
+
+    assert asyncio.run(materializer.rebuild("user_1")) == len(STUDENT_VIEWS)
+
+    assert builds.count == 1
+    docs = snapshot_docs(materializer)
+    assert sorted(view for _, view in docs) == sorted(STUDENT_VIEWS)
+    assert all(doc["stale"] is False and doc["generation"] == 0 for doc in docs.values())
+
+def test_write_mid_build_is_retried(materializer, monkeypatch):
+    builds = Builds(writes_during=1)
+    builds.install(monkeypatch)
+
+    assert asyncio.run(materializer.rebuild("user_1")) == len(STUDENT_VIEWS)
+
+    # The first payload lost the generation check; the retry's landed
+    assert builds.count == 2
+    docs = snapshot_docs(materializer).values()
+    assert all(doc["payload"]["build"] == 2 and doc["stale"] is False for doc in docs)
+    assert all(doc["generation"] == 1 for doc in docs)
+    assert materializer.rebuilds == 1
+
+def test_retries_stop_at_max_attempts(materializer, monkeypatch):
+    builds = Builds(writes_during=5)
+    builds.install(monkeypatch)
+
+    assert asyncio.run(materializer.rebuild("user_1")) == 0
+
+    assert builds.count == materializer.max_attempts
+    assert all(doc["stale"] is True for doc in snapshot_docs(materializer).values())
+
+def test_deferred_views_do_not_trigger_retry(materializer, monkeypatch):
+    builds = Builds(deferred={"overview"})
+    builds.install(monkeypatch)
+
+    assert asyncio.run(materializer.rebuild("user_1")) == len(STUDENT_VIEWS) - 1
+
+    assert builds.count == 1
+    assert snapshot_docs(materializer)[("user_1", "overview")]["stale"] is True
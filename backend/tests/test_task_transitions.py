@@ -0,0 +1,97 @@
+"""
+Task complete/skip routes: TaskTransition outcomes -> HTTP status
+"""
+
+import asyncio
+from fastapi import HTTPException
+import pytest
+from app.db.repositories import TaskTransition
+from app.routes.tasks import CompleteTaskRequest, SkipTaskRequest, complete_task, skip_task
+
+USER = {"user_id": "user_1", "email": "student@example.com"}
+TASK = {
+    "task_id": "task_1",
+    "user_id": "user_1",
+    "title": "Read chapter 3",
+    "task_type": "daily",
+    "assigned_date": "2024-01-01"
+}
+
+class FakeTaskRepo:
+    """Returns a fixed outcome from complete_task / skip_task"""
+    
+    def __init__(self, outcome):
+        self.outcome = outcome
+    
+    async def complete_task(self, task_id, user_id):
+        return self.outcome, TASK if self.outcome == TaskTransition.OK else None
+    
+    async def skip_task(self, task_id, user_id, reason=None):
+        return self.outcome, TASK if self.outcome == TaskTransition.OK else None
+
+class FakeHistoryRepo:
+    """Collects logged events"""
+    
+    def __init__(self):
+        self.events = []
+    
+    async def log_event(self, history_data):
+        self.events.append(history_data)
+
+def complete(outcome):
+    history = FakeHistoryRepo()
+    response = asyncio.run(complete_task(
+        CompleteTaskRequest(task_id="task_1"), USER, FakeTaskRepo(outcome), history
+    ))
+    return response, history
+
+def skip(outcome):
+    history = FakeHistoryRepo()
+    response = asyncio.run(skip_task(
+        SkipTaskRequest(task_id="task_1", reason="busy"), USER, FakeTaskRepo(outcome), history
+    ))
+    return response, history
+
+# ==========================================
+# COMPLETE
+# ==========================================
+
+@pytest.mark.parametrize("outcome, status_code", [
+    (TaskTransition.NOT_FOUND, 404),
+    (TaskTransition.FORBIDDEN, 403),
+    (TaskTransition.ALREADY_COMPLETED, 400)
+])
+def test_complete_errors(outcome, status_code):
+    with pytest.raises(HTTPException) as error:
+        complete(outcome)
+    
+    assert error.value.status_code == status_code
+
+def test_complete_ok_logs_event():
+    response, history = complete(TaskTransition.OK)
+    
+    assert response["success"] is True
+    assert [event.event_type for event in history.events] == ["task_completed"]
+
+# ==========================================
+# SKIP
+# ==========================================
+
+@pytest.mark.parametrize("outcome, status_code", [
+    (TaskTransition.NOT_FOUND, 404),
+    (TaskTransition.FORBIDDEN, 403),
+    (TaskTransition.ALREADY_COMPLETED, 400),
+    (TaskTransition.ALREADY_SKIPPED, 400)
+])
+def test_skip_errors(outcome, status_code):
+    with pytest.raises(HTTPException) as error:
+        skip(outcome)
+    
+    assert error.value.status_code == status_code
+
+def test_skip_ok_logs_event_with_reason():
+    response, history = skip(TaskTransition.OK)
+    
+    assert response["reason"] == "busy"
+    assert history.events[0].event_type == "task_skipped"
+    assert history.events[0].context["reason"] == "busy"
@@ -0,0 +1,112 @@
+"""
+Token revocation: version map expiry and the /auth/verify dependency
+"""
+
+from collections import defaultdict
+import asyncio
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+import pytest
+from app.core import dependencies, security
+from app.core.security import TokenVersionMap, create_access_token
+
+class FakeClock:
+    """Stands in for time.monotonic"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(security.time, "monotonic", fake)
+    return fake
+
+# ==========================================
+# VERSION MAP
+# ==========================================
+
+def test_unknown_user_is_undecided(clock):
+    versions = TokenVersionMap(ttl_seconds=30)
+    
+    assert versions.is_current("user_1", 0) is None
+
+def test_older_tokens_are_rejected(clock):
+    versions = TokenVersionMap(ttl_seconds=30)
+    versions.observe("user_1", 2)
+    
+    assert versions.is_current("user_1", 1) is False
+    assert versions.is_current("user_1", 2) is True
+
+def test_versions_never_move_backwards(clock):
+    versions = TokenVersionMap(ttl_seconds=30)
+    versions.observe("user_1", 3)
+    versions.observe("user_1", 2)
+    
+    assert versions.get("user_1") == 3
+
+def test_entries_expire(clock):
+    versions = TokenVersionMap(ttl_seconds=30)
+    versions.observe("user_1", 2)
+    
+    clock.now += 30
+    assert versions.is_current("user_1", 1) is None
+    assert versions.stats()["tracked_users"] == 0
+
+# ==========================================
+# get_token_claims
+# ==========================================
+
+def claims_for(monkeypatch, token_version, stored_version, versions):
+    lookups = []
+    
+    async def load_token_version(self, user_id):
+        lookups.append(user_id)
+        if stored_version is not None:
+            versions.observe(user_id, stored_version)
+        return stored_version
+    
+    monkeypatch.setattr(dependencies, "token_versions", versions)
+    monkeypatch.setattr(dependencies.UserRepository, "load_token_version", load_token_version)
+    
+    token = create_access_token({"sub": "user_1", "role": "student", "token_version": token_version})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return (lambda: asyncio.run(dependencies.get_token_claims(credentials, db=defaultdict(object)))), lookups
+
+def test_map_miss_reads_the_database_once(monkeypatch, clock):
+    versions = TokenVersionMap(ttl_seconds=30)
+    verify, lookups = claims_for(monkeypatch, token_version=1, stored_version=1, versions=versions)
+    
+    assert verify()["role"] == "student"
+    assert verify()["role"] == "student"
+    assert lookups == ["user_1"]
+
+def test_bump_on_another_worker_revokes_token(monkeypatch, clock):
+    versions = TokenVersionMap(ttl_seconds=30)
+    verify, lookups = claims_for(monkeypatch, token_version=1, stored_version=2, versions=versions)
+    
+    with pytest.raises(HTTPException) as error:
+        verify()
+    assert error.value.status_code == 401
+
+def test_stale_entry_is_rechecked_after_ttl(monkeypatch, clock):
+    versions = TokenVersionMap(ttl_seconds=30)
+    versions.observe("user_1", 1)
+    verify, lookups = claims_for(monkeypatch, token_version=1, stored_version=2, versions=versions)
+    
+    assert verify()["user_id"] == "user_1"
+    assert lookups == []
+    
+    clock.now += 30
+    with pytest.raises(HTTPException):
+        verify()
+    assert lookups == ["user_1"]
+
+def test_deleted_user_is_rejected(monkeypatch, clock):
+    verify, _ = claims_for(monkeypatch, token_version=0, stored_version=None, versions=TokenVersionMap(30))
+    
+    with pytest.raises(HTTPException):
+        verify()
@@ -139,6 +139,9 @@ class Phase3Verifier:
             print(f"Onboarding Status: {response.status_code}")
             
             if response.status_code == 200:
+                # Onboarding revokes the old token and returns a fresh one
+                self.token = response.json().get("access_token") or self.token
+                headers = {"Authorization": f"Bearer {self.token}"}
                 self.log("Onboarding Create", True, "Onboarding completed")
             else:
                 print(f"Onboarding Response: {response.text}")